@@ -0,0 +1,64 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+u"""
+Benchmark of TileMap.load on a map with many tile sets, loading the images
+one after another, using a thread pool and slicing the tiles as subsurfaces.
+
+Uses pygame with the dummy video driver, no window is opened.
+
+usage: python bench_image_load.py [number_of_tile_sets [workers]]
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+import tiledtmxloader
+import synthetic
+
+
+#-------------------------------------------------------------------------------
+def _time_load(world_map, workers, subsurfaces=False, repeat=3):
+    best = None
+    for i in xrange(repeat):
+        world_map.indexed_tiles = {}
+        start = time.time()
+        world_map.load(tiledtmxloader.ImageLoaderPygame(subsurfaces), workers)
+        duration = time.time() - start
+        if best is None or duration < best:
+            best = duration
+    return best
+
+def main():
+    num_tile_sets = 24
+    workers = 4
+    if len(sys.argv) > 1:
+        num_tile_sets = int(sys.argv[1])
+    if len(sys.argv) > 2:
+        workers = int(sys.argv[2])
+
+    tmp_dir = tempfile.mkdtemp()
+    try:
+        file_name = os.path.join(tmp_dir, 'tile_sets.tmx')
+        synthetic.write_tile_sets_map(file_name, num_tile_sets, 1024)
+        world_map = tiledtmxloader.TileMapParser().parse_decode(file_name)
+        sequential = _time_load(world_map, None)
+        parallel = _time_load(world_map, workers)
+        subsurfaces = _time_load(world_map, None, True)
+    finally:
+        shutil.rmtree(tmp_dir)
+
+    print "tile sets: %d, tiles: %d" % (num_tile_sets, len(world_map.indexed_tiles))
+    print "sequential:         %.3fs" % sequential
+    print "%2d workers:         %.3fs" % (workers, parallel)
+    print "speedup:            %.2fx" % (sequential / parallel)
+    print "subsurfaces:        %.3fs" % subsurfaces
+    print "speedup:            %.2fx" % (sequential / subsurfaces)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,59 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+u"""
+Benchmark of the time a cold import of tiledtmxloader costs.
+
+Each import runs in a new python process, the time of starting an empty
+interpreter is subtracted. It also checks that importing prints nothing.
+
+usage: python bench_import.py [repeat]
+"""
+
+import os
+import subprocess
+import sys
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir)
+
+STATEMENTS = [
+    'pass',
+    'import tiledtmxloader',
+    'import tiledtmxloader.renderpygame',
+    'import tiledtmxloader.demo',
+]
+
+
+#-------------------------------------------------------------------------------
+def _time_statement(statement, repeat):
+    env = dict(os.environ, PYTHONPATH=ROOT)
+    timings = []
+    output = ''
+    for i in xrange(repeat):
+        start = time.time()
+        process = subprocess.Popen([sys.executable, '-c', statement], env=env, \
+                                   stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
+        output = process.communicate()[0]
+        timings.append(time.time() - start)
+    timings.sort()
+    return timings[len(timings) // 2], output
+
+def main():
+    repeat = 20
+    if len(sys.argv) > 1:
+        repeat = int(sys.argv[1])
+    # compile once so the \*.pyc files exist like for an installed package
+    env = dict(os.environ, PYTHONPATH=ROOT)
+    env.pop('PYTHONDONTWRITEBYTECODE', None)
+    subprocess.call([sys.executable, '-c', 'import tiledtmxloader.demo'], env=env)
+    baseline, output = _time_statement(STATEMENTS[0], repeat)
+    print "%-40s %8.2f ms" % ('python -c "pass"', baseline * 1000)
+    for statement in STATEMENTS[1:]:
+        median, output = _time_statement(statement, repeat)
+        print "%-40s %8.2f ms (+%.2f ms)" % (statement, median * 1000, (median - baseline) * 1000)
+        if statement == 'import tiledtmxloader' and output:
+            print "    import printed output: %r" % output
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,189 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+u"""
+Benchmark of the load pipeline of tiledtmxloader on synthetic maps.
+
+Generates a \*.tmx file and times the stages separately:
+
+    parse:   reading the file and building the TileMap (minidom)
+    convert: TileMap.convert()
+    decode:  TileMap.decode()
+    load:    TileMap.load() using ImageLoaderPygame with the dummy video
+             driver, skipped if pygame is not installed
+
+The peak memory (max rss) after each stage is recorded too. Each
+configuration runs in its own process, so the peaks do not influence each
+other. The report is written as json and can be compared to the report of
+another commit.
+
+usage:
+    python bench_load.py [options]
+    python bench_load.py --matrix --output new.json --compare old.json
+"""
+
+import json
+import optparse
+import os
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+import synthetic
+
+STAGES = ['parse', 'convert', 'decode', 'load']
+
+# all encoding and compression combinations Tiled writes
+MATRIX = [('xml', None), ('csv', None), ('base64', None), ('base64', 'zlib'), ('base64', 'gzip')]
+
+
+#-------------------------------------------------------------------------------
+def _max_rss():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+def run_config(config):
+    u"""
+    Generates the map described by config and times the stages, best of
+    config['repeat'] runs.
+
+    :returns: dict {stage: seconds} and the peak rss in kB after each stage
+    """
+    import tiledtmxloader
+    from xml.dom import minidom
+    try:
+        pygame = __import__('pygame')
+        pygame.display.init()
+    except ImportError:
+        pygame = None
+
+    tmp_dir = tempfile.mkdtemp()
+    try:
+        file_name = os.path.join(tmp_dir, 'synthetic.tmx')
+        synthetic.write_map(file_name, config['width'], config['height'], config['layers'],
+                            config['encoding'], config['compression'], config['objects'],
+                            config['tile_sets'], write_images=pygame is not None)
+        timings = dict((stage, None) for stage in STAGES)
+        peak_rss = dict((stage, None) for stage in STAGES)
+        for i in xrange(config['repeat']):
+            durations = {}
+            start = time.time()
+            # the stages of TileMapParser.parse(), split to time convert() separately
+            parser = tiledtmxloader.TileMapParser()
+            dom = minidom.parseString(parser._read_file(file_name))
+            for node in parser._get_nodes(dom.childNodes, 'map'):
+                world_map = parser._build_world_map(node)
+            world_map.map_file_name = parser.map_file_name
+            durations['parse'] = time.time() - start
+            peak_rss['parse'] = _max_rss()
+
+            start = time.time()
+            world_map.convert()
+            durations['convert'] = time.time() - start
+            peak_rss['convert'] = _max_rss()
+
+            start = time.time()
+            world_map.decode(config['workers'])
+            durations['decode'] = time.time() - start
+            peak_rss['decode'] = _max_rss()
+
+            if pygame is not None:
+                start = time.time()
+                world_map.load(tiledtmxloader.ImageLoaderPygame(), config['workers'])
+                durations['load'] = time.time() - start
+                peak_rss['load'] = _max_rss()
+
+            for stage, duration in durations.items():
+                if timings[stage] is None or duration < timings[stage]:
+                    timings[stage] = duration
+    finally:
+        shutil.rmtree(tmp_dir)
+    return {'timings': timings, 'peak_rss_kb': peak_rss}
+
+def _run_in_subprocess(config):
+    process = subprocess.Popen([sys.executable, os.path.abspath(__file__), '--run-config', \
+                                json.dumps(config)], stdout=subprocess.PIPE)
+    output = process.communicate()[0]
+    if process.returncode:
+        raise Exception(u'benchmark of %s failed' % config)
+    # the last line is the result, the loader may print other things before
+    return json.loads(output.strip().splitlines()[-1])
+
+def _config_name(config):
+    return '%(width)dx%(height)d %(layers)d layers %(encoding)s/%(compression)s' % config
+
+#-------------------------------------------------------------------------------
+def print_report(report, old_report=None):
+    old_results = {}
+    if old_report:
+        for entry in old_report['results']:
+            old_results[entry['name']] = entry
+    for entry in report['results']:
+        print entry['name']
+        old = old_results.get(entry['name'])
+        for stage in STAGES:
+            seconds = entry['timings'][stage]
+            if seconds is None:
+                continue
+            line = '    %-8s %8.4fs  peak rss %8d kB' % (stage, seconds, entry['peak_rss_kb'][stage])
+            if old and old['timings'].get(stage):
+                line += '   (was %8.4fs, %+.1f%%)' % (old['timings'][stage], \
+                            100.0 * (seconds - old['timings'][stage]) / old['timings'][stage])
+            print line
+
+def main():
+    parser = optparse.OptionParser(usage=u'python %prog [options]')
+    parser.add_option('--width', type='int', default=256)
+    parser.add_option('--height', type='int', default=256)
+    parser.add_option('--layers', type='int', default=4)
+    parser.add_option('--encoding', default='base64', help=u'xml, csv or base64')
+    parser.add_option('--compression', default='zlib', help=u'none, zlib or gzip')
+    parser.add_option('--objects', type='int', default=1000)
+    parser.add_option('--tile-sets', type='int', default=4)
+    parser.add_option('--workers', type='int', default=None, help=u'threads for decode and load')
+    parser.add_option('--repeat', type='int', default=3)
+    parser.add_option('--matrix', action='store_true', help=u'run all encodings and compressions')
+    parser.add_option('--output', help=u'write the json report to this file')
+    parser.add_option('--compare', help=u'json report of an earlier run to compare with')
+    parser.add_option('--run-config', help=optparse.SUPPRESS_HELP)
+    options, args = parser.parse_args()
+
+    if options.run_config:
+        print json.dumps(run_config(json.loads(options.run_config)))
+        return
+
+    base_config = {'width': options.width, 'height': options.height, 'layers': options.layers,
+                   'objects': options.objects, 'tile_sets': options.tile_sets,
+                   'workers': options.workers, 'repeat': options.repeat}
+    combinations = MATRIX
+    if not options.matrix:
+        compression = options.compression
+        if compression == 'none':
+            compression = None
+        combinations = [(options.encoding, compression)]
+    results = []
+    for encoding, compression in combinations:
+        config = dict(base_config, encoding=encoding, compression=compression)
+        result = _run_in_subprocess(config)
+        result['name'] = _config_name(config)
+        result['config'] = config
+        results.append(result)
+    report = {'python': sys.version.split()[0], 'results': results}
+
+    old_report = None
+    if options.compare:
+        old_report = json.load(open(options.compare))
+    print_report(report, old_report)
+    if options.output:
+        out = open(options.output, 'w')
+        try:
+            json.dump(report, out, indent=2, sort_keys=True)
+        finally:
+            out.close()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,81 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+u"""
+Memory benchmark of the map model classes on a synthetic object heavy map.
+
+It parses the map and compares the memory used by the MapObject and Tile
+instances with the same data stored in plain classes (one __dict__ and one
+properties dict per instance, like before they used __slots__).
+
+usage: python bench_memory.py [number_of_objects]
+"""
+
+import gc
+import os
+import resource
+import shutil
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+import tiledtmxloader
+import synthetic
+
+
+#-------------------------------------------------------------------------------
+class _PlainObject(object):
+    u"""
+    Plain class holding the same attributes, for comparison.
+    """
+
+    def __init__(self, source):
+        for name in source.__slots__:
+            if name not in ('_properties', '__dict__') and hasattr(source, name):
+                setattr(self, name, getattr(source, name))
+        for name, value in getattr(source, '__dict__', {}).items():
+            setattr(self, name, value)
+        self.properties = dict(source._properties or {})
+
+def _instance_size(obj):
+    # the instance itself and the dicts it owns (__dict__ and properties)
+    size = sys.getsizeof(obj)
+    for referent in gc.get_referents(obj):
+        if type(referent) is dict:
+            size += sys.getsizeof(referent)
+            if referent is getattr(obj, '__dict__', None) and 'properties' in referent:
+                size += sys.getsizeof(referent['properties'])
+    return size
+
+def _total_size(objects):
+    return sum(_instance_size(obj) for obj in objects)
+
+#-------------------------------------------------------------------------------
+def main():
+    num_objects = 100000
+    if len(sys.argv) > 1:
+        num_objects = int(sys.argv[1])
+    num_tiles = num_objects // 4
+
+    tmp_dir = tempfile.mkdtemp()
+    try:
+        file_name = os.path.join(tmp_dir, 'objects.tmx')
+        synthetic.write_object_map(file_name, num_objects, num_tiles)
+        rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        world_map = tiledtmxloader.TileMapParser().parse(file_name)
+        rss_after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    finally:
+        shutil.rmtree(tmp_dir)
+
+    objects = world_map.object_groups[0].objects
+    tiles = world_map.tile_sets[0].tiles
+    print "objects: %d, tiles: %d" % (len(objects), len(tiles))
+    print "peak rss growth while parsing: %.1f MB" % ((rss_after - rss_before) / 1024.0)
+    print "%-10s %14s %14s %8s" % ("", "plain bytes", "slots bytes", "saved")
+    for name, instances in ((u"MapObject", objects), (u"Tile", tiles)):
+        slotted = _total_size(instances)
+        plain = _total_size([_PlainObject(obj) for obj in instances])
+        print "%-10s %14d %14d %7.1f%%" % (name, plain, slotted, 100.0 * (plain - slotted) / plain)
+
+if __name__ == '__main__':
+    main()
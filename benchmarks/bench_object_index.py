@@ -0,0 +1,99 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+u"""
+Benchmark of the MapObjectIndex of an object group against linear scans over
+the objects list, on a synthetic object heavy map.
+
+usage: python bench_object_index.py [number_of_objects] [number_of_queries]
+"""
+
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+import tiledtmxloader
+import synthetic
+
+
+#-------------------------------------------------------------------------------
+def _scan_rect(objects, x, y, width, height):
+    found = []
+    for obj in objects:
+        if obj.x < x + width and obj.x + obj.width > x and \
+           obj.y < y + height and obj.y + obj.height > y:
+            found.append(obj)
+    return found
+
+def _scan_nearest(objects, x, y):
+    best = None
+    best_dist = None
+    for obj in objects:
+        dist = (obj.x - x) ** 2 + (obj.y - y) ** 2
+        if best_dist is None or dist < best_dist:
+            best = obj
+            best_dist = dist
+    return best
+
+def _timed(func, queries):
+    start = time.time()
+    for query in queries:
+        func(*query)
+    return time.time() - start
+
+#-------------------------------------------------------------------------------
+def main():
+    num_objects = 100000
+    num_queries = 200
+    if len(sys.argv) > 1:
+        num_objects = int(sys.argv[1])
+    if len(sys.argv) > 2:
+        num_queries = int(sys.argv[2])
+
+    tmp_dir = tempfile.mkdtemp()
+    try:
+        file_name = os.path.join(tmp_dir, 'objects.tmx')
+        synthetic.write_object_map(file_name, num_objects)
+        world_map = tiledtmxloader.TileMapParser().parse(file_name)
+    finally:
+        shutil.rmtree(tmp_dir)
+    world_map.convert()
+    group = world_map.object_groups[0]
+    objects = group.objects
+    map_width = world_map.pixel_width
+    map_height = world_map.pixel_height
+
+    start = time.time()
+    index = group.get_index()
+    build_time = time.time() - start
+    start = time.time()
+    index.rebuild()
+    rebuild_time = time.time() - start
+    print "objects: %d, cell size: %d" % (len(objects), index.cell_size)
+    print "build: %.3f s, rebuild: %.3f s" % (build_time, rebuild_time)
+
+    rand = random.Random(0)
+    rects = [(rand.randrange(map_width), rand.randrange(map_height), 320, 240) \
+                                                for i in range(num_queries)]
+    points = [(rand.randrange(map_width), rand.randrange(map_height)) \
+                                                for i in range(num_queries)]
+    print "%d queries each" % num_queries
+    print "%-12s %12s %12s %9s" % ("", "scan s", "index s", "speedup")
+    for name, scan, indexed, queries in (
+            (u"query_rect", lambda x, y, w, h: _scan_rect(objects, x, y, w, h),
+                                            index.query_rect, rects),
+            (u"query_point", lambda x, y: _scan_rect(objects, x, y, 1, 1),
+                                            index.query_point, points),
+            (u"nearest", lambda x, y: _scan_nearest(objects, x, y),
+                                            index.nearest, points)):
+        scan_time = _timed(scan, queries)
+        index_time = _timed(indexed, queries)
+        print "%-12s %12.3f %12.3f %8.1fx" % (name, scan_time, index_time,
+                                        scan_time / max(index_time, 1e-9))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,173 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+u"""
+Benchmark of RendererPygame rendering a scripted camera path over a synthetic
+or a given map, for comparing renderer changes in automated runs.
+
+Each mode renders the same path: tile by tile, with the chunk cache, with
+all layers as one static group and in scroll mode. The sprites stand on the
+top layer, with sprites the static group is the layers below it. Reported are the frames
+per second, the blits per frame (counted in a separate pass, including the
+blits into the scroll mode back buffer) and, for the modes rendering layer
+by layer, the time spent in each layer.
+
+Uses pygame with the dummy video driver, no window is opened.
+
+usage: python bench_render.py [frames [number_of_sprites [map.tmx]]]
+"""
+
+import math
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+import pygame
+import tiledtmxloader
+from tiledtmxloader import renderpygame
+import synthetic
+
+
+SCREEN_SIZE = (1024, 768)
+
+#-------------------------------------------------------------------------------
+class _CountingSurface(pygame.Surface):
+    # counts the blits onto it and onto its subsurfaces
+
+    blits_count = 0
+
+    def blit(self, *args):
+        _CountingSurface.blits_count += 1
+        return pygame.Surface.blit(self, *args)
+
+    def blits(self, blit_sequence, doreturn=1):
+        blit_sequence = list(blit_sequence)
+        _CountingSurface.blits_count += len(blit_sequence)
+        return pygame.Surface.blits(self, blit_sequence, doreturn)
+
+#-------------------------------------------------------------------------------
+def _camera_path(world_map, frames):
+    # a figure eight over the map, scrolling in all directions at changing speed
+    width, height = SCREEN_SIZE
+    range_x = max(world_map.pixel_width - width, 0) // 2
+    range_y = max(world_map.pixel_height - height, 0) // 2
+    path = []
+    for frame in xrange(frames):
+        angle = 2 * math.pi * frame / frames
+        path.append((int(range_x + range_x * math.sin(angle)), int(range_y + range_y * math.sin(2 * angle))))
+    return path
+
+def _add_sprites(renderer, world_map, num_sprites, seed=0):
+    rand = random.Random(seed)
+    sprites = []
+    for idx in xrange(num_sprites):
+        image = pygame.Surface((16, 24 + idx % 3 * 8)).convert()
+        image.fill((rand.randrange(256), rand.randrange(256), rand.randrange(256)))
+        rect = image.get_rect(topleft=(rand.randrange(world_map.pixel_width), rand.randrange(world_map.pixel_height)))
+        sprites.append(renderpygame.RendererPygame.Sprite(image, rect))
+    renderer.add_sprites(len(world_map.layers) - 1, sprites)
+    return sprites
+
+def _run(renderer, screen, path, sprites, layer_times=None):
+    # renders the path, with layer_times layer by layer adding up the time of each layer
+    width, height = SCREEN_SIZE
+    layer_ids = range(len(renderer._world_map.layers))
+    for frame, (cam_x, cam_y) in enumerate(path):
+        for sprite in sprites:
+            sprite.rect.move_ip((frame + id(sprite)) % 3 - 1, 1 - frame % 3)
+        renderer.update_sprites(sprites)
+        renderer.set_camera_position(cam_x, cam_y, width, height)
+        if layer_times is None:
+            renderer.render(screen, layer_ids)
+        else:
+            screen.fill((0, 0, 0))
+            for layer_id in layer_ids:
+                start = time.time()
+                renderer.render_layer(screen, layer_id)
+                layer_times[layer_id] += time.time() - start
+
+def _bench_mode(world_map, mode, frames, num_sprites, by_layer):
+    screen = pygame.display.get_surface()
+    path = _camera_path(world_map, frames)
+
+    def setup():
+        renderer = renderpygame.RendererPygame(world_map)
+        if mode == 'chunks':
+            renderer.set_chunk_cache()
+        elif mode == 'static':
+            # a layer holding sprites is not rendered from the static blocks
+            last = len(world_map.layers) - 1
+            if num_sprites:
+                last -= 1
+            if last >= 0:
+                renderer.set_static_layers(0, last)
+        elif mode == 'scroll':
+            renderer.set_scroll_mode()
+        return renderer, _add_sprites(renderer, world_map, num_sprites)
+
+    renderer, sprites = setup()
+    # the first frames build the caches
+    _run(renderer, screen, path[:10], sprites)
+    layer_times = None
+    if by_layer:
+        layer_times = [0.0] * len(world_map.layers)
+    start = time.time()
+    _run(renderer, screen, path, sprites, layer_times)
+    duration = time.time() - start
+
+    renderer, sprites = setup()
+    counting = _CountingSurface(SCREEN_SIZE, 0, screen)
+    if mode == 'scroll':
+        # render() reuses a back buffer of the right size, its blits are counted too
+        renderer._back_buffer = _CountingSurface(SCREEN_SIZE, 0, screen)
+    _CountingSurface.blits_count = 0
+    _run(renderer, counting, path, sprites)
+    return frames / duration, float(_CountingSurface.blits_count) / frames, layer_times
+
+def main():
+    frames = 300
+    num_sprites = 0
+    file_name = None
+    if len(sys.argv) > 1:
+        frames = int(sys.argv[1])
+    if len(sys.argv) > 2:
+        num_sprites = int(sys.argv[2])
+    if len(sys.argv) > 3:
+        file_name = sys.argv[3]
+
+    pygame.init()
+    pygame.display.set_mode(SCREEN_SIZE, 0, 32)
+    tmp_dir = tempfile.mkdtemp()
+    try:
+        if file_name is None:
+            file_name = os.path.join(tmp_dir, 'render.tmx')
+            synthetic.write_map(file_name, 256, 256, 4, write_images=True)
+        world_map = tiledtmxloader.TileMapParser().parse_decode(file_name)
+        world_map.load(tiledtmxloader.ImageLoaderPygame(convert=True))
+    finally:
+        shutil.rmtree(tmp_dir)
+
+    print "map: %dx%d tiles, %d layers, screen: %dx%d, frames: %d, sprites: %d" % \
+            (world_map.width, world_map.height, len(world_map.layers), SCREEN_SIZE[0], SCREEN_SIZE[1],
+             frames, num_sprites)
+    print "mode        fps     ms/frame  blits/frame"
+    all_layer_times = []
+    for mode in ('tiles', 'chunks', 'static', 'scroll'):
+        by_layer = mode in ('tiles', 'chunks')
+        fps, blits, layer_times = _bench_mode(world_map, mode, frames, num_sprites, by_layer)
+        print "%-8s %8.1f %10.2f %12.1f" % (mode, fps, 1000.0 / fps, blits)
+        if layer_times:
+            all_layer_times.append((mode, layer_times))
+
+    for mode, layer_times in all_layer_times:
+        print "%s, ms/frame per layer:" % mode
+        for layer, layer_time in zip(world_map.layers, layer_times):
+            print "    %-20s %8.2f" % (layer.name, 1000.0 * layer_time / frames)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,117 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+u"""
+Benchmark of RendererPygame.render_layer submitting the cached rows of a
+layer with one Surface.blits call, compared to the per-cell loop it
+replaced (the cells of each row unpacked and blitted one by one) and to the
+cached rows blitted one by one (what is used on a pygame without
+Surface.blits).
+
+Uses pygame with the dummy video driver, no window is opened.
+
+usage: python bench_render_blits.py [screen_width [screen_height [frames]]]
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+import pygame
+import tiledtmxloader
+from tiledtmxloader import renderpygame
+import synthetic
+
+
+#-------------------------------------------------------------------------------
+def _render_layer_per_cell(renderer, surf, layer_id):
+    # the tile loop of render_layer before the rows were cached and submitted
+    # with Surface.blits, for a layer without sprites and tiles reaching
+    # into the view
+    world_layer = renderer._world_map.layers[layer_id]
+    layer = renderer._layers[layer_id]
+    tile_w = layer.tilewidth
+    tile_h = layer.tileheight
+    cam_x = renderer._cam_offset_x + world_layer.x
+    cam_y = renderer._cam_offset_y + world_layer.y
+    left = max(cam_x // tile_w, layer.left)
+    right = min(-(-(cam_x + renderer._cam_width) // tile_w), layer.right)
+    top = max(cam_y // tile_h, layer.top)
+    bottom = min(-(-(cam_y + renderer._cam_height) // tile_h), layer.bottom)
+    surf_blit = surf.blit
+    layer_get_cells = layer.get_cells
+    for ypos in xrange(top, bottom):
+        screen_tile_y = (ypos + world_layer.y) * tile_h - cam_y
+        screen_tile_x = (left + world_layer.x) * tile_w - cam_x
+        for info in layer_get_cells(left, right, ypos):
+            if info:
+                offx, offy, screen_img = info
+                surf_blit(screen_img, (screen_tile_x + offx, screen_tile_y + offy))
+            screen_tile_x += tile_w
+
+def _time_frames(renderer, screen, frames, arm, repeat=5):
+    layer_ids = range(len(renderer._world_map.layers))
+    width, height = screen.get_size()
+    best = None
+    for i in xrange(repeat):
+        start = time.time()
+        for frame in xrange(frames):
+            renderer.set_camera_position(frame * 3, frame * 2, width, height)
+            screen.fill((0, 0, 0))
+            for layer_id in layer_ids:
+                if arm == 'per cell':
+                    _render_layer_per_cell(renderer, screen, layer_id)
+                elif arm == 'per tile':
+                    # passing surf_blit makes render_layer blit the cached
+                    # rows tile by tile
+                    renderer.render_layer(screen, layer_id, screen.blit)
+                else:
+                    renderer.render_layer(screen, layer_id)
+        duration = (time.time() - start) / frames
+        if best is None or duration < best:
+            best = duration
+    return best
+
+def main():
+    width = 1024
+    height = 768
+    frames = 200
+    if len(sys.argv) > 1:
+        width = int(sys.argv[1])
+    if len(sys.argv) > 2:
+        height = int(sys.argv[2])
+    if len(sys.argv) > 3:
+        frames = int(sys.argv[3])
+
+    pygame.init()
+    screen = pygame.display.set_mode((width, height), 0, 32)
+    tmp_dir = tempfile.mkdtemp()
+    try:
+        file_name = os.path.join(tmp_dir, 'render.tmx')
+        synthetic.write_map(file_name, 128, 128, 4, write_images=True)
+        world_map = tiledtmxloader.TileMapParser().parse_decode(file_name)
+        world_map.load(tiledtmxloader.ImageLoaderPygame(convert=True))
+    finally:
+        shutil.rmtree(tmp_dir)
+
+    renderer = renderpygame.RendererPygame(world_map)
+    if not hasattr(screen, 'blits'):
+        print "this pygame has no Surface.blits, the cached rows are blitted tile by tile in both runs"
+    # warm up, the first frames build the cached rows
+    _time_frames(renderer, screen, frames, 'blits', 1)
+    per_cell = _time_frames(renderer, screen, frames, 'per cell')
+    per_tile = _time_frames(renderer, screen, frames, 'per tile')
+    batched = _time_frames(renderer, screen, frames, 'blits')
+
+    print "screen: %dx%d, tile layers: %d" % (width, height, len(world_map.layers))
+    print "per cell loop:           %.2f ms/frame" % (per_cell * 1000)
+    print "cached rows, per tile:   %.2f ms/frame" % (per_tile * 1000)
+    print "cached rows, blits:      %.2f ms/frame" % (batched * 1000)
+    print "speedup over per cell:   %.2fx" % (per_cell / batched)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,90 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+u"""
+Benchmark of TileMapWriter on a large synthetic map, compared to writing
+the same document with minidom's toxml.
+
+The minidom time covers encoding the layers the same way plus serializing
+an already built dom of the map, building the dom is not counted, so it is
+a lower bound of what a dom based writer costs.
+
+usage: python bench_write.py [map_size [number_of_layers [number_of_objects]]]
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+import time
+from xml.dom import minidom
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+import tiledtmxloader
+import synthetic
+
+
+#-------------------------------------------------------------------------------
+def _best_of(func, repeat=3):
+    best = None
+    for i in xrange(repeat):
+        start = time.time()
+        func()
+        duration = time.time() - start
+        if best is None or duration < best:
+            best = duration
+    return best
+
+def _write_dom(world_map, dom, file_name, level):
+    for layer in world_map.layers:
+        tiledtmxloader._encode_gid_data(layer.decoded_content, u'zlib', level)
+    file = open(file_name, "wb")
+    try:
+        file.write(dom.toxml('utf-8'))
+    finally:
+        file.close()
+
+#-------------------------------------------------------------------------------
+def main():
+    size = 1024
+    num_layers = 4
+    num_objects = 20000
+    if len(sys.argv) > 1:
+        size = int(sys.argv[1])
+    if len(sys.argv) > 2:
+        num_layers = int(sys.argv[2])
+    if len(sys.argv) > 3:
+        num_objects = int(sys.argv[3])
+
+    tmp_dir = tempfile.mkdtemp()
+    try:
+        source = os.path.join(tmp_dir, 'source.tmx')
+        synthetic.write_map(source, size, size, num_layers, num_objects=num_objects)
+        world_map = tiledtmxloader.TileMapParser().parse_decode(source)
+        written = os.path.join(tmp_dir, 'written.tmx')
+        writer = tiledtmxloader.TileMapWriter()
+        dom_written = os.path.join(tmp_dir, 'dom.tmx')
+        times = []
+        for level in (1, 6):
+            writer_time = _best_of(lambda: writer.write(world_map, written, level=level))
+            dom = minidom.parse(written)
+            dom_time = _best_of(lambda: _write_dom(world_map, dom, dom_written, level))
+            times.append((level, writer_time, dom_time))
+            dom.unlink()
+
+        parsed = tiledtmxloader.TileMapParser().parse_decode(written)
+        same = all(list(layer.decoded_content) == list(parsed_layer.decoded_content) \
+                    for layer, parsed_layer in zip(world_map.layers, parsed.layers))
+        file_size = os.path.getsize(written)
+    finally:
+        shutil.rmtree(tmp_dir)
+
+    print "map %dx%d, %d layers, %d objects, %.1f MB written" % \
+                    (size, size, num_layers, num_objects, file_size / 1048576.0)
+    print "%-16s %14s %14s" % ("zlib level", "writer s", "minidom s")
+    for level, writer_time, dom_time in times:
+        print "%-16d %14.3f %14.3f" % (level, writer_time, dom_time)
+    print "round trip gives identical layer data:", same
+
+if __name__ == '__main__':
+    main()
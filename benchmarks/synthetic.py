@@ -0,0 +1,179 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+u"""
+Generators for synthetic \*.tmx files used by the benchmarks.
+"""
+
+import random
+
+
+#-------------------------------------------------------------------------------
+def write_object_map(file_name, num_objects, num_tiles=0, width=256, height=256,
+                     tile_size=16, properties_every=10, seed=0):
+    u"""
+    Writes an object heavy map without tile layers.
+
+    :Parameters:
+        file_name : string
+            path of the \*.tmx file to write
+        num_objects : int
+            number of objects in the single object group
+        num_tiles : int
+            number of <tile> definitions in the tile set
+        properties_every : int
+            every n-th object and tile gets a property, 0 for none
+        seed : int
+            seed of the random positions, the same seed gives the same map
+    """
+    rand = random.Random(seed)
+    out = open(file_name, "wb")
+    try:
+        out.write('<?xml version="1.0" encoding="UTF-8"?>\n')
+        out.write('<map version="1.0" orientation="orthogonal" width="%d" height="%d" '
+                  'tilewidth="%d" tileheight="%d">\n' % (width, height, tile_size, tile_size))
+        out.write(' <tileset firstgid="1" name="tiles" tilewidth="%d" tileheight="%d">\n' % \
+                  (tile_size, tile_size))
+        out.write('  <image source="tiles.png"/>\n')
+        for tile_id in xrange(num_tiles):
+            if properties_every and tile_id % properties_every == 0:
+                out.write('  <tile id="%d"><properties><property name="collision" value="1"/>'
+                          '</properties></tile>\n' % tile_id)
+            else:
+                out.write('  <tile id="%d"/>\n' % tile_id)
+        out.write(' </tileset>\n')
+        out.write(' <objectgroup name="objects" width="%d" height="%d">\n' % (width, height))
+        pixel_width = width * tile_size
+        pixel_height = height * tile_size
+        for idx in xrange(num_objects):
+            out.write('  <object name="obj%d" type="t%d" x="%d" y="%d" width="%d" height="%d"' % \
+                      (idx, idx % 7, rand.randrange(pixel_width), rand.randrange(pixel_height),
+                       rand.randrange(tile_size * 4), rand.randrange(tile_size * 4)))
+            if properties_every and idx % properties_every == 0:
+                out.write('><properties><property name="spawn" value="%d"/></properties></object>\n' % idx)
+            else:
+                out.write('/>\n')
+        out.write(' </objectgroup>\n')
+        out.write('</map>\n')
+    finally:
+        out.close()
+
+#-------------------------------------------------------------------------------
+def write_tile_sheet(file_name, width, height, seed=0):
+    u"""
+    Writes a png image filled with random colored 8x8 blocks, it does not
+    compress well so decoding it takes a realistic amount of time.
+    Needs pygame.
+    """
+    pygame = __import__('pygame')
+    rand = random.Random(seed)
+    surf = pygame.Surface((width, height))
+    for y in xrange(0, height, 8):
+        for x in xrange(0, width, 8):
+            surf.fill((rand.randrange(256), rand.randrange(256), rand.randrange(256)), (x, y, 8, 8))
+    pygame.image.save(surf, file_name)
+
+def write_tile_sets_map(file_name, num_tile_sets, sheet_size=512, width=64, height=64,
+                        tile_size=16):
+    u"""
+    Writes a map using num_tile_sets tile sets, each with its own sheet of
+    sheet_size x sheet_size pixels next to the map file, and one csv layer.
+    Needs pygame.
+    """
+    write_map(file_name, width, height, num_layers=1, encoding='csv', compression=None,
+              num_tile_sets=num_tile_sets, sheet_size=sheet_size, tile_size=tile_size,
+              write_images=True)
+
+#-------------------------------------------------------------------------------
+def write_map(file_name, width=128, height=128, num_layers=4, encoding='base64',
+              compression='zlib', num_objects=0, num_tile_sets=1, sheet_size=256,
+              tile_size=16, write_images=False, seed=0):
+    u"""
+    Writes a synthetic map with random tiles.
+
+    :Parameters:
+        file_name : string
+            path of the \*.tmx file to write
+        width : int
+            number of tiles in x direction
+        height : int
+            number of tiles in y direction
+        num_layers : int
+            number of tile layers
+        encoding : string
+            'xml', 'csv' or 'base64'
+        compression : string
+            None, 'zlib' or 'gzip', only used by base64
+        num_objects : int
+            number of objects in the single object group
+        num_tile_sets : int
+            number of tile sets, each uses its own sheet image
+        sheet_size : int
+            width and height of the sheets in pixels
+        write_images : bool
+            if True the sheet images are written next to the map, needs pygame
+        seed : int
+            seed of the random tiles, the same seed gives the same map
+    """
+    import os
+    rand = random.Random(seed)
+    base_dir = os.path.dirname(os.path.abspath(file_name))
+    tiles_per_set = (sheet_size // tile_size) ** 2
+    num_gids = num_tile_sets * tiles_per_set
+    out = open(file_name, "wb")
+    try:
+        out.write('<?xml version="1.0" encoding="UTF-8"?>\n')
+        out.write('<map version="1.0" orientation="orthogonal" width="%d" height="%d" '
+                  'tilewidth="%d" tileheight="%d">\n' % (width, height, tile_size, tile_size))
+        for idx in xrange(num_tile_sets):
+            sheet_name = 'sheet%d.png' % idx
+            if write_images:
+                write_tile_sheet(os.path.join(base_dir, sheet_name), sheet_size, sheet_size, idx)
+            out.write(' <tileset firstgid="%d" name="set%d" tilewidth="%d" tileheight="%d">\n' % \
+                      (1 + idx * tiles_per_set, idx, tile_size, tile_size))
+            out.write('  <image source="%s"/>\n </tileset>\n' % sheet_name)
+        for layer_idx in xrange(num_layers):
+            # every second tile is empty, like on decorative layers
+            gids = [rand.randrange(num_gids + 1) * rand.randrange(2) for i in xrange(width * height)]
+            out.write(' <layer name="layer%d" width="%d" height="%d">\n' % (layer_idx, width, height))
+            out.write(_encode_layer_data(gids, encoding, compression))
+            out.write(' </layer>\n')
+        if num_objects:
+            out.write(' <objectgroup name="objects" width="%d" height="%d">\n' % (width, height))
+            for idx in xrange(num_objects):
+                out.write('  <object name="obj%d" type="t%d" x="%d" y="%d" width="%d" height="%d"/>\n' % \
+                          (idx, idx % 7, rand.randrange(width * tile_size),
+                           rand.randrange(height * tile_size), tile_size, tile_size))
+            out.write(' </objectgroup>\n')
+        out.write('</map>\n')
+    finally:
+        out.close()
+
+def _encode_layer_data(gids, encoding, compression):
+    if encoding == 'xml':
+        return '  <data>\n%s  </data>\n' % ''.join(['   <tile gid="%d"/>\n' % gid for gid in gids])
+    if encoding == 'csv':
+        return '  <data encoding="csv">%s</data>\n' % ','.join([str(gid) for gid in gids])
+    if encoding != 'base64':
+        raise Exception(u'unknown data encoding %s' % encoding)
+    import base64
+    import struct
+    data = struct.pack('<%dI' % len(gids), *gids)
+    if compression == 'zlib':
+        import zlib
+        data = zlib.compress(data)
+    elif compression == 'gzip':
+        import gzip
+        import StringIO
+        stream = StringIO.StringIO()
+        gzipper = gzip.GzipFile(fileobj=stream, mode='wb')
+        gzipper.write(data)
+        gzipper.close()
+        data = stream.getvalue()
+    elif compression:
+        raise Exception(u'unknown data compression %s' % compression)
+    if compression:
+        attrs = 'encoding="base64" compression="%s"' % compression
+    else:
+        attrs = 'encoding="base64"'
+    return '  <data %s>%s</data>\n' % (attrs, base64.b64encode(data))
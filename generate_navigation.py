@@ -36,7 +36,7 @@ def findClosestCell(candidateCells, targetCell):
                 
     return currentCandidate
 
-def canSeeCellFromCell(tileMap, fromCell, toCell, collisionTiles):
+def canSeeCellFromCell(tileMap, fromCell, toCell, collisionTable):
     x0=fromCell.x
     y0=fromCell.y
     x1=toCell.x
@@ -59,7 +59,7 @@ def canSeeCellFromCell(tileMap, fromCell, toCell, collisionTiles):
         
         gid=tileMap.layers[1].content2D[x][y]
         
-        if gid and collisionTiles.count(gid)>0:
+        if gid<len(collisionTable) and collisionTable[gid]:
             return False
                 
         if error>0:
@@ -73,13 +73,23 @@ def canSeeCellFromCell(tileMap, fromCell, toCell, collisionTiles):
 
     return True
 
+def objectsInRow(tileMap, objectGroupIndex, row):
+    group=tileMap.object_groups[objectGroupIndex]
+    index=group.get_index(tileMap.tileheight)
+    return index.query_rect(group.x, group.y + row * tileMap.tileheight, tileMap.pixel_width, tileMap.tileheight)
+
+def objectsInColumn(tileMap, objectGroupIndex, column):
+    group=tileMap.object_groups[objectGroupIndex]
+    index=group.get_index(tileMap.tileheight)
+    return index.query_rect(group.x + column * tileMap.tilewidth, group.y, tileMap.tilewidth, tileMap.pixel_height)
+
 def findNextX(tileMap, objectGroupIndex, target):
     #Y is the same and next.x> target.x
     
     candidateCells=[]
     targetCell=tileCoordForObject(tileMap, target)
     
-    for object in tileMap.object_groups[objectGroupIndex].objects:
+    for object in objectsInRow(tileMap, objectGroupIndex, targetCell.y):
         
         objectCell=tileCoordForObject(tileMap, object)
         
@@ -95,7 +105,7 @@ def findPrevX(tileMap, objectGroupIndex, target):
     candidateCells=[]
     targetCell=tileCoordForObject(tileMap, target)
     
-    for object in tileMap.object_groups[objectGroupIndex].objects:
+    for object in objectsInRow(tileMap, objectGroupIndex, targetCell.y):
         
         objectCell=tileCoordForObject(tileMap, object)
         
@@ -111,7 +121,7 @@ def findNextY(tileMap, objectGroupIndex, target):
     candidateCells=[]
     targetCell=tileCoordForObject(tileMap, target)
     
-    for object in tileMap.object_groups[objectGroupIndex].objects:
+    for object in objectsInColumn(tileMap, objectGroupIndex, targetCell.x):
         
         objectCell=tileCoordForObject(tileMap, object)
         
@@ -126,7 +136,7 @@ def findPrevY(tileMap, objectGroupIndex, target):
     candidateCells=[]
     targetCell=tileCoordForObject(tileMap, target)
     
-    for object in tileMap.object_groups[objectGroupIndex].objects:
+    for object in objectsInColumn(tileMap, objectGroupIndex, targetCell.x):
         
         objectCell=tileCoordForObject(tileMap, object)
         
@@ -165,11 +175,7 @@ else:
 
 	if (layerIndex and mapIndex):
 
-		collisionTiles=[]
-
-		for tile in map.tile_sets[0].tiles:
-		    if tile.properties["collision"]=="1":
-		        collisionTiles.append(int(tile.id) + 1)
+		collisionTable=map.get_property_table("collision", lambda value: value=="1", False)
 
 		plist = dict()
 
@@ -181,24 +187,29 @@ else:
 		    cell=findNextX(map, layerIndex, object)
     
 		    if cell is not None:
-		        if canSeeCellFromCell(map, target, cell, collisionTiles):
+		        if canSeeCellFromCell(map, target, cell, collisionTable):
 		            cells.append(cell)
 
 		    cell=findNextY(map, layerIndex, object)
 		    if cell is not None:
-		        if canSeeCellFromCell(map, target, cell, collisionTiles):
+		        if canSeeCellFromCell(map, target, cell, collisionTable):
 		            cells.append(cell)
 
 		    cell=findPrevX(map, layerIndex, object)
 		    if cell is not None:
-		        if canSeeCellFromCell(map, target, cell, collisionTiles):
+		        if canSeeCellFromCell(map, target, cell, collisionTable):
 		            cells.append(cell)
 
 		    cell=findPrevY(map, layerIndex, object)
 		    if cell is not None:
-		        if canSeeCellFromCell(map, target, cell, collisionTiles):
+		        if canSeeCellFromCell(map, target, cell, collisionTable):
 		            cells.append(cell)
 
+		    # infinite maps: only keep the chunks around the object decoded
+		    xs=[int(c.x) for c in [target]+cells]
+		    ys=[int(c.y) for c in [target]+cells]
+		    map.layers[1].release_chunks_outside(min(xs), min(ys), max(xs)+1, max(ys)+1)
+
 		    cocosTarget = convertTiledPositionToCocosPosition(map, target)
 
 		    for cell in cells:
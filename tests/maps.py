@@ -0,0 +1,45 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+u"""
+Writes small \*.tmx files for the tests, the layer data is csv encoded.
+"""
+
+
+#-------------------------------------------------------------------------------
+def gid(gid, flip=0):
+    u"""
+    Returns the gid with the flip flags like Tiled stores them.
+    """
+    return gid | flip << 29
+
+def write_map(file_name, width, height, layers, tile_sets=u''):
+    u"""
+    Writes a map of 16x16 pixel tiles.
+
+    :Parameters:
+        layers : list
+            list of (name, {(x, y): gid with flip bits}, chunks), chunks is a
+            list of (x, y, width, height) for an infinite map or None
+        tile_sets : string
+            xml of the tile sets (and other elements) written before the layers
+    """
+    lines = [u'<?xml version="1.0" encoding="UTF-8"?>',
+             u'<map version="1.0" orientation="orthogonal" width="%d" height="%d" tilewidth="16" tileheight="16">' % \
+                    (width, height)]
+    if tile_sets:
+        lines.append(tile_sets)
+    for name, tiles, chunks in layers:
+        lines.append(u'<layer name="%s" width="%d" height="%d"><data encoding="csv">' % (name, width, height))
+        if chunks is None:
+            lines.append(u','.join(str(tiles.get((x, y), 0)) for y in xrange(height) for x in xrange(width)))
+        else:
+            for chunk_x, chunk_y, chunk_w, chunk_h in chunks:
+                lines.append(u'<chunk x="%d" y="%d" width="%d" height="%d">%s</chunk>' % \
+                             (chunk_x, chunk_y, chunk_w, chunk_h, u','.join(str(tiles.get((x, y), 0)) \
+                              for y in xrange(chunk_y, chunk_y + chunk_h) for x in xrange(chunk_x, chunk_x + chunk_w))))
+        lines.append(u'</data></layer>')
+    lines.append(u'</map>')
+    map_file = open(file_name, 'w')
+    map_file.write(u'\n'.join(lines))
+    map_file.close()
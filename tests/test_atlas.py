@@ -0,0 +1,85 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+u"""
+Tests of TextureAtlasLayout, the packing does not need a graphics framework.
+
+usage: python -m unittest discover -s tests
+"""
+
+import os
+import random
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+import tiledtmxloader
+
+
+#-------------------------------------------------------------------------------
+def _is_power_of_two(value):
+    return value > 0 and value & (value - 1) == 0
+
+class TextureAtlasLayoutTest(unittest.TestCase):
+
+    def check_layout(self, sizes, max_size, padding):
+        layout = tiledtmxloader.TextureAtlasLayout(sizes, max_size, padding)
+        self.assertEqual(sorted(layout.regions.keys()), sorted(sizes.keys()))
+        for atlas_width, atlas_height in layout.atlas_sizes:
+            self.assertTrue(_is_power_of_two(atlas_width) and atlas_width <= max_size)
+            self.assertTrue(_is_power_of_two(atlas_height) and atlas_height <= max_size)
+        by_atlas = {}
+        for key, (atlas_idx, x, y, width, height) in layout.regions.items():
+            self.assertEqual((width, height), sizes[key])
+            atlas_width, atlas_height = layout.atlas_sizes[atlas_idx]
+            # the padding is inside the atlas too
+            self.assertTrue(x - padding >= 0 and x + width + padding <= atlas_width, (key, x, width))
+            self.assertTrue(y - padding >= 0 and y + height + padding <= atlas_height, (key, y, height))
+            self.assertEqual(layout.uv_table[key], (atlas_idx, float(x) / atlas_width, float(y) / atlas_height, \
+                             float(x + width) / atlas_width, float(y + height) / atlas_height))
+            by_atlas.setdefault(atlas_idx, []).append((x - padding, y - padding, \
+                                                       x + width + padding, y + height + padding))
+        for rects in by_atlas.values():
+            for idx, (left, bottom, right, top) in enumerate(rects):
+                for other in rects[idx + 1:]:
+                    self.assertFalse(left < other[2] and other[0] < right and bottom < other[3] and other[1] < top, \
+                                     ((left, bottom, right, top), other))
+        return layout
+
+    def test_random_sizes(self):
+        rand = random.Random(0)
+        for run in xrange(30):
+            max_size = rand.choice((64, 128, 256, 1024))
+            padding = rand.randrange(3)
+            sizes = {}
+            for key in xrange(rand.randrange(1, 200)):
+                sizes[key] = (rand.randrange(1, max_size // 4), rand.randrange(1, max_size // 4))
+            self.check_layout(sizes, max_size, padding)
+
+    def test_tiles(self):
+        sizes = dict((gid, (32, 32)) for gid in xrange(1, 257))
+        layout = self.check_layout(sizes, 2048, 1)
+        self.assertEqual(len(layout.atlas_sizes), 1)
+
+    def test_several_atlases(self):
+        sizes = dict((gid, (30, 30)) for gid in xrange(1, 101))
+        layout = self.check_layout(sizes, 128, 1)
+        self.assertTrue(len(layout.atlas_sizes) > 1)
+
+    def test_wide_rectangle(self):
+        layout = self.check_layout({1: (900, 10)}, 1024, 1)
+        self.assertEqual(layout.atlas_sizes, [(1024, 16)])
+
+    def test_max_size_not_power_of_two(self):
+        self.assertRaises(Exception, tiledtmxloader.TextureAtlasLayout, {1: (900, 10)}, 1000, 1)
+
+    def test_too_big(self):
+        self.assertRaises(Exception, tiledtmxloader.TextureAtlasLayout, {1: (64, 10)}, 64, 1)
+
+    def test_empty(self):
+        layout = tiledtmxloader.TextureAtlasLayout({}, 256, 1)
+        self.assertEqual(layout.atlas_sizes, [])
+        self.assertEqual(layout.regions, {})
+
+if __name__ == '__main__':
+    unittest.main()
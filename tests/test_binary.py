@@ -0,0 +1,105 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+u"""
+Tests of the binary map format, TileMapBinaryWriter and
+TileMapParser.parse_binary.
+
+usage: python -m unittest discover -s tests
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+import tiledtmxloader
+import maps
+
+
+#-------------------------------------------------------------------------------
+_TILE_SETS = u'''<properties><property name="author" value="me"/></properties>
+<tileset firstgid="1" name="tiles" tilewidth="16" tileheight="16">
+ <image source="tiles.png"/>
+ <tile id="2"><properties><property name="collision" value="1"/></properties></tile>
+</tileset>
+<objectgroup name="objects" width="6" height="4">
+ <object name="start" type="spawn" x="20" y="30" width="16" height="16"/>
+</objectgroup>'''
+
+class BinaryFormatTest(unittest.TestCase):
+
+    def setUp(self):
+        self._tmp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self._tmp_dir)
+
+    def write_tmx(self, layers, width=6, height=4):
+        file_name = os.path.join(self._tmp_dir, 'map.tmx')
+        maps.write_map(file_name, width, height, layers, _TILE_SETS)
+        return file_name
+
+    def write_binary(self, world_map):
+        file_name = os.path.join(self._tmp_dir, 'map.tmxb')
+        tiledtmxloader.TileMapBinaryWriter().write(world_map, file_name)
+        return file_name
+
+    def test_round_trip(self):
+        tiles = dict(((x, y), (x + y) % 4) for x in xrange(6) for y in xrange(4))
+        flipped = {(0, 0): maps.gid(1, tiledtmxloader.FLIP_HORIZONTAL), \
+                   (5, 3): maps.gid(3, tiledtmxloader.FLIP_DIAGONAL | tiledtmxloader.FLIP_VERTICAL)}
+        world_map = tiledtmxloader.TileMapParser().parse_decode( \
+                        self.write_tmx([(u'ground', tiles, None), (u'flipped', flipped, None)]))
+        loaded = tiledtmxloader.TileMapParser().parse_binary(self.write_binary(world_map))
+        self.assertEqual((loaded.width, loaded.height, loaded.tilewidth), (6, 4, 16))
+        self.assertEqual(loaded.properties, {u'author': u'me'})
+        self.assertEqual([layer.name for layer in loaded.layers], [u'ground', u'flipped'])
+        for layer, orig in zip(loaded.layers, world_map.layers):
+            self.assertEqual(list(layer.decoded_content), orig.decoded_content)
+            for x in xrange(6):
+                for y in xrange(4):
+                    self.assertEqual(layer.content2D[x][y], orig.content2D[x][y])
+                    self.assertEqual(layer.get_flags(x, y), orig.get_flags(x, y))
+        self.assertEqual(loaded.layers[0].flags, None)
+        self.assertEqual(loaded.layers[1].get_gid(5, 3), 3)
+        self.assertEqual(loaded.layers[1].get_flags(5, 3), tiledtmxloader.FLIP_DIAGONAL | tiledtmxloader.FLIP_VERTICAL)
+        self.assertEqual(loaded.named_layers[u'flipped'], loaded.layers[1])
+        tile_set = loaded.named_tile_sets[u'tiles']
+        self.assertEqual(int(tile_set.firstgid), 1)
+        self.assertEqual(tile_set.images[0].source, world_map.tile_sets[0].images[0].source)
+        self.assertEqual(loaded.get_property_table(u'collision', int, 0)[:4], [0, 0, 0, 1])
+        obj = loaded.object_groups[0].objects[0]
+        self.assertEqual((obj.name, obj.type, obj.x, obj.y), (u'start', u'spawn', 20, 30))
+
+    def test_mapped_gids(self):
+        tiles = dict(((x, y), x + 1) for x in xrange(6) for y in xrange(4))
+        world_map = tiledtmxloader.TileMapParser().parse_decode(self.write_tmx([(u'L', tiles, None)]))
+        gids = tiledtmxloader.TileMapParser().parse_binary(self.write_binary(world_map)).layers[0].decoded_content
+        self.assertEqual(len(gids), 24)
+        self.assertEqual((gids[0], gids[5], gids[-1]), (1, 6, 6))
+        self.assertEqual(gids[4:8], [5, 6, 1, 2])
+        self.assertEqual(gids[0:6:2], [1, 3, 5])
+        self.assertRaises(IndexError, gids.__getitem__, 24)
+
+    def test_read_only(self):
+        world_map = tiledtmxloader.TileMapParser().parse_decode(self.write_tmx([(u'L', {(0, 0): 1}, None)]))
+        layer = tiledtmxloader.TileMapParser().parse_binary(self.write_binary(world_map)).layers[0]
+        self.assertRaises(Exception, layer.set_gid, 0, 0, 2)
+
+    def test_not_binary(self):
+        self.assertRaises(Exception, tiledtmxloader.TileMapParser().parse_binary, \
+                          self.write_tmx([(u'L', {(0, 0): 1}, None)]))
+
+    def test_not_supported(self):
+        # infinite maps and layers that are not decoded
+        chunked = tiledtmxloader.TileMapParser().parse_decode( \
+                        self.write_tmx([(u'L', {(0, 0): 1}, [(0, 0, 16, 16)])]))
+        self.assertRaises(Exception, self.write_binary, chunked)
+        not_decoded = tiledtmxloader.TileMapParser().parse(self.write_tmx([(u'L', {(0, 0): 1}, None)]))
+        self.assertRaises(Exception, self.write_binary, not_decoded)
+
+if __name__ == '__main__':
+    unittest.main()
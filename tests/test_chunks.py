@@ -0,0 +1,103 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+u"""
+Tests of the chunked layers of infinite maps, TileLayer and TileChunk.
+
+usage: python -m unittest discover -s tests
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+import tiledtmxloader
+import maps
+
+
+#-------------------------------------------------------------------------------
+class ChunkedLayerTest(unittest.TestCase):
+
+    # 16x16 chunks from -16 to 32 in x and from -16 to 16 in y
+    CHUNKS = [(x, y, 16, 16) for x in (-16, 0, 16) for y in (-16, 0)]
+    TILES = {(-16, -16): 1, (-1, -1): 2, (0, 0): maps.gid(3, tiledtmxloader.FLIP_HORIZONTAL), (31, 15): 4}
+
+    def setUp(self):
+        self._tmp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self._tmp_dir)
+
+    def load_layer(self, chunks=None):
+        file_name = os.path.join(self._tmp_dir, 'map.tmx')
+        maps.write_map(file_name, 32, 16, [(u'L', self.TILES, chunks or self.CHUNKS)])
+        world_map = tiledtmxloader.TileMapParser().parse_decode(file_name)
+        return world_map, world_map.layers[0]
+
+    def get_decoded(self, layer):
+        return sorted((chunk.x, chunk.y) for chunk in layer.chunks if chunk.decoded_content is not None)
+
+    def test_bounds(self):
+        world_map, layer = self.load_layer()
+        self.assertEqual(len(layer.chunks), 6)
+        self.assertEqual(layer.get_bounds(), (-16, -16, 32, 16))
+        # nothing is decoded until accessed
+        self.assertEqual(self.get_decoded(layer), [])
+
+    def test_get_gid(self):
+        world_map, layer = self.load_layer()
+        self.assertEqual(layer.get_gid(-16, -16), 1)
+        self.assertEqual(layer.get_gid(-1, -1), 2)
+        self.assertEqual(layer.get_gid(0, 0), 3)
+        self.assertEqual(layer.get_gid(31, 15), 4)
+        self.assertEqual(layer.get_gid(1, 0), 0)
+        # outside of the chunks
+        self.assertEqual(layer.get_gid(32, 0), 0)
+        self.assertEqual(layer.get_gid(-17, 0), 0)
+        self.assertEqual(layer.content2D[-1][-1], 2)
+        self.assertEqual(layer.content2D[31][15], 4)
+        self.assertEqual(self.get_decoded(layer), [(-16, -16), (0, 0), (16, 0)])
+
+    def test_flags(self):
+        world_map, layer = self.load_layer()
+        self.assertEqual(layer.get_flags(0, 0), tiledtmxloader.FLIP_HORIZONTAL)
+        self.assertEqual(layer.get_flags(1, 0), 0)
+        self.assertEqual(layer.get_flags(-1, -1), 0)
+        self.assertEqual(layer.get_chunk(0, 0).flags[0], tiledtmxloader.FLIP_HORIZONTAL)
+        self.assertEqual(layer.get_chunk(-1, -1).flags, None)
+
+    def test_irregular_chunks(self):
+        # chunks not aligned to a grid are looked up one by one
+        world_map, layer = self.load_layer([(-16, -16, 15, 16), (-1, -1, 8, 8), (7, 0, 25, 16)])
+        self.assertEqual(layer.get_bounds(), (-16, -16, 32, 16))
+        self.assertEqual(layer.get_chunk(-1, -1).x, -1)
+        self.assertEqual(layer.get_chunk(7, 0).x, 7)
+        self.assertEqual(layer.get_chunk(7, -1), None)
+        self.assertEqual(layer.get_gid(-1, -1), 2)
+        self.assertEqual(layer.get_gid(31, 15), 4)
+
+    def test_decode_and_release(self):
+        world_map, layer = self.load_layer()
+        chunks = layer.decode_chunks(-1, -1, 1, 1)
+        self.assertEqual(sorted((chunk.x, chunk.y) for chunk in chunks), [(-16, -16), (-16, 0), (0, -16), (0, 0)])
+        self.assertEqual(self.get_decoded(layer), [(-16, -16), (-16, 0), (0, -16), (0, 0)])
+        layer.release_chunks_outside(0, 0, 16, 16)
+        self.assertEqual(self.get_decoded(layer), [(0, 0)])
+        self.assertEqual(layer.get_chunk(0, 0).flags[0], tiledtmxloader.FLIP_HORIZONTAL)
+        # released chunks are decoded again when accessed
+        self.assertEqual(layer.get_gid(-1, -1), 2)
+        layer.release_chunks_outside(100, 100, 101, 101)
+        self.assertEqual(self.get_decoded(layer), [])
+
+    def test_used_gids(self):
+        world_map, layer = self.load_layer()
+        layer.get_gid(0, 0)
+        self.assertEqual(world_map.get_used_gids(), set([1, 2, 3, 4]))
+        # the chunks decoded for it are released again
+        self.assertEqual(self.get_decoded(layer), [(0, 0)])
+
+if __name__ == '__main__':
+    unittest.main()
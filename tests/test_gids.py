@@ -0,0 +1,87 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+u"""
+Tests of the flip flags split from the gids and of the lookup of the tile
+set of a gid.
+
+usage: python -m unittest discover -s tests
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+import tiledtmxloader
+import maps
+
+
+#-------------------------------------------------------------------------------
+# not in the order of their firstgids
+_TILE_SETS = u'''<tileset firstgid="1" name="a" tilewidth="16" tileheight="16"/>
+<tileset firstgid="100" name="c" tilewidth="16" tileheight="16"/>
+<tileset firstgid="17" name="b" tilewidth="16" tileheight="16"/>'''
+
+class GidTest(unittest.TestCase):
+
+    def setUp(self):
+        self._tmp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self._tmp_dir)
+
+    def load_map(self, tiles):
+        file_name = os.path.join(self._tmp_dir, 'map.tmx')
+        maps.write_map(file_name, 4, 2, [(u'L', tiles, None)], _TILE_SETS)
+        return tiledtmxloader.TileMapParser().parse_decode(file_name)
+
+    def test_split_flags(self):
+        flips = [0, tiledtmxloader.FLIP_HORIZONTAL, tiledtmxloader.FLIP_VERTICAL, tiledtmxloader.FLIP_DIAGONAL, \
+                 tiledtmxloader.FLIP_HORIZONTAL | tiledtmxloader.FLIP_VERTICAL | tiledtmxloader.FLIP_DIAGONAL]
+        tiles = dict(((idx % 4, idx // 4), maps.gid(17 + idx, flip)) for idx, flip in enumerate(flips))
+        layer = self.load_map(tiles).layers[0]
+        self.assertEqual(layer.decoded_content, [17, 18, 19, 20, 21, 0, 0, 0])
+        self.assertEqual(list(layer.flags), flips + [0] * 3)
+        self.assertEqual(layer.content2D[0][1], 21)
+        self.assertEqual(layer.get_flags(0, 1), flips[4])
+        self.assertEqual(layer.get_flags(1, 0), tiledtmxloader.FLIP_HORIZONTAL)
+        self.assertEqual(layer.get_flags(1, 1), 0)
+
+    def test_no_flags(self):
+        layer = self.load_map({(0, 0): 1, (3, 1): 100}).layers[0]
+        self.assertEqual(layer.flags, None)
+        self.assertEqual(layer.get_flags(0, 0), 0)
+        # the flags are created by the first flipped tile
+        layer.set_gid(1, 0, 2, tiledtmxloader.FLIP_VERTICAL)
+        self.assertEqual(list(layer.flags), [0, tiledtmxloader.FLIP_VERTICAL] + [0] * 6)
+        self.assertEqual((layer.get_gid(1, 0), layer.content2D[1][0]), (2, 2))
+        layer.set_gid(1, 0, 3)
+        self.assertEqual(layer.get_flags(1, 0), 0)
+
+    def test_tile_set_for_gid(self):
+        world_map = self.load_map({})
+        names = dict((gid, world_map.get_tile_set_for_gid(gid)) for gid in (1, 16, 17, 99, 100, 5000))
+        self.assertEqual(dict((gid, tile_set.name) for gid, tile_set in names.items()), \
+                         {1: u'a', 16: u'a', 17: u'b', 99: u'b', 100: u'c', 5000: u'c'})
+        self.assertEqual(world_map.get_tile_set_for_gid(0), None)
+        # the flip flags are ignored
+        self.assertEqual(world_map.get_tile_set_for_gid(maps.gid(17, tiledtmxloader.FLIP_DIAGONAL)).name, u'b')
+        self.assertEqual(world_map.get_tile_set_for_gid(maps.gid(0, tiledtmxloader.FLIP_DIAGONAL)), None)
+        self.assertEqual([tile_set and tile_set.name for tile_set in world_map.get_tile_sets_for_gids([0, 1, 17, 1])], \
+                         [None, u'a', u'b', u'a'])
+
+    def test_tile_set_added(self):
+        world_map = self.load_map({})
+        self.assertEqual(world_map.get_tile_set_for_gid(60).name, u'b')
+        tile_set = tiledtmxloader.TileSet()
+        tile_set.name = u'd'
+        tile_set.firstgid = u'50'
+        world_map.tile_sets.append(tile_set)
+        self.assertEqual(world_map.get_tile_set_for_gid(60).name, u'd')
+        self.assertEqual(world_map.get_tile_set_for_gid(49).name, u'b')
+
+if __name__ == '__main__':
+    unittest.main()
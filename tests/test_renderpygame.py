@@ -0,0 +1,191 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+u"""
+Tests of the caches and of the scroll mode of renderpygame, the rendering is
+compared pixel by pixel with rendering tile by tile. Uses pygame with the dummy video
+driver, the tests are skipped without pygame.
+
+usage: python -m unittest discover -s tests
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+import tiledtmxloader
+from tiledtmxloader import renderpygame
+import maps
+
+try:
+    import pygame
+except ImportError:
+    pygame = None
+
+
+#-------------------------------------------------------------------------------
+@unittest.skipIf(pygame is None, 'needs pygame')
+class RendererPygameTest(unittest.TestCase):
+
+    VIEW = (96, 64)
+
+    def setUp(self):
+        pygame.display.init()
+        pygame.display.set_mode(self.VIEW, 0, 32)
+        self._tmp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self._tmp_dir)
+        pygame.display.quit()
+
+    def load_map(self, width=12, height=10):
+        # gid 1 and 2 are 16x16 tiles, gid 3 a 16x32 tile reaching one tile up
+        ground = dict(((x, y), 1 + (x + y) % 2) for x in xrange(width) for y in xrange(height))
+        trees = {(2, 1): 3, (5, 0): 3, (7, 6): maps.gid(3, tiledtmxloader.FLIP_DIAGONAL), (11, 9): 1}
+        file_name = os.path.join(self._tmp_dir, 'map.tmx')
+        maps.write_map(file_name, width, height, [(u'ground', ground, None), (u'trees', trees, None)])
+        world_map = tiledtmxloader.TileMapParser().parse_decode(file_name)
+        for gid, size, offy, color in ((1, (16, 16), 0, (200, 40, 40)), (2, (16, 16), 0, (40, 200, 40)), \
+                                       (3, (16, 32), -16, (40, 40, 200))):
+            image = pygame.Surface(size).convert()
+            image.fill(color)
+            # not symmetric, so flipping shows
+            image.fill((250, 250, 250), (0, 0, 4, 6))
+            world_map.indexed_tiles[gid] = (0, offy, image)
+        return world_map
+
+    def render(self, renderer, cam_x, cam_y):
+        surf = pygame.Surface(self.VIEW, 0, 32)
+        renderer.set_camera_position(cam_x, cam_y, self.VIEW[0], self.VIEW[1])
+        renderer.render(surf)
+        return pygame.image.tostring(surf, 'RGB')
+
+    def check_same(self, renderer, world_map, positions, sprites=()):
+        for cam_x, cam_y in positions:
+            expected = renderpygame.RendererPygame(world_map)
+            expected.add_sprites(1, sprites)
+            self.assertEqual(self.render(renderer, cam_x, cam_y), self.render(expected, cam_x, cam_y), (cam_x, cam_y))
+
+    def make_sprites(self):
+        sprites = []
+        for idx, (x, y) in enumerate(((30, 30), (40, 44), (70, 90), (100, 33))):
+            image = pygame.Surface((10, 14 + idx * 6)).convert()
+            image.fill((250, 200, 30 * idx))
+            sprites.append(renderpygame.RendererPygame.Sprite(image, pygame.Rect(x, y, 10, 14 + idx * 6)))
+        return sprites
+
+    def get_chunks(self, renderer, layer_id):
+        return sorted(key[1:] for key in renderer._chunk_cache if key[0] == layer_id)
+
+    def test_chunk_cache(self):
+        world_map = self.load_map()
+        renderer = renderpygame.RendererPygame(world_map)
+        renderer.set_chunk_cache(4)
+        self.check_same(renderer, world_map, [(0, 0), (-20, -30), (37, 21), (100, 100), (180, 150)])
+        renderer.enable_profiling()
+        self.render(renderer, 8, 8)
+        used = renderer.get_profile()[0]['cache_hits'] + renderer.get_profile()[0]['cache_misses']
+        # the second time all blocks are found in the cache
+        self.render(renderer, 8, 8)
+        profile = renderer.get_profile()
+        self.assertEqual((profile[0]['cache_hits'], profile[0]['cache_misses']), (used, 0))
+        renderer.set_chunk_cache(0)
+        self.assertEqual(renderer._chunk_cache, None)
+
+    def test_set_tile(self):
+        world_map = self.load_map()
+        renderer = renderpygame.RendererPygame(world_map)
+        renderer.set_chunk_cache(4)
+        self.render(renderer, 0, 0)
+        self.assertEqual(self.get_chunks(renderer, 1), [(x, y) for x in (0, 1) for y in (0, 1)])
+        # only the block of the tile is dropped
+        renderer.set_tile(1, 5, 4, 3, tiledtmxloader.FLIP_HORIZONTAL)
+        self.assertEqual(self.get_chunks(renderer, 1), [(0, 0), (0, 1), (1, 0)])
+        self.assertEqual(len(self.get_chunks(renderer, 0)), 4)
+        self.check_same(renderer, world_map, [(0, 0), (8, 8)])
+        renderer.set_tile(1, 5, 4, 0)
+        self.check_same(renderer, world_map, [(0, 0)])
+
+    def test_invalidate(self):
+        world_map = self.load_map()
+        renderer = renderpygame.RendererPygame(world_map)
+        renderer.set_chunk_cache(4)
+        before = self.render(renderer, 0, 0)
+        # changed without set_tile, the cached blocks are stale
+        world_map.layers[0].set_gid(1, 1, 3)
+        self.assertEqual(self.render(renderer, 0, 0), before)
+        renderer.invalidate(0)
+        self.assertEqual(self.get_chunks(renderer, 0), [])
+        self.assertEqual(len(self.get_chunks(renderer, 1)), 4)
+        self.check_same(renderer, world_map, [(0, 0)])
+        renderer.invalidate()
+        self.assertEqual(len(renderer._chunk_cache), 0)
+        self.assertEqual(renderer._chunk_cache_bytes, 0)
+
+    def test_max_bytes(self):
+        world_map = self.load_map(40, 40)
+        renderer = renderpygame.RendererPygame(world_map)
+        # a block is 64x64 pixels, the visible blocks are kept anyway
+        max_bytes = 6 * 64 * 64 * 4
+        renderer.set_chunk_cache(4, max_bytes)
+        renderer.enable_profiling()
+        for step in xrange(20):
+            self.render(renderer, step * 30, step * 20)
+            used = sum(stats['cache_hits'] + stats['cache_misses'] for stats in renderer.get_profile().values())
+            self.assertTrue(renderer._chunk_cache_bytes <= max_bytes or len(renderer._chunk_cache) == used)
+        self.assertEqual(renderer._chunk_cache_bytes, \
+                         sum(chunk[3] for chunk in renderer._chunk_cache.values()))
+        self.check_same(renderer, world_map, [(570, 380)])
+
+    def test_scroll_mode(self):
+        world_map = self.load_map(20, 16)
+        renderer = renderpygame.RendererPygame(world_map)
+        renderer.set_scroll_mode()
+        sprites = self.make_sprites()
+        renderer.add_sprites(1, sprites)
+        cam_x = cam_y = -10
+        for frame in xrange(40):
+            # scrolling in all directions, with a jump redrawing everything
+            cam_x += (3, -2, 5, 0)[frame % 4]
+            cam_y += (1, 4, -3, 2)[frame % 4]
+            if frame == 20:
+                cam_x += 150
+            for idx, sprite in enumerate(sprites):
+                if idx or frame < 13:
+                    sprite.rect.move_ip((frame + idx) % 3 - 1, (frame + idx * 2) % 5 - 2)
+            if frame == 10:
+                renderer.set_tile(1, 6, 3, 3)
+            if frame == 15:
+                # changed in place, only drawn again where marked dirty
+                sprites[0].image.fill((0, 250, 250))
+                renderer.mark_dirty(sprites[0].rect.move(0, -sprites[0].rect.height))
+            self.check_same(renderer, world_map, [(cam_x, cam_y)], sprites)
+        renderer.remove_sprite(1, sprites[1])
+        self.check_same(renderer, world_map, [(cam_x, cam_y)], [sprites[0]] + sprites[2:])
+
+    def test_scroll_strips(self):
+        world_map = self.load_map(20, 16)
+        renderer = renderpygame.RendererPygame(world_map)
+        renderer.set_scroll_mode()
+        renderer.enable_profiling()
+        self.render(renderer, 20, 20)
+        full = renderer.get_profile()[0]['tiles']
+        # only the uncovered strip is rendered
+        self.render(renderer, 22, 20)
+        self.assertTrue(0 < renderer.get_profile()[0]['tiles'] < full // 2, (full, renderer.get_profile()))
+        self.render(renderer, 22, 20)
+        self.assertEqual(renderer.get_profile(), {})
+        # hiding a layer redraws everything
+        world_map.layers[1].visible = False
+        self.render(renderer, 22, 20)
+        self.assertEqual(renderer.get_profile()[0]['tiles'], full)
+        self.check_same(renderer, world_map, [(22, 20)])
+        renderer.set_scroll_mode(False)
+        self.assertEqual(renderer._back_buffer, None)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,208 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+u"""
+Tests of renderpyglet without pyglet or OpenGL, RendererPyglet gets a fake
+pyglet module recording the vertex lists.
+
+usage: python -m unittest discover -s tests
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+import types
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+import tiledtmxloader
+from tiledtmxloader import renderpyglet
+import maps
+
+
+#-------------------------------------------------------------------------------
+class _VertexList(object):
+
+    def __init__(self, batch, count, group, vertices, tex_coords):
+        self.batch = batch
+        self.count = count
+        self.group = group
+        self.vertices = vertices
+        self.tex_coords = tex_coords
+
+    def delete(self):
+        self.batch.vertex_lists.remove(self)
+
+class _Batch(object):
+
+    def __init__(self):
+        self.vertex_lists = []
+
+    def add(self, count, mode, group, vertices, tex_coords):
+        vertex_list = _VertexList(self, count, group, vertices[1], tex_coords[1])
+        self.vertex_lists.append(vertex_list)
+        return vertex_list
+
+class _OrderedGroup(object):
+
+    def __init__(self, order):
+        self.order = order
+
+class _TextureGroup(object):
+
+    def __init__(self, texture, parent):
+        self.texture = texture
+        self.parent = parent
+
+def _fake_pyglet():
+    pyglet = types.ModuleType('pyglet')
+    pyglet.graphics = types.ModuleType('pyglet.graphics')
+    pyglet.graphics.Batch = _Batch
+    pyglet.graphics.OrderedGroup = _OrderedGroup
+    pyglet.graphics.TextureGroup = _TextureGroup
+    pyglet.gl = types.ModuleType('pyglet.gl')
+    pyglet.gl.GL_QUADS = 7
+    return pyglet
+
+#-------------------------------------------------------------------------------
+class RendererPygletTest(unittest.TestCase):
+
+    # gid 1 is a 16x16 tile, gid 2 a 16x32 tile reaching one tile up
+    SIZES = {1: (16, 16), 2: (16, 32)}
+    OFFSETS = {1: (0, 0, None), 2: (0, -16, None)}
+
+    def setUp(self):
+        self._pyglet = sys.modules.get('pyglet')
+        sys.modules['pyglet'] = _fake_pyglet()
+        self._tmp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        if self._pyglet is None:
+            del sys.modules['pyglet']
+        else:
+            sys.modules['pyglet'] = self._pyglet
+        shutil.rmtree(self._tmp_dir)
+
+    def load_map(self, width, height, layers):
+        file_name = os.path.join(self._tmp_dir, 'map.tmx')
+        maps.write_map(file_name, width, height, layers)
+        world_map = tiledtmxloader.TileMapParser().parse_decode(file_name)
+        world_map.indexed_tiles.update(self.OFFSETS)
+        # only the used tiles, the tile reach depends on them
+        gids = world_map.get_used_gids()
+        layout = tiledtmxloader.TextureAtlasLayout(dict((gid, self.SIZES[gid]) for gid in gids), 256, 1)
+        return world_map, layout
+
+    def get_quads(self, world_map, layout, xpos, ypos):
+        # the corners and tex coords of the single tile at xpos, ypos
+        quads = renderpyglet.build_chunk_vertices(world_map, 0, layout, xpos, ypos, xpos + 1, ypos + 1)
+        self.assertEqual(len(quads), 1)
+        vertices, tex_coords = quads[0]
+        self.assertEqual(len(vertices), 8)
+        return zip(vertices[::2], vertices[1::2]), zip(tex_coords[::2], tex_coords[1::2])
+
+    def test_quad_corners(self):
+        world_map, layout = self.load_map(8, 6, [(u'L', {(2, 1): 1, (3, 1): 2, \
+                                                    (4, 1): maps.gid(2, tiledtmxloader.FLIP_DIAGONAL)}, None)])
+        # y points up, the map is 6 * 16 pixels high, the cell (2, 1) spans 64 to 80
+        corners, tex_coords = self.get_quads(world_map, layout, 2, 1)
+        self.assertEqual(corners, [(32, 64), (48, 64), (48, 80), (32, 80)])
+        # the tall tile stands on its cell and reaches up
+        corners, tex_coords = self.get_quads(world_map, layout, 3, 1)
+        self.assertEqual(corners, [(48, 64), (64, 64), (64, 96), (48, 96)])
+        # flipped diagonally it is wide, still aligned with the bottom of the cell
+        corners, tex_coords = self.get_quads(world_map, layout, 4, 1)
+        self.assertEqual(corners, [(64, 64), (96, 64), (96, 80), (64, 80)])
+        # empty cells have no quads
+        self.assertEqual(renderpyglet.build_chunk_vertices(world_map, 0, layout, 0, 0, 2, 6), {})
+
+    def test_flip_tex_coords(self):
+        flips = [0, tiledtmxloader.FLIP_HORIZONTAL, tiledtmxloader.FLIP_VERTICAL, tiledtmxloader.FLIP_DIAGONAL,
+                 tiledtmxloader.FLIP_HORIZONTAL | tiledtmxloader.FLIP_VERTICAL,
+                 tiledtmxloader.FLIP_DIAGONAL | tiledtmxloader.FLIP_HORIZONTAL]
+        tiles = dict(((xpos, 0), maps.gid(1, flip)) for xpos, flip in enumerate(flips))
+        world_map, layout = self.load_map(len(flips), 1, [(u'L', tiles, None)])
+        atlas_idx, u0, v0, u1, v1 = layout.uv_table[1]
+        # lower left, lower right, upper right, upper left of the quad
+        expected = [
+            [(u0, v0), (u1, v0), (u1, v1), (u0, v1)], # not flipped
+            [(u1, v0), (u0, v0), (u0, v1), (u1, v1)], # horizontally
+            [(u0, v1), (u1, v1), (u1, v0), (u0, v0)], # vertically
+            [(u1, v1), (u1, v0), (u0, v0), (u0, v1)], # diagonally, x and y swapped
+            [(u1, v1), (u0, v1), (u0, v0), (u1, v0)], # rotated by 180 degrees
+            [(u1, v0), (u1, v1), (u0, v1), (u0, v0)], # rotated clockwise by 90 degrees
+        ]
+        for xpos, flip in enumerate(flips):
+            corners, tex_coords = self.get_quads(world_map, layout, xpos, 0)
+            self.assertEqual(tex_coords, expected[xpos], (flip, tex_coords))
+
+    def test_update_chunks(self):
+        tiles = dict(((x, y), 1) for x in xrange(40) for y in xrange(30))
+        world_map, layout = self.load_map(40, 30, [(u'A', tiles, None), (u'B', {(0, 0): 1}, None)])
+        renderer = renderpyglet.RendererPyglet(world_map, layout, ['atlas'], 4)
+        # chunks of 64x64 pixels
+        renderer.set_camera_position(100, 70, 200, 150)
+        expected = set((layer_id, x, y) for layer_id in (0, 1) for x in xrange(1, 5) for y in xrange(1, 4))
+        self.assertEqual(set(renderer._chunks), expected)
+        # empty chunks have no vertex lists
+        self.assertEqual(len(renderer._batch.vertex_lists), 12)
+        for vertex_list in renderer._batch.vertex_lists:
+            self.assertEqual(vertex_list.count, 4 * 16)
+            self.assertEqual(vertex_list.group.parent.order, 0)
+        # the chunks that left the view are deleted
+        renderer.set_camera_position(0, 0, 64, 64)
+        self.assertEqual(set(renderer._chunks), set([(0, 0, 0), (1, 0, 0)]))
+        self.assertEqual(len(renderer._batch.vertex_lists), 2)
+        renderer.set_camera_position(0, 0, 64, 64, 1)
+        self.assertEqual(set(renderer._chunks), set((layer_id, x, y) for layer_id in (0, 1) \
+                                                    for x in xrange(0, 2) for y in xrange(0, 2)))
+        # nothing outside the map
+        renderer.set_camera_position(40 * 16, 30 * 16, 64, 64)
+        self.assertEqual(renderer.get_num_chunks(), 0)
+        # hidden layers have no chunks
+        world_map.layers[1].visible = False
+        renderer.set_camera_position(0, 0, 64, 64)
+        self.assertEqual(set(renderer._chunks), set([(0, 0, 0)]))
+        renderer.invalidate()
+        self.assertEqual(renderer.get_num_chunks(), 0)
+        self.assertEqual(renderer._batch.vertex_lists, [])
+
+    def test_tile_reach(self):
+        # the tall tile in the chunk below the view reaches up into it
+        world_map, layout = self.load_map(8, 8, [(u'L', {(0, 4): 2}, None)])
+        renderer = renderpyglet.RendererPyglet(world_map, layout, ['atlas'], 4)
+        renderer.set_camera_position(0, 0, 64, 64)
+        self.assertEqual(set(renderer._chunks), set([(0, 0, 0), (0, 0, 1)]))
+        self.assertEqual(len(renderer._batch.vertex_lists), 1)
+
+    def test_negative_chunks(self):
+        chunks = [(x, y, 16, 16) for x in (-16, 0, 16) for y in (-16, 0)]
+        tiles = {(-16, -16): 1, (-1, -1): 1, (0, 0): 1, (31, 15): 1}
+        world_map, layout = self.load_map(32, 16, [(u'L', tiles, chunks)])
+        renderer = renderpyglet.RendererPyglet(world_map, layout, ['atlas'], 16)
+        renderer.set_camera_position(-256, -256, 256, 256)
+        self.assertEqual(set(renderer._chunks), set([(0, -1, -1)]))
+        vertex_lists = renderer._batch.vertex_lists
+        self.assertEqual([vertex_list.count for vertex_list in vertex_lists], [8])
+        # the map is 16 * 16 pixels high, y points up
+        self.assertEqual(vertex_lists[0].vertices[:8], [-256, 496, -240, 496, -240, 512, -256, 512])
+        renderer.set_camera_position(-16, -16, 32, 32)
+        self.assertEqual(set(renderer._chunks), set([(0, -1, -1), (0, 0, -1), (0, -1, 0), (0, 0, 0)]))
+        self.assertEqual(len(renderer._batch.vertex_lists), 2)
+
+    def test_release_chunks(self):
+        chunks = [(x, 0, 16, 16) for x in xrange(0, 128, 16)]
+        world_map, layout = self.load_map(128, 16, [(u'L', {(0, 0): 1, (127, 0): 1}, chunks)])
+        world_layer = world_map.layers[0]
+        renderer = renderpyglet.RendererPyglet(world_map, layout, ['atlas'], 16)
+        renderer.set_camera_position(0, 0, 256, 256)
+        self.assertTrue(world_layer.chunks[0].decoded_content is not None)
+        # only the chunk of the new view was decoded, the others are released
+        renderer.set_camera_position(127 * 16, 0, 16, 16)
+        decoded = [chunk.x for chunk in world_layer.chunks if chunk.decoded_content is not None]
+        self.assertEqual(decoded, [112])
+        self.assertEqual(len(renderer._batch.vertex_lists), 1)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,108 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+u"""
+Tests of TileMapWriter, the written maps are parsed again and compared.
+
+usage: python -m unittest discover -s tests
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+import tiledtmxloader
+import maps
+
+
+#-------------------------------------------------------------------------------
+_TILE_SETS = u'''<properties><property name="author" value="me &amp; you"/></properties>
+<tileset firstgid="1" name="tiles" tilewidth="16" tileheight="16">
+ <image source="tiles.png" trans="ff00ff"/>
+ <tile id="2"><properties><property name="collision" value="1"/></properties></tile>
+</tileset>
+<objectgroup name="objects" width="6" height="4">
+ <object name="start" type="spawn" x="20" y="30" width="16" height="16">
+  <properties><property name="team" value="red"/></properties>
+ </object>
+ <object name="end" x="40" y="50"/>
+</objectgroup>'''
+
+class TileMapWriterTest(unittest.TestCase):
+
+    TILES = {(0, 0): 1, (5, 3): 3, (2, 1): maps.gid(2, tiledtmxloader.FLIP_VERTICAL | tiledtmxloader.FLIP_DIAGONAL)}
+
+    def setUp(self):
+        self._tmp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self._tmp_dir)
+
+    def parse(self, layers, decode=True):
+        file_name = os.path.join(self._tmp_dir, 'map.tmx')
+        maps.write_map(file_name, 6, 4, layers, _TILE_SETS)
+        if decode:
+            return tiledtmxloader.TileMapParser().parse_decode(file_name)
+        return tiledtmxloader.TileMapParser().parse(file_name)
+
+    def write_and_parse(self, world_map, compression=u'zlib'):
+        # into a sub directory, the image sources are written relative to it
+        out_dir = os.path.join(self._tmp_dir, 'out')
+        if not os.path.isdir(out_dir):
+            os.mkdir(out_dir)
+        file_name = os.path.join(out_dir, 'written.tmx')
+        tiledtmxloader.TileMapWriter().write(world_map, file_name, compression)
+        return tiledtmxloader.TileMapParser().parse_decode(file_name), open(file_name).read()
+
+    def check_layers(self, written, world_map):
+        self.assertEqual([layer.name for layer in written.layers], [layer.name for layer in world_map.layers])
+        for layer, orig in zip(written.layers, world_map.layers):
+            xmin, ymin, xmax, ymax = orig.get_bounds()
+            self.assertEqual(layer.get_bounds(), (xmin, ymin, xmax, ymax))
+            for x in xrange(xmin, xmax):
+                for y in xrange(ymin, ymax):
+                    self.assertEqual((layer.get_gid(x, y), layer.get_flags(x, y)), \
+                                     (orig.get_gid(x, y), orig.get_flags(x, y)), (layer.name, x, y))
+
+    def test_round_trip(self):
+        world_map = self.parse([(u'ground', self.TILES, None), (u'empty', {}, None)])
+        world_map.layers[1].visible = False
+        for compression in (u'zlib', u'gzip', None):
+            written, text = self.write_and_parse(world_map, compression)
+            self.check_layers(written, world_map)
+            self.assertFalse(written.layers[1].visible)
+            self.assertEqual((written.width, written.height, written.tilewidth), (6, 4, 16))
+            self.assertEqual(written.properties, {u'author': u'me & you'})
+            tile_set = written.tile_sets[0]
+            self.assertEqual((int(tile_set.firstgid), tile_set.name), (1, u'tiles'))
+            self.assertEqual(tile_set.images[0].source, os.path.join(self._tmp_dir, 'tiles.png'))
+            self.assertEqual(tile_set.images[0].trans, world_map.tile_sets[0].images[0].trans)
+            self.assertEqual(written.get_property_table(u'collision', int, 0)[:4], [0, 0, 0, 1])
+            objects = written.object_groups[0].objects
+            self.assertEqual([(obj.name, obj.x, obj.y) for obj in objects], [(u'start', 20, 30), (u'end', 40, 50)])
+            self.assertEqual(objects[0].properties, {u'team': u'red'})
+            self.assertTrue(u'source="../tiles.png"' in text)
+
+    def test_not_decoded(self):
+        # the flip flags are kept in the raw gids of undecoded layers
+        written, text = self.write_and_parse(self.parse([(u'L', self.TILES, None)], False))
+        self.check_layers(written, self.parse([(u'L', self.TILES, None)]))
+
+    def test_chunks(self):
+        chunks = [(x, y, 8, 8) for x in (-8, 0) for y in (-8, 0)]
+        tiles = dict(self.TILES)
+        tiles[(-8, -8)] = maps.gid(3, tiledtmxloader.FLIP_HORIZONTAL)
+        world_map = self.parse([(u'L', tiles, chunks)])
+        layer = world_map.layers[0]
+        layer.get_gid(0, 0)
+        written, text = self.write_and_parse(world_map)
+        # writing only decoded the chunks temporarily
+        self.assertEqual([chunk.decoded_content is not None for chunk in layer.chunks], [False, False, False, True])
+        self.assertEqual(text.count(u'<chunk '), 4)
+        self.check_layers(written, world_map)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,2693 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+u"""
+TileMap loader for python for Tiled, a generic tile map editor
+from http://mapeditor.org/ .
+It loads the \*.tmx files produced by Tiled.
+
+Importing this package only loads the parser and the data model. The
+renderers and demos are submodules that have to be imported explicitly:
+
+    tiledtmxloader.renderpygame
+        RendererPygame, renders a map using pygame
+    tiledtmxloader.demo
+        demos for pygame and pyglet, run them using
+        python -m tiledtmxloader your_map.tmx [pygame|pyglet]
+
+tiledtmxloader.RendererPygame, demo_pygame and demo_pyglet are still
+available, pygame and pyglet are imported on first use.
+
+"""
+
+# Versioning scheme based on: http://en.wikipedia.org/wiki/Versioning#Designating_development_stage
+#
+#   +-- api change, probably incompatible with older versions
+#   |     +-- enhancements but no api change
+#   |     |
+# major.minor[.build[.revision]]
+#                |
+#                +-|* 0 for alpha (status)
+#                  |* 1 for beta (status)
+#                  |* 2 for release candidate
+#                  |* 3 for (public) release
+#
+# For instance:
+#     * 1.2.0.1 instead of 1.2-a
+#     * 1.2.1.2 instead of 1.2-b2 (beta with some bug fixes)
+#     * 1.2.2.3 instead of 1.2-rc (release candidate)
+#     * 1.2.3.0 instead of 1.2-r (commercial distribution)
+#     * 1.2.3.5 instead of 1.2-r5 (commercial distribution with many bug fixes)
+
+__revision__ = "$Rev: 19 $"
+__version__ = "3.0.0." + __revision__[6:-2]
+__revision__ = u'$Id: tiledtmxloader.py 13 2011-02-22 19:29:13Z dr0iddr0id@gmail.com $'
+__author__ = u'DR0ID_ @ 2009-2011'
+
+#-------------------------------------------------------------------------------
+
+
+import sys
+from xml.dom import minidom, Node
+import os.path
+import re
+import struct
+
+
+#-------------------------------------------------------------------------------
+# TODO: separate resource loading and containment into own class for each graphics lib
+#       by doing so, loading the map can be done in the model, loading the graphics resources in the presentation layer
+class IImageLoader(object):
+    u"""
+    Interface for image loading. Depending on the framework used the
+    images have to be loaded differently.
+    """
+
+    def load_image(self, filename, colorkey=None): # -> image
+        u"""
+        Load a single image.
+
+        :Parameters:
+            filename : string
+                Path to the file to be loaded.
+            colorkey : tuple
+                The (r, g, b) color that should be used as colorkey (or magic color).
+                Default: None
+
+        :rtype: image
+
+        """
+        raise NotImplementedError(u'This should be implemented in a inherited class')
+
+    def decode_image(self, filename): # -> image
+        u"""
+        Decodes an image without caching or converting it and without
+        changing any state of the loader, so it can be called from several
+        threads at once. TileMap.load() decodes the images in worker threads
+        this way and passes them to add_decoded_image on its own thread.
+
+        :Parameters:
+            filename : string
+                Path to the file or a file like object.
+
+        :rtype: image or None if the loader does not support it
+        """
+        return None
+
+    def add_decoded_image(self, filename, image): # -> image
+        u"""
+        Puts an image returned by decode_image into the cache of the loader,
+        so load_image(filename) uses it instead of loading the file again.
+
+        :rtype: the cached image
+        """
+        raise NotImplementedError(u'This should be implemented in a inherited class')
+
+    def load_image_file_like(self, file_like_obj, colorkey=None): # -> image
+        u"""
+        Load a image from a file like object.
+
+        :Parameters:
+            file_like_obj : file
+                This is the file like object to load the image from.
+            colorkey : tuple
+                The (r, g, b) color that should be used as colorkey (or magic color).
+                Default: None
+
+        :rtype: image
+        """
+        raise NotImplementedError(u'This should be implemented in a inherited class')
+
+    def load_image_parts(self, filename, margin, spacing, tile_width, tile_height, colorkey=None, indices=None): #-> [images]
+        u"""
+        Load different tile images from one source image.
+
+        :Parameters:
+            filename : string
+                Path to image to be loaded.
+            margin : int
+                The margin around the image.
+            spacing : int
+                The space between the tile images.
+            tile_width : int
+                The width of a single tile.
+            tile_height : int
+                The height of a single tile.
+            colorkey : tuple
+                The (r, g, b) color that should be used as colorkey (or magic color).
+                Default: None
+            indices : set
+                If set, only the tile images with these indices need to be
+                created, the others may be None in the returned list.
+                Default: None, all tile images are created
+
+        Luckily that iteration is so easy in python::
+
+            ...
+            w, h = image_size
+            for y in xrange(margin, h, tile_height + spacing):
+                for x in xrange(margin, w, tile_width + spacing):
+                    ...
+
+        :rtype: a list of images
+        """
+        raise NotImplementedError(u'This should be implemented in a inherited class')
+
+#-------------------------------------------------------------------------------
+class ImageLoaderPygame(IImageLoader):
+    u"""
+    Pygame image loader.
+
+    It uses an internal image cache. The methods return Surface.
+    The tile images sliced by load_image_parts are cached too, use the same
+    loader for several maps to share the tile images of their tile sets.
+
+    :Undocumented:
+        pygame
+    """
+
+
+    def __init__(self, subsurfaces=False, convert=False):
+        u"""
+        :Parameters:
+            subsurfaces : bool
+                If True the tile images are subsurfaces sharing the pixels of
+                the source image instead of copies. The colorkey is set
+                without RLEACCEL then, because RLE encoding does not mix
+                with subsurfaces.
+                Default: False
+            convert : bool
+                If True each loaded image is converted once to the display
+                format using convert() or, if it has per pixel alpha,
+                convert_alpha(). Needs a display mode to be set.
+                Default: False
+        """
+        self.pygame = __import__('pygame')
+        self._subsurfaces = subsurfaces
+        self._convert = convert
+        self._img_cache = {} # {name: surf}
+        self._parts_cache = {} # {(name, margin, spacing, w, h, colorkey): ([(x, y)], [surf or None])}
+
+    def load_image(self, filename, colorkey=None):
+        img = self._img_cache.get(filename, None)
+        if img is None:
+            img = self.add_decoded_image(filename, self.decode_image(filename))
+        if colorkey:
+            if self._subsurfaces:
+                img.set_colorkey(colorkey)
+            else:
+                img.set_colorkey(colorkey, self.pygame.RLEACCEL)
+        return img
+
+    def decode_image(self, filename):
+        return self.pygame.image.load(filename)
+
+    def add_decoded_image(self, filename, image):
+        # converting needs the display, it is done on the calling thread
+        if self._convert:
+            if image.get_flags() & self.pygame.SRCALPHA:
+                image = image.convert_alpha()
+            else:
+                image = image.convert()
+        self._img_cache[filename] = image
+        return image
+
+    def load_image_part(self, filename, x, y, w, h, colorkey=None):
+        source_img = self.load_image(filename, colorkey)
+        if self._subsurfaces:
+            # shares the pixels and the colorkey of the source image, tiles
+            # at the border of an image that does not fit them are clipped
+            return source_img.subsurface(self.pygame.Rect(x, y, w, h).clip(source_img.get_rect()))
+        ## ISSUE 4:
+        ##      The following usage seems to be broken in pygame (1.9.1.):
+        ##      img_part = self.pygame.Surface((tile_width, tile_height), 0, source_img)
+        img_part = self.pygame.Surface((w, h), source_img.get_flags(), source_img.get_bitsize())
+        source_rect = self.pygame.Rect(x, y, w, h)
+        img_part.blit(source_img, (0, 0), source_rect)
+        if colorkey:
+            img_part.set_colorkey(colorkey, self.pygame.RLEACCEL)
+        return img_part
+
+    def load_image_parts(self, filename, margin, spacing, tile_width, tile_height, colorkey=None, indices=None): #-> [images]
+        key = (filename, margin, spacing, tile_width, tile_height, colorkey)
+        cached = self._parts_cache.get(key, None)
+        if cached is None:
+            source_img = self.load_image(filename, colorkey)
+            w, h = source_img.get_size()
+            positions = []
+            for y in xrange(margin, h, tile_height + spacing):
+                for x in xrange(margin, w, tile_width + spacing):
+                    positions.append((x, y))
+            cached = (positions, [None] * len(positions))
+            self._parts_cache[key] = cached
+        positions, images = cached
+        for idx, (x, y) in enumerate(positions):
+            if images[idx] is None and (indices is None or idx in indices):
+                images[idx] = self.load_image_part(filename, x, y, tile_width, tile_height, colorkey)
+        return images
+
+    def load_image_file_like(self, file_like_obj, colorkey=None): # -> image
+        # pygame.image.load can load from a path and from a file-like object
+        # that is why here it is redirected to the other method
+        return self.load_image(file_like_obj, colorkey)
+
+#-------------------------------------------------------------------------------
+class ImageLoaderPyglet(IImageLoader):
+    u"""
+    Pyglet image loader.
+
+    It uses an internal image cache. The methods return some form of
+    AbstractImage. The resource module is not used for loading the images.
+    The tile images sliced by load_image_parts are cached too, use the same
+    loader for several maps to share the tile images of their tile sets.
+
+    Thanks to HydroKirby from #pyglet to contribute the ImageLoaderPyglet and the pyglet demo!
+
+    :Undocumented:
+        pyglet
+    """
+
+
+    def __init__(self):
+        self.pyglet = __import__('pyglet')
+        self._img_cache = {} # {name: image}
+        self._parts_cache = {} # {(name, margin, spacing, w, h, colorkey): ([(x, y)], [image or None])}
+
+    def load_image(self, filename, colorkey=None, fileobj=None):
+        img = self._img_cache.get(filename, None)
+        if img is None:
+            img = self.add_decoded_image(filename, self.decode_image(filename, fileobj))
+        return img
+
+    def decode_image(self, filename, fileobj=None):
+        if fileobj is None and hasattr(filename, 'read'):
+            fileobj = filename
+        if fileobj:
+            return self.pyglet.image.load(filename, fileobj, self.pyglet.image.codecs.get_decoders("*.png")[0])
+        return self.pyglet.image.load(filename)
+
+    def add_decoded_image(self, filename, image):
+        self._img_cache[filename] = image
+        return image
+
+    def load_image_part(self, filename, x, y, w, h, colorkey=None):
+        image = self.load_image(filename, colorkey)
+        img_part = image.get_region(x, y, w, h)
+        return img_part
+
+
+    def load_image_parts(self, filename, margin, spacing, tile_width, tile_height, colorkey=None, indices=None): #-> [images]
+        key = (filename, margin, spacing, tile_width, tile_height, colorkey)
+        cached = self._parts_cache.get(key, None)
+        if cached is None:
+            source_img = self.load_image(filename, colorkey)
+            positions = []
+            # Reverse the map column reading to compensate for pyglet's y-origin.
+            for y in xrange(source_img.height - tile_height, margin - tile_height,
+                -tile_height - spacing):
+                for x in xrange(margin, source_img.width, tile_width + spacing):
+                    positions.append((x, y - spacing))
+            cached = (positions, [None] * len(positions))
+            self._parts_cache[key] = cached
+        positions, images = cached
+        for idx, (x, y) in enumerate(positions):
+            if images[idx] is None and (indices is None or idx in indices):
+                images[idx] = self.load_image_part(filename, x, y, tile_width, tile_height)
+        return images
+
+    def load_image_file_like(self, file_like_obj, colorkey=None): # -> image
+        # pyglet.image.load can load from a path and from a file-like object
+        # that is why here it is redirected to the other method
+        return self.load_image(file_like_obj, colorkey, file_like_obj)
+
+    def build_atlases(self, world_map, max_size=2048, padding=1, used_only=True):
+        u"""
+        Copies the tile images of a loaded map into one or a few texture
+        atlases, so drawing the map does not switch textures for every tile
+        set. The entries of world_map.indexed_tiles are replaced by regions
+        of the atlas textures.
+
+        :Parameters:
+            world_map : TileMap
+                a map loaded with this loader
+            max_size : int
+                maximal width and height of an atlas texture, a power of two
+            padding : int
+                empty pixels around each tile image
+            used_only : bool
+                if True only the tiles used by the map are packed, see
+                TileMap.get_used_gids()
+
+        :returns: the TextureAtlasLayout, its uv_table maps gids to the
+                  texture coordinates in the textures stored in atlases
+        """
+        gids = world_map.indexed_tiles.keys()
+        if used_only:
+            gids = world_map.get_used_gids().intersection(gids)
+        sizes = {}
+        for gid in gids:
+            image = world_map.indexed_tiles[gid][2]
+            sizes[gid] = (image.width, image.height)
+        layout = TextureAtlasLayout(sizes, max_size, padding)
+        self.atlases = [self.pyglet.image.Texture.create(width, height) \
+                                    for width, height in layout.atlas_sizes]
+        for gid, (atlas_idx, x, y, width, height) in layout.regions.items():
+            offx, offy, image = world_map.indexed_tiles[gid]
+            atlas = self.atlases[atlas_idx]
+            atlas.blit_into(image.get_image_data(), x, y, 0)
+            world_map.indexed_tiles[gid] = (offx, offy, atlas.get_region(x, y, width, height))
+        return layout
+
+#-------------------------------------------------------------------------------
+class TextureAtlasLayout(object):
+    u"""
+    Packs rectangles, e.g. the tile images of a map, into one or more power
+    of two sized atlases using shelves (rows of rectangles). It does not
+    depend on a graphics framework, ImageLoaderPyglet.build_atlases() uses
+    it to create the actual textures.
+
+    :Ivariables:
+        atlas_sizes : list
+            list of (width, height) of the atlases, powers of two
+        regions : dict
+            {key: (atlas index, x, y, width, height)}, y is measured from
+            the bottom like OpenGL texture coordinates
+        uv_table : dict
+            {key: (atlas index, u0, v0, u1, v1)}, the texture coordinates of
+            the lower left and upper right corner
+    """
+
+    def __init__(self, sizes, max_size=2048, padding=1):
+        u"""
+        :Parameters:
+            sizes : dict
+                {key: (width, height)}, e.g. gid: size of the tile image
+            max_size : int
+                maximal width and height of an atlas, a power of two
+            padding : int
+                empty pixels around each rectangle, avoids bleeding of the
+                neighbours when the textures are filtered
+        """
+        self.atlas_sizes = []
+        self.regions = {}
+        self.uv_table = {}
+        self._pack(sizes, max_size, padding)
+        for key, (atlas_idx, x, y, width, height) in self.regions.items():
+            atlas_width, atlas_height = self.atlas_sizes[atlas_idx]
+            self.uv_table[key] = (atlas_idx, float(x) / atlas_width, float(y) / atlas_height, \
+                        float(x + width) / atlas_width, float(y + height) / atlas_height)
+
+    def _pack(self, sizes, max_size, padding):
+        if max_size != _next_power_of_two(max_size):
+            raise Exception(u'atlas size %d is not a power of two' % max_size)
+        if not sizes:
+            return
+        # start with a square width for the total area, then fill shelves
+        # from the bottom, highest rectangles first
+        area = 0
+        for width, height in sizes.values():
+            if width + 2 * padding > max_size or height + 2 * padding > max_size:
+                raise Exception(u'rectangle of %dx%d does not fit into an atlas of %d' % \
+                                (width, height, max_size))
+            area += (width + 2 * padding) * (height + 2 * padding)
+        atlas_width = min(max_size, _next_power_of_two(int(area ** 0.5)))
+        for width, height in sizes.values():
+            atlas_width = max(atlas_width, _next_power_of_two(width + 2 * padding))
+        keys = sorted(sizes.keys(), key=lambda key: (-sizes[key][1], -sizes[key][0], key))
+        atlas_idx = 0
+        shelf_x = shelf_y = shelf_height = 0
+        used_width = used_height = 0
+        for key in keys:
+            width, height = sizes[key]
+            padded_w = width + 2 * padding
+            padded_h = height + 2 * padding
+            if shelf_x + padded_w > atlas_width:
+                # next shelf
+                shelf_y += shelf_height
+                shelf_x = shelf_height = 0
+            if shelf_y + padded_h > max_size:
+                # next atlas
+                self.atlas_sizes.append((_next_power_of_two(used_width), _next_power_of_two(used_height)))
+                atlas_idx += 1
+                shelf_x = shelf_y = shelf_height = 0
+                used_width = used_height = 0
+            self.regions[key] = (atlas_idx, shelf_x + padding, shelf_y + padding, width, height)
+            shelf_x += padded_w
+            shelf_height = max(shelf_height, padded_h)
+            used_width = max(used_width, shelf_x)
+            used_height = max(used_height, shelf_y + shelf_height)
+        self.atlas_sizes.append((_next_power_of_two(used_width), _next_power_of_two(used_height)))
+
+def _next_power_of_two(value):
+    size = 1
+    while size < value:
+        size *= 2
+    return size
+
+#-------------------------------------------------------------------------------
+def _decode_image_jobs(image_loader, jobs, workers=None, progress=None):
+    # decodes the images of TileMap._get_image_jobs() using
+    # IImageLoader.decode_image, with a thread pool of workers threads if
+    # given, returns the images (or None) in the order of the jobs.
+    # progress is called with the fraction done after each image when the
+    # images are decoded one after another
+    sources, embedded = jobs
+    files = list(sources) + [img_file for img, img_file in embedded]
+    if workers and workers > 1 and len(files) > 1:
+        from multiprocessing.pool import ThreadPool
+        pool = ThreadPool(min(workers, len(files)))
+        try:
+            return pool.map(image_loader.decode_image, files)
+        finally:
+            pool.close()
+            pool.join()
+    images = []
+    for img_file in files:
+        images.append(image_loader.decode_image(img_file))
+        if progress:
+            progress(float(len(images)) / len(files))
+    return images
+
+#-------------------------------------------------------------------------------
+class TileMap(object):
+    u"""
+
+    The TileMap holds all the map data.
+
+    :Ivariables:
+        orientation : string
+            orthogonal or isometric or hexagonal or shifted
+        tilewidth : int
+            width of the tiles (for all layers)
+        tileheight : int
+            height of the tiles (for all layers)
+        width : int
+            width of the map (number of tiles)
+        height : int
+            height of the map (number of tiles)
+        version : string
+            version of the map format
+        tile_sets : list
+            list of TileSet
+        properties : dict
+            the propertis set in the editor, name-value pairs, strings
+        pixel_width : int
+            width of the map in pixels
+        pixel_height : int
+            height of the map in pixels
+        layers : list
+            list of TileLayer
+        map_file_name : dict
+            file name of the map
+        object_groups : list
+            list of :class:MapObjectGroup
+        indexed_tiles : dict
+            dict containing {gid : (offsetx, offsety, surface} if load() was called
+            when drawing just add the offset values to the draw point
+        named_layers : dict of string:TledLayer
+            dict containing {name : TileLayer}
+        named_tile_sets : dict
+            dict containing {name : TileSet}
+
+    """
+
+
+    def __init__(self):
+#        This is the top container for all data. The gid is the global id (for a image).
+#        Before calling convert most of the values are strings. Some additional
+#        values are also calculated, see convert() for details. After calling
+#        convert, most values are integers or floats where appropriat.
+        u"""
+        The TileMap holds all the map data.
+        """
+        # set through parser
+        self.orientation = None
+        self.tileheight = 0
+        self.tilewidth = 0
+        self.width = 0
+        self.height = 0
+        self.version = 0
+        self.tile_sets = [] # TileSet
+        self.layers = [] # WorldTileLayer <- what order? back to front (guessed)
+        self.indexed_tiles = {} # {gid: (offsetx, offsety, image}
+        self.object_groups = []
+        self.properties = {} # {name: value}
+        # additional info
+        self.pixel_width = 0
+        self.pixel_height = 0
+        self.named_layers = {} # {name: layer}
+        self.named_tile_sets = {} # {name: tile_set}
+        self.map_file_name = ""
+        self._image_loader = None
+        self._firstgid_table = None # ([firstgid], [tile_set]) sorted by firstgid
+
+    def convert(self):
+        u"""
+        Converts numerical values from strings to numerical values.
+        It also calculates or set additional data:
+        pixel_width
+        pixel_height
+        named_layers
+        named_tile_sets
+        """
+        self.tilewidth = int(self.tilewidth)
+        self.tileheight = int(self.tileheight)
+        self.width = int(self.width)
+        self.height = int(self.height)
+        self.pixel_width = self.width * self.tilewidth
+        self.pixel_height = self.height * self.tileheight
+        for layer in self.layers:
+            self.named_layers[layer.name] = layer
+            layer.opacity = float(layer.opacity)
+            layer.x = int(layer.x)
+            layer.y = int(layer.y)
+            layer.width = int(layer.width)
+            layer.height = int(layer.height)
+            layer.pixel_width = layer.width * self.tilewidth
+            layer.pixel_height = layer.height * self.tileheight
+            layer.visible = bool(int(layer.visible))
+            for chunk in layer.chunks:
+                chunk.x = int(chunk.x)
+                chunk.y = int(chunk.y)
+                chunk.width = int(chunk.width)
+                chunk.height = int(chunk.height)
+        for tile_set in self.tile_sets:
+            self.named_tile_sets[tile_set.name] = tile_set
+            tile_set.spacing = int(tile_set.spacing)
+            tile_set.margin = int(tile_set.margin)
+            for img in tile_set.images:
+                # images of cached \*.tsx tile sets are shared and may be converted already
+                if img.trans and isinstance(img.trans, basestring):
+                    img.trans = (int(img.trans[:2], 16), int(img.trans[2:4], 16), int(img.trans[4:], 16))
+        for obj_group in self.object_groups:
+            obj_group.x = int(obj_group.x)
+            obj_group.y = int(obj_group.y)
+            obj_group.width = int(obj_group.width)
+            obj_group.height = int(obj_group.height)
+            for map_obj in obj_group.objects:
+                map_obj.x = int(map_obj.x)
+                map_obj.y = int(map_obj.y)
+                map_obj.width = int(map_obj.width)
+                map_obj.height = int(map_obj.height)
+
+    def load(self, image_loader, workers=None, used_only=False):
+        u"""
+        loads all images using a IImageLoadermage implementation and fills up
+        the indexed_tiles dictionary.
+        The image may have per pixel alpha or a colorkey set.
+
+        :Parameters:
+            image_loader : IImageLoader
+                the loader for the graphics framework used
+            workers : int
+                Number of threads decoding the source images and the embedded
+                images in parallel, see IImageLoader.decode_image(). Adding
+                them to the cache of the loader, slicing the tiles and filling
+                indexed_tiles is done afterwards on the calling thread. It
+                only pays off on several cores with an image decoder that
+                releases the GIL, on a single core it is slower.
+                Default: None, the images are decoded one after another
+            used_only : bool
+                If True only the tiles used by the layers and objects of this
+                map (see get_used_gids()) are sliced and put into
+                indexed_tiles. The image loader has to support the indices
+                argument of load_image_parts.
+                Default: False, all tiles of all tile sets are loaded
+        """
+        decoded_images = None
+        if workers and workers > 1:
+            jobs = self._get_image_jobs()
+            decoded_images = self._add_decoded_images(image_loader, jobs, _decode_image_jobs(image_loader, jobs, workers))
+        self._load_images(image_loader, decoded_images, used_only)
+
+    def _load_images(self, image_loader, decoded_images=None, used_only=False):
+        # slices the tiles and fills indexed_tiles, decoded_images are the
+        # embedded images returned by _add_decoded_images
+        self._image_loader = image_loader
+        used_gids = None
+        if used_only:
+            used_gids = self.get_used_gids()
+        if decoded_images is None:
+            decoded_images = {} # {TileImage: image}
+        for tile_set in self.tile_sets:
+            # do images first, because tiles could reference it
+            for img in tile_set.images:
+                if img.source:
+                    self._load_image_from_source(tile_set, img, used_gids)
+                elif img in decoded_images:
+                    tile_set.indexed_images[img.id] = decoded_images[img]
+                else:
+                    tile_set.indexed_images[img.id] = self._load_image(img)
+            # tiles
+            for tile in tile_set.tiles:
+                if used_gids is not None and int(tile_set.firstgid) + int(tile.id) not in used_gids:
+                    continue
+                for img in tile.images:
+                    if not img.content and not img.source:
+                        # only image id set
+                        indexed_img = tile_set.indexed_images[img.id]
+                        self.indexed_tiles[int(tile_set.firstgid) + int(tile.id)] = (0, 0, indexed_img)
+                    else:
+                        if img.source:
+                            self._load_image_from_source(tile_set, img, used_gids)
+                        else:
+                            indexed_img = decoded_images.get(img, None)
+                            if indexed_img is None:
+                                indexed_img = self._load_image(img)
+                            self.indexed_tiles[int(tile_set.firstgid) + int(tile.id)] = (0, 0, indexed_img)
+
+    def _get_image_jobs(self):
+        # the images to decode: ([source paths], [(TileImage, file like object)])
+        # for the source images and the embedded images
+        sources = set()
+        embedded = []
+        for tile_set in self.tile_sets:
+            images = list(tile_set.images)
+            for tile in tile_set.tiles:
+                images.extend(tile.images)
+            for img in images:
+                if img.source:
+                    sources.add(self._get_image_path(img))
+                elif img.content:
+                    embedded.append((img, self._get_image_file(img)))
+        return list(sources), embedded
+
+    def _add_decoded_images(self, image_loader, jobs, images):
+        # adds the images decoded by _decode_image_jobs to the cache of the
+        # image loader, has to run on the thread using the images, returns
+        # the embedded images as {TileImage: image}
+        sources, embedded = jobs
+        decoded_images = {} # {TileImage: image}
+        for source, image in zip(sources, images):
+            if image is not None:
+                image_loader.add_decoded_image(source, image)
+        for (img, img_file), image in zip(embedded, images[len(sources):]):
+            if image is not None:
+                image_loader.add_decoded_image(img_file, image)
+                # found in the cache, sets the colorkey
+                decoded_images[img] = image_loader.load_image_file_like(img_file, img.trans)
+        return decoded_images
+
+    def _get_image_path(self, a_tile_image):
+        # relative path to file
+        return os.path.join(os.path.dirname(self.map_file_name), a_tile_image.source)
+
+    def get_property_table(self, name, type=None, default=None):
+        u"""
+        Compiles a tile property into a list indexed by gid, so whole layers
+        can be classified without looking up the tile definitions again::
+
+            collision = world_map.get_property_table(u'collision', int, 0)
+            blocked = [collision[gid] for gid in layer.decoded_content]
+
+        The list covers every gid defined in the tile sets (including the
+        tilecount of a tile set if the file has it) and every gid used by
+        the decoded layers. Gids with flip flags are not covered, mask them
+        first.
+
+        :Parameters:
+            name : string
+                name of the tile property
+            type : callable
+                converts the property string, e.g. int or float, None keeps
+                the string
+            default : any
+                value for gids without that property (and for gid 0)
+
+        :returns: list of values, index is the gid
+        """
+        values = {}
+        size = 1
+        for tile_set in self.tile_sets:
+            firstgid = int(tile_set.firstgid)
+            tilecount = getattr(tile_set, 'tilecount', None)
+            if tilecount:
+                size = max(size, firstgid + int(tilecount))
+            for tile in tile_set.tiles:
+                gid = firstgid + int(tile.id)
+                size = max(size, gid + 1)
+                if tile._properties and name in tile._properties:
+                    value = tile._properties[name]
+                    if type is not None:
+                        value = type(value)
+                    values[gid] = value
+        for layer in self.layers:
+            contents = [chunk.decoded_content for chunk in layer.chunks]
+            contents.append(layer.decoded_content)
+            for content in contents:
+                if content:
+                    max_gid = max(content)
+                    if max_gid > _GID_MASK:
+                        max_gid = max(gid & _GID_MASK for gid in content)
+                    size = max(size, max_gid + 1)
+        table = [default] * size
+        for gid, value in values.items():
+            table[gid] = value
+        return table
+
+    def get_tile_set_for_gid(self, gid):
+        u"""
+        Returns the TileSet the gid belongs to using a bisect on the sorted
+        firstgids of the tile sets. Flip flags of the gid are ignored.
+
+        :returns: TileSet or None for gid 0 or gids below the first tile set
+        """
+        import bisect
+        firstgids, tile_sets = self._get_firstgid_table()
+        idx = bisect.bisect_right(firstgids, gid & _GID_MASK) - 1
+        if idx < 0 or not gid & _GID_MASK:
+            return None
+        return tile_sets[idx]
+
+    def get_tile_sets_for_gids(self, gids):
+        u"""
+        Resolves many gids at once, e.g. the decoded_content of a layer. Each
+        distinct gid is only looked up once.
+
+        :returns: list of TileSet (or None) in the order of the gids
+        """
+        resolved = {}
+        for gid in set(gids):
+            resolved[gid] = self.get_tile_set_for_gid(gid)
+        return [resolved[gid] for gid in gids]
+
+    def _get_firstgid_table(self):
+        # rebuilt when tile sets are added or removed
+        if self._firstgid_table is None or len(self._firstgid_table[1]) != len(self.tile_sets):
+            ordered = sorted(self.tile_sets, key=lambda tile_set: int(tile_set.firstgid))
+            self._firstgid_table = ([int(tile_set.firstgid) for tile_set in ordered], ordered)
+        return self._firstgid_table
+
+    def get_used_gids(self):
+        u"""
+        Collects the gids used by the layers and the objects of the map.
+        The layers have to be decoded. Chunks of infinite maps that are not
+        decoded yet are decoded temporarily.
+
+        :returns: set of gids (without flip flags)
+        """
+        used_gids = set()
+        for layer in self.layers:
+            for chunk in layer.chunks:
+                if chunk.decoded_content is None:
+                    chunk.decode()
+                    used_gids.update(chunk.decoded_content)
+                    chunk.decoded_content = None
+                    chunk.flags = None
+                else:
+                    used_gids.update(chunk.decoded_content)
+            used_gids.update(layer.decoded_content)
+        for obj_group in self.object_groups:
+            for map_obj in obj_group.objects:
+                gid = getattr(map_obj, 'gid', None)
+                if gid:
+                    used_gids.add(int(gid))
+        if max(used_gids or [0]) > _GID_MASK:
+            used_gids = set(gid & _GID_MASK for gid in used_gids)
+        used_gids.discard(0)
+        return used_gids
+
+    def _load_image_from_source(self, tile_set, a_tile_image, used_gids=None):
+        img_path = self._get_image_path(a_tile_image)
+        tile_width = int(self.tilewidth)
+        tile_height = int(self.tileheight)
+        if tile_set.tileheight:
+            tile_width = int(tile_set.tilewidth)
+        if tile_set.tilewidth:
+            tile_height = int(tile_set.tileheight)
+        offsetx = 0
+        offsety = 0
+#        if tile_width > self.tilewidth:
+#            offsetx = tile_width
+        if tile_height > self.tileheight:
+            offsety = tile_height - self.tileheight
+        firstgid = int(tile_set.firstgid)
+        if used_gids is None:
+            images = self._image_loader.load_image_parts(img_path, \
+                    tile_set.margin, tile_set.spacing, tile_width, tile_height, a_tile_image.trans)
+        else:
+            indices = set(gid - firstgid for gid in used_gids if gid >= firstgid)
+            images = self._image_loader.load_image_parts(img_path, \
+                    tile_set.margin, tile_set.spacing, tile_width, tile_height, a_tile_image.trans, indices)
+        idx = 0
+        for image in images:
+            if used_gids is None or firstgid + idx in used_gids:
+                self.indexed_tiles[firstgid + idx] = (offsetx, -offsety, image)
+            idx += 1
+
+    def _load_image(self, a_tile_image):
+        return self._image_loader.load_image_file_like(self._get_image_file(a_tile_image), a_tile_image.trans)
+
+    def _get_image_file(self, a_tile_image):
+        # the content of an embedded image as file like object
+        img_str = a_tile_image.content
+        if a_tile_image.encoding:
+            if a_tile_image.encoding == u'base64':
+                img_str = decode_base64(a_tile_image.content)
+            else:
+                raise Exception(u'unknown image encoding %s' % a_tile_image.encoding)
+        import StringIO
+        return StringIO.StringIO(img_str)
+
+    def decode(self, workers=None):
+        u"""
+        Decodes the TileLayer encoded_content and saves it in decoded_content.
+
+        :Parameters:
+            workers : int
+                Number of threads used to base64 decode and decompress the
+                layers concurrently (zlib and gzip release the GIL while
+                decompressing). The gid lists are assembled afterwards.
+                Default: None, the layers are decoded one after another
+        """
+        if workers and workers > 1 and len(self.layers) > 1:
+            from multiprocessing.pool import ThreadPool
+            # chunked layers are decoded lazily anyway
+            layers = [layer for layer in self.layers if not layer.chunks]
+            pool = ThreadPool(min(workers, max(len(layers), 1)))
+            try:
+                decoded_data = pool.map(lambda layer: layer._decode_data(), layers)
+            finally:
+                pool.close()
+                pool.join()
+            for layer, data in zip(layers, decoded_data):
+                layer._assemble(data)
+            for layer in self.layers:
+                if layer.chunks:
+                    layer.decode()
+        else:
+            for layer in self.layers:
+                layer.decode()
+#-------------------------------------------------------------------------------
+# The model classes that exist many times per map (TileImage, Tile,
+# MapObjectGroup, MapObject) use __slots__ for the attributes Tiled writes,
+# other attributes found in the map file end up in the lazily created
+# __dict__. Their properties dict is only created when it is used.
+
+def _get_properties(self):
+    if self._properties is None:
+        self._properties = {}
+    return self._properties
+
+def _set_properties(self, properties):
+    self._properties = properties
+
+_lazy_properties = property(_get_properties, _set_properties, \
+                            doc=u"the propertis set in the editor, name-value pairs")
+
+#-------------------------------------------------------------------------------
+
+
+class TileSet(object):
+    u"""
+    A tileset holds the tiles and its images.
+
+    :Ivariables:
+        firstgid : int
+            the first gid of this tileset
+        name : string
+            the name of this TileSet
+        images : list
+            list of TileImages
+        tiles : list
+            list of Tiles
+        indexed_images : dict
+            after calling load() it is dict containing id: image
+        indexed_tiles : dict
+            after calling load() it is a dict containing
+            gid: (offsetx, offsety, image) , the image corresponding to the gid
+        spacing : int
+            the spacing between tiles
+        marging : int
+            the marging of the tiles
+        properties : dict
+            the propertis set in the editor, name-value pairs
+        tilewidth : int
+            the actual width of the tile, can be different from the tilewidth of the map
+        tilehight : int
+            the actual hight of th etile, can be different from the tilehight of the  map
+
+    """
+
+    def __init__(self):
+        self.firstgid = 0
+        self.name = None
+        self.images = [] # TileImage
+        self.tiles = [] # Tile
+        self.indexed_images = {} # {id:image}
+        self.indexed_tiles = {} # {gid: (offsetx, offsety, image} <- actually in map data
+        self.spacing = 0
+        self.margin = 0
+        self.properties = {}
+        self.tileheight = 0
+        self.tilewidth = 0
+
+#-------------------------------------------------------------------------------
+
+class TileImage(object):
+    u"""
+    An image of a tile or just an image.
+
+    :Ivariables:
+        id : int
+            id of this image (has nothing to do with gid)
+        format : string
+            the format as string, only 'png' at the moment
+        source : string
+            filename of the image. either this is set or the content
+        encoding : string
+            encoding of the content
+        trans : tuple of (r,g,b)
+            the colorkey color, raw as hex, after calling convert just a (r,g,b) tuple
+        properties : dict
+            the propertis set in the editor, name-value pairs
+        image : TileImage
+            after calling load the pygame surface
+    """
+
+    __slots__ = ('id', 'format', 'source', 'encoding', 'content', 'image', 'trans', \
+                 'width', 'height', '_properties', '__dict__')
+
+    properties = _lazy_properties
+
+    def __init__(self):
+        self.id = 0
+        self.format = None
+        self.source = None
+        self.encoding = None # from <data>...</data>
+        self.content = None # from <data>...</data>
+        self.image = None
+        self.trans = None
+        self._properties = None # {name: value}
+
+#-------------------------------------------------------------------------------
+
+class Tile(object):
+    u"""
+    A single tile.
+
+    :Ivariables:
+        id : int
+            id of the tile gid = TileSet.firstgid + Tile.id
+        images : list of :class:TileImage
+            list of TileImage, either its 'id' or 'image data' will be set
+        properties : dict of name:value
+            the propertis set in the editor, name-value pairs
+    """
+
+    __slots__ = ('id', 'images', 'type', 'probability', 'terrain', '_properties', '__dict__')
+
+    properties = _lazy_properties
+
+    def __init__(self):
+        self.id = 0
+        self.images = [] # uses TileImage but either only id will be set or image data
+        self._properties = None # {name: value}
+
+#-------------------------------------------------------------------------------
+
+class TileLayer(object):
+    u"""
+    A layer of the world.
+
+    :Ivariables:
+        x : int
+            position of layer in the world in number of tiles (not pixels)
+        y : int
+            position of layer in the world in number of tiles (not pixels)
+        width : int
+            number of tiles in x direction
+        height : int
+            number of tiles in y direction
+        pixel_width : int
+            width of layer in pixels
+        pixel_height : int
+            height of layer in pixels
+        name : string
+            name of this layer
+        opacity : float
+            float from 0 (full transparent) to 1.0 (opaque)
+        decoded_content : list
+            list of graphics id going through the map::
+
+                e.g [1, 1, 1, ]
+                where decoded_content[0] is (0,0)
+                      decoded_content[1] is (1,0)
+                      ...
+                      decoded_content[1] is (width,0)
+                      decoded_content[1] is (0,1)
+                      ...
+                      decoded_content[1] is (width,height)
+
+                usage: graphics id = decoded_content[tile_x + tile_y * width]
+
+            the flip flags are masked out, see flags
+        flags : array
+            None if no tile of the layer is flipped, otherwise an array of
+            bytes in the same order as decoded_content containing the flip
+            flags of each tile, a combination of FLIP_HORIZONTAL,
+            FLIP_VERTICAL and FLIP_DIAGONAL
+        content2D : list
+            list of list, usage: graphics id = content2D[x][y]
+        chunks : list
+            list of :class:TileChunk, only used by infinite maps, these layers
+            have no decoded_content and their content2D decodes the chunks on
+            access, see decode_chunks() and release_chunks_outside()
+
+    """
+
+    def __init__(self):
+        self.width = 0
+        self.height = 0
+        self.x = 0
+        self.y = 0
+        self.pixel_width = 0
+        self.pixel_height = 0
+        self.name = None
+        self.opacity = -1
+        self.encoding = None
+        self.compression = None
+        self.encoded_content = None
+        self.decoded_content = []
+        self.flags = None
+        self.visible = True
+        self.properties = {} # {name: value}
+        self.content2D = None
+        self.chunks = [] # TileChunk
+        self._chunk_index = None # {(x // chunk width, y // chunk height): chunk}
+        self._chunk_size = None
+
+    def decode(self):
+        u"""
+        Converts the contents in a list of integers which are the gid of the used
+        tiles. If necessairy it decodes and uncompresses the contents.
+        Chunks of infinite maps are not decoded here but when they are accessed.
+        """
+        if self.chunks:
+            self.decoded_content = []
+            self.content2D = _ChunkedContent2D(self)
+        else:
+            self._assemble(self._decode_data())
+
+    def _decode_data(self):
+        # base64 decoding and decompression, this is the expensive part and does
+        # not touch the layer, so it can run in another thread
+        # returns the raw little endian gid data or, for csv and xml, the gid list
+        if not self.encoded_content:
+            raise Exception(u'no encoded content to decode')
+        return _decode_gid_data(self.encoded_content, self.encoding, self.compression)
+
+    def _assemble(self, data):
+        self.decoded_content, self.flags = _split_flags(_unpack_gid_data(data))
+        #print len(self.decoded_content)
+        # generate the 2D version
+        self._gen_2D()
+
+    def get_chunk(self, xpos, ypos):
+        u"""
+        Returns the TileChunk containing the tile at xpos, ypos or None.
+        The chunk is not decoded.
+        """
+        if self._chunk_index is None:
+            self._build_chunk_index()
+        if self._chunk_index:
+            chunk_w, chunk_h = self._chunk_size
+            return self._chunk_index.get((xpos // chunk_w, ypos // chunk_h))
+        # irregular chunks
+        for chunk in self.chunks:
+            if chunk.x <= xpos < chunk.x + chunk.width and chunk.y <= ypos < chunk.y + chunk.height:
+                return chunk
+        return None
+
+    def _build_chunk_index(self):
+        # Tiled writes chunks of the same size aligned to a grid, then the
+        # chunk of a tile can be looked up directly
+        self._chunk_index = {}
+        if self.chunks:
+            chunk_w = self.chunks[0].width
+            chunk_h = self.chunks[0].height
+            self._chunk_size = chunk_w, chunk_h
+            for chunk in self.chunks:
+                if chunk.width != chunk_w or chunk.height != chunk_h or \
+                            chunk.x % chunk_w or chunk.y % chunk_h:
+                    self._chunk_index = {}
+                    break
+                self._chunk_index[(chunk.x // chunk_w, chunk.y // chunk_h)] = chunk
+
+    def get_gid(self, xpos, ypos):
+        u"""
+        Returns the gid at the tile position xpos, ypos. For infinite maps the
+        chunk containing it is decoded if needed, 0 is returned if there is none.
+        """
+        if not self.chunks:
+            return self.decoded_content[xpos + ypos * self.width]
+        chunk = self.get_chunk(xpos, ypos)
+        if chunk is None:
+            return 0
+        if chunk.decoded_content is None:
+            chunk.decode()
+        return chunk.decoded_content[(xpos - chunk.x) + (ypos - chunk.y) * chunk.width]
+
+    def set_gid(self, xpos, ypos, gid, flags=0):
+        u"""
+        Changes the tile at xpos, ypos in decoded_content, content2D and flags.
+        The layer has to be decoded. Layers of infinite maps and layers opened
+        by TileMapParser.parse_binary() can not be changed.
+
+        :Parameters:
+            gid : int
+                the new gid without flip flags, 0 for no tile
+            flags : int
+                the flip flags, see get_flags()
+        """
+        if self.chunks or isinstance(self.decoded_content, _MappedGids):
+            raise Exception(u'layer %s can not be changed' % self.name)
+        self.decoded_content[xpos + ypos * self.width] = gid
+        self.content2D[xpos][ypos] = gid
+        if flags and self.flags is None:
+            import array
+            self.flags = array.array('B', [0]) * len(self.decoded_content)
+        if self.flags is not None:
+            self.flags[xpos + ypos * self.width] = flags
+
+    def get_flags(self, xpos, ypos):
+        u"""
+        Returns the flip flags of the tile at xpos, ypos, a combination of
+        FLIP_HORIZONTAL, FLIP_VERTICAL and FLIP_DIAGONAL, 0 if not flipped.
+        """
+        if not self.chunks:
+            if self.flags is None:
+                return 0
+            return self.flags[xpos + ypos * self.width]
+        chunk = self.get_chunk(xpos, ypos)
+        if chunk is None:
+            return 0
+        if chunk.decoded_content is None:
+            chunk.decode()
+        if chunk.flags is None:
+            return 0
+        return chunk.flags[(xpos - chunk.x) + (ypos - chunk.y) * chunk.width]
+
+    def decode_chunks(self, xmin, ymin, xmax, ymax):
+        u"""
+        Decodes the chunks overlapping the tile region xmin <= x < xmax,
+        ymin <= y < ymax (if not done yet).
+
+        :returns: list of the overlapping TileChunk
+        """
+        chunks = []
+        for chunk in self.chunks:
+            if chunk.overlaps(xmin, ymin, xmax, ymax):
+                if chunk.decoded_content is None:
+                    chunk.decode()
+                chunks.append(chunk)
+        return chunks
+
+    def get_bounds(self):
+        u"""
+        Returns the tile region covered by the layer as (xmin, ymin, xmax, ymax)
+        relative to the layer position, xmin <= x < xmax, ymin <= y < ymax.
+        For infinite maps it is the region covered by the chunks, it can start
+        at negative positions.
+        """
+        if not self.chunks:
+            return 0, 0, self.width, self.height
+        return min(chunk.x for chunk in self.chunks), min(chunk.y for chunk in self.chunks), \
+               max(chunk.x + chunk.width for chunk in self.chunks), \
+               max(chunk.y + chunk.height for chunk in self.chunks)
+
+    def release_chunks_outside(self, xmin, ymin, xmax, ymax):
+        u"""
+        Frees the decoded data of all chunks that do not overlap the tile
+        region xmin <= x < xmax, ymin <= y < ymax. They are decoded again from
+        their encoded content when accessed. This keeps the memory used by
+        infinite maps bounded by the active area.
+        """
+        for chunk in self.chunks:
+            if chunk.decoded_content is not None and not chunk.overlaps(xmin, ymin, xmax, ymax):
+                chunk.decoded_content = None
+                chunk.flags = None
+
+    def _gen_2D(self):
+        self.content2D = []
+        # generate the needed lists
+        for xpos in xrange(self.width):
+            self.content2D.append([])
+        # fill them
+        for xpos in xrange(self.width):
+            for ypos in xrange(self.height):
+                self.content2D[xpos].append(self.decoded_content[xpos + ypos * self.width])
+
+    def pretty_print(self):
+        num = 0
+        for y in range(int(self.height)):
+            s = u""
+            for x in range(int(self.width)):
+                s += str(self.decoded_content[num])
+                num += 1
+            print s
+
+    # def get_visible_tile_range(self, xmin, ymin, xmax, ymax):
+        # tile_w = self.pixel_width / self.width
+        # tile_h = self.pixel_height / self.height
+        # left = int(round(float(xmin) / tile_w)) - 1
+        # right = int(round(float(xmax) / tile_w)) + 2
+        # top = int(round(float(ymin) / tile_h)) - 1
+        # bottom = int(round(float(ymax) / tile_h)) + 2
+        # return (left, top, left - right, top - bottom)
+
+    # def get_tiles(self, xmin, ymin, xmax, ymax):
+        # tiles = []
+        # if self.visible:
+            # for ypos in range(ymin, ymax):
+                # for xpos in range(xmin, xmax):
+                    # try:
+                        # img_idx = self.content2D[xpos][ypos]
+                        # if img_idx:
+                            # tiles.append((xpos, ypos, img_idx))
+                    # except IndexError:
+                        # pass
+        # return tiles
+
+#-------------------------------------------------------------------------------
+
+class TileChunk(object):
+    u"""
+    A rectangular part of a layer of an infinite map. The encoded content is
+    kept and only decoded when the chunk is accessed.
+
+    :Ivariables:
+        x : int
+            position of the chunk in number of tiles, can be negative
+        y : int
+            position of the chunk in number of tiles, can be negative
+        width : int
+            number of tiles in x direction
+        height : int
+            number of tiles in y direction
+        decoded_content : list
+            list of gids like TileLayer.decoded_content or None if not decoded
+        flags : array
+            flip flags like TileLayer.flags, None if no tile is flipped
+    """
+
+    def __init__(self):
+        self.x = 0
+        self.y = 0
+        self.width = 0
+        self.height = 0
+        self.encoding = None
+        self.compression = None
+        self.encoded_content = None
+        self.decoded_content = None
+        self.flags = None
+
+    def decode(self):
+        u"""
+        Decodes the encoded_content into decoded_content.
+        """
+        if not self.encoded_content:
+            raise Exception(u'no encoded content to decode')
+        self.decoded_content, self.flags = _split_flags(_unpack_gid_data( \
+                    _decode_gid_data(self.encoded_content, self.encoding, self.compression)))
+
+    def overlaps(self, xmin, ymin, xmax, ymax):
+        u"""
+        Returns True if the chunk overlaps the tile region xmin <= x < xmax,
+        ymin <= y < ymax.
+        """
+        return self.x < xmax and xmin < self.x + self.width and \
+               self.y < ymax and ymin < self.y + self.height
+
+class _ChunkedContent2D(object):
+    u"""
+    content2D of a chunked layer, usage: gid = content2D[x][y]
+    The chunks are decoded on access.
+    """
+
+    def __init__(self, layer):
+        self._layer = layer
+
+    def __len__(self):
+        return self._layer.width
+
+    def __getitem__(self, xpos):
+        return _ChunkedColumn(self._layer, xpos)
+
+class _ChunkedColumn(object):
+
+    def __init__(self, layer, xpos):
+        self._layer = layer
+        self._xpos = xpos
+
+    def __len__(self):
+        return self._layer.height
+
+    def __getitem__(self, ypos):
+        return self._layer.get_gid(self._xpos, ypos)
+
+#-------------------------------------------------------------------------------
+
+
+class MapObjectGroup(object):
+    u"""
+    Group of objects on the map.
+
+    :Ivariables:
+        x : int
+            the x position
+        y : int
+            the y position
+        width : int
+            width of the bounding box (usually 0, so no use)
+        height : int
+            height of the bounding box (usually 0, so no use)
+        name : string
+            name of the group
+        objects : list
+            list of the map objects
+
+    """
+
+    __slots__ = ('width', 'height', 'name', 'objects', 'x', 'y', 'color', 'opacity', \
+                 'visible', 'id', '_properties', '_index', '__dict__')
+
+    properties = _lazy_properties
+
+    def __init__(self):
+        self.width = 0
+        self.height = 0
+        self.name = None
+        self.objects = []
+        self.x = 0
+        self.y = 0
+        self._properties = None # {name: value}
+        self._index = None
+
+    def get_index(self, cell_size=None):
+        u"""
+        Returns the MapObjectIndex of this group, it is built on the first
+        call. It is rebuilt automatically if objects were added or removed,
+        call its rebuild() method after moving or renaming objects.
+
+        :Parameters:
+            cell_size : int
+                size of the grid cells in pixels, see MapObjectIndex
+        """
+        if self._index is None or (cell_size and cell_size != self._index.cell_size):
+            self._index = MapObjectIndex(self, cell_size)
+        elif self._index.num_objects != len(self.objects):
+            self._index.rebuild()
+        return self._index
+
+#-------------------------------------------------------------------------------
+
+class MapObjectIndex(object):
+    u"""
+    Spatial index of the objects of a MapObjectGroup: a uniform grid over the
+    bounding boxes of the objects plus a lookup by name and type.
+
+    All coordinates are map pixels, the position of the group is added to
+    the positions of the objects. An object without width and height is a
+    point. The map has to be converted (see TileMap.convert()).
+
+    :Ivariables:
+        cell_size : int
+            size of the grid cells in pixels
+        num_objects : int
+            number of objects when the index was built
+    """
+
+    def __init__(self, object_group, cell_size=None):
+        u"""
+        :Parameters:
+            object_group : MapObjectGroup
+                the group to index
+            cell_size : int
+                size of the grid cells in pixels, it should be about the size
+                of the queried areas. Default: None, 64 pixels
+        """
+        self._object_group = object_group
+        self.cell_size = cell_size or 64
+        self.num_objects = 0
+        self._cells = {} # {(cell x, cell y): [(x, y, x2, y2, obj)]}
+        self._by_name = {} # {name: [obj]}
+        self._by_type = {} # {type: [obj]}
+        self._min_cell = self._max_cell = (0, 0)
+        self.rebuild()
+
+    def rebuild(self):
+        u"""
+        Builds the index again, call it after objects have been changed.
+        """
+        cell_size = self.cell_size
+        cells = {}
+        by_name = {}
+        by_type = {}
+        min_cx = min_cy = max_cx = max_cy = 0
+        group_x = self._object_group.x
+        group_y = self._object_group.y
+        for num, obj in enumerate(self._object_group.objects):
+            x = group_x + obj.x
+            y = group_y + obj.y
+            entry = (x, y, x + obj.width, y + obj.height, obj)
+            cx1 = x // cell_size
+            cy1 = y // cell_size
+            cx2 = max(cx1, (x + obj.width - 1) // cell_size)
+            cy2 = max(cy1, (y + obj.height - 1) // cell_size)
+            for cy in xrange(cy1, cy2 + 1):
+                for cx in xrange(cx1, cx2 + 1):
+                    cell = cells.get((cx, cy))
+                    if cell is None:
+                        cells[(cx, cy)] = [entry]
+                    else:
+                        cell.append(entry)
+            if num == 0:
+                min_cx, min_cy, max_cx, max_cy = cx1, cy1, cx2, cy2
+            else:
+                min_cx = min(min_cx, cx1)
+                min_cy = min(min_cy, cy1)
+                max_cx = max(max_cx, cx2)
+                max_cy = max(max_cy, cy2)
+            by_name.setdefault(obj.name, []).append(obj)
+            by_type.setdefault(obj.type, []).append(obj)
+        self._cells = cells
+        self._by_name = by_name
+        self._by_type = by_type
+        self._min_cell = (min_cx, min_cy)
+        self._max_cell = (max_cx, max_cy)
+        self.num_objects = len(self._object_group.objects)
+
+    def get_by_name(self, name):
+        u"""
+        :returns: list of the objects with this name
+        """
+        return list(self._by_name.get(name, []))
+
+    def get_by_type(self, type):
+        u"""
+        :returns: list of the objects of this type
+        """
+        return list(self._by_type.get(type, []))
+
+    def query_rect(self, x, y, width, height):
+        u"""
+        Finds the objects whose bounding box overlaps the rectangle
+        x <= px < x + width, y <= py < y + height.
+
+        :returns: list of objects
+        """
+        x2 = x + width
+        y2 = y + height
+        cell_size = self.cell_size
+        cx1 = max(x // cell_size, self._min_cell[0])
+        cy1 = max(y // cell_size, self._min_cell[1])
+        cx2 = min((x2 - 1) // cell_size, self._max_cell[0])
+        cy2 = min((y2 - 1) // cell_size, self._max_cell[1])
+        cells = self._cells
+        found = []
+        seen = set()
+        for cy in xrange(int(cy1), int(cy2) + 1):
+            for cx in xrange(int(cx1), int(cx2) + 1):
+                for entry in cells.get((cx, cy), ()):
+                    ox, oy, ox2, oy2, obj = entry
+                    if ox < x2 and oy < y2 and \
+                                (ox2 > x if ox2 > ox else ox >= x) and \
+                                (oy2 > y if oy2 > oy else oy >= y):
+                        if id(obj) not in seen:
+                            seen.add(id(obj))
+                            found.append(obj)
+        return found
+
+    def query_point(self, x, y):
+        u"""
+        Finds the objects whose bounding box contains the point, objects
+        without size have to be exactly at the point.
+
+        :returns: list of objects
+        """
+        found = []
+        for ox, oy, ox2, oy2, obj in self._cells.get((x // self.cell_size, y // self.cell_size), ()):
+            if (ox <= x < ox2 or ox == x == ox2) and (oy <= y < oy2 or oy == y == oy2):
+                found.append(obj)
+        return found
+
+    def nearest(self, x, y, max_distance=None):
+        u"""
+        Finds the object whose bounding box is nearest to the point.
+
+        :Parameters:
+            max_distance : float
+                objects farther away are not considered, default: None
+
+        :returns: the object or None
+        """
+        cell_size = self.cell_size
+        center_x = int(x // cell_size)
+        center_y = int(y // cell_size)
+        # number of rings needed to cover all cells
+        max_ring = max(abs(center_x - self._min_cell[0]), abs(center_x - self._max_cell[0]), \
+                       abs(center_y - self._min_cell[1]), abs(center_y - self._max_cell[1]))
+        best = None
+        best_distance = max_distance
+        for ring in xrange(max_ring + 1):
+            # objects in cells of this ring are at least (ring - 1) * cell_size away
+            if best_distance is not None and best_distance < (ring - 1) * cell_size:
+                break
+            for cx, cy in self._get_ring(center_x, center_y, ring):
+                for ox, oy, ox2, oy2, obj in self._cells.get((cx, cy), ()):
+                    dx = max(ox - x, 0, x - ox2)
+                    dy = max(oy - y, 0, y - oy2)
+                    distance = (dx * dx + dy * dy) ** 0.5
+                    if best_distance is None or distance < best_distance or \
+                                (best is None and distance == best_distance):
+                        best = obj
+                        best_distance = distance
+        return best
+
+    def _get_ring(self, center_x, center_y, ring):
+        if ring == 0:
+            return [(center_x, center_y)]
+        cells = []
+        for cx in xrange(center_x - ring, center_x + ring + 1):
+            cells.append((cx, center_y - ring))
+            cells.append((cx, center_y + ring))
+        for cy in xrange(center_y - ring + 1, center_y + ring):
+            cells.append((center_x - ring, cy))
+            cells.append((center_x + ring, cy))
+        return cells
+
+#-------------------------------------------------------------------------------
+
+class MapObject(object):
+    u"""
+    A single object on the map.
+
+    :Ivariables:
+        x : int
+            x position relative to group x position
+        y : int
+            y position relative to group y position
+        width : int
+            width of this object
+        height : int
+            height of this object
+        type : string
+            the type of this object
+        image_source : string
+            source path of the image for this object
+        image : :class:TileImage
+            after loading this is the pygame surface containing the image
+    """
+    __slots__ = ('name', 'x', 'y', 'width', 'height', 'type', 'image_source', 'image', \
+                 'gid', 'id', 'rotation', 'visible', '_properties', '__dict__')
+
+    properties = _lazy_properties
+
+    def __init__(self):
+        self.name = None
+        self.x = 0
+        self.y = 0
+        self.width = 0
+        self.height = 0
+        self.type = None
+        self.image_source = None
+        self.image = None
+        self._properties = None # {name: value}
+
+#-------------------------------------------------------------------------------
+def _decode_gid_data(encoded_content, encoding, compression):
+    # returns the raw little endian gid data or, for csv and xml, the gid list
+    s = encoded_content
+    if encoding:
+        if encoding.lower() == u'base64':
+            s = decode_base64(s)
+        elif encoding.lower() == u'csv':
+            decoded_content = []
+            list_of_lines = s.split()
+            for line in list_of_lines:
+                decoded_content.extend(line.split(','))
+            return map(int, [val for val in decoded_content if val])
+        else:
+            raise Exception(u'unknown data encoding %s' % (encoding))
+    else:
+        # in the case of xml the encoded_content already contains a list of integers
+        return map(int, encoded_content)
+    if compression:
+        if compression == u'gzip':
+            s = decompress_gzip(s)
+        elif compression == u'zlib':
+            s = decompress_zlib(s)
+        else:
+            raise Exception(u'unknown data compression %s' %(compression))
+    return s
+
+def _unpack_gid_data(data):
+    if isinstance(data, list):
+        return data
+    return list(struct.unpack('<%dI' % (len(data) // 4), data))
+
+def _pack_gid_data(gids):
+    # inverse of _unpack_gid_data, packs the gids as little endian uint32
+    import array
+    typecode = 'I' if array.array('I').itemsize == 4 else 'L'
+    gids = array.array(typecode, gids)
+    if sys.byteorder == 'big':
+        gids.byteswap()
+    return gids.tostring()
+
+def _encode_gid_data(gids, compression, level=6):
+    # inverse of _decode_gid_data for the base64 encoding
+    s = _pack_gid_data(gids)
+    if compression:
+        if compression == u'gzip':
+            s = compress_gzip(s, level)
+        elif compression == u'zlib':
+            s = compress_zlib(s, level)
+        else:
+            raise Exception(u'unknown data compression %s' %(compression))
+    return encode_base64(s)
+
+#-------------------------------------------------------------------------------
+def decode_base64(in_str):
+    u"""
+    Decodes a base64 string and returns it.
+
+    :Parameters:
+        in_str : string
+            base64 encoded string
+
+    :returns: decoded string
+    """
+    import base64
+    return base64.decodestring(in_str)
+
+#-------------------------------------------------------------------------------
+def encode_base64(in_str):
+    u"""
+    Encodes a string to base64 (without line breaks) and returns it.
+
+    :Parameters:
+        in_str : string
+            string to encode
+
+    :returns: base64 encoded string
+    """
+    import base64
+    return base64.b64encode(in_str)
+
+#-------------------------------------------------------------------------------
+def decompress_gzip(in_str):
+    u"""
+    Uncompresses a gzip string and returns it.
+
+    :Parameters:
+        in_str : string
+            gzip compressed string
+
+    :returns: uncompressed string
+    """
+    import gzip
+    import StringIO
+    # gzip can only handle file object therefore using StringIO
+    copmressed_stream = StringIO.StringIO(in_str)
+    gzipper = gzip.GzipFile(fileobj=copmressed_stream)
+    s = gzipper.read()
+    gzipper.close()
+    return s
+
+#-------------------------------------------------------------------------------
+def decompress_zlib(in_str):
+    u"""
+    Uncompresses a zlib string and returns it.
+
+    :Parameters:
+        in_str : string
+            zlib compressed string
+
+    :returns: uncompressed string
+    """
+    import zlib
+    s = zlib.decompress(in_str)
+    return s
+#-------------------------------------------------------------------------------
+def compress_gzip(in_str, level=6):
+    u"""
+    Compresses a string using gzip and returns it.
+
+    :Parameters:
+        in_str : string
+            string to compress
+        level : int
+            compression level from 1 (fast) to 9 (small)
+
+    :returns: gzip compressed string
+    """
+    import gzip
+    import StringIO
+    compressed_stream = StringIO.StringIO()
+    gzipper = gzip.GzipFile(fileobj=compressed_stream, mode='wb', compresslevel=level)
+    gzipper.write(in_str)
+    gzipper.close()
+    return compressed_stream.getvalue()
+
+#-------------------------------------------------------------------------------
+def compress_zlib(in_str, level=6):
+    u"""
+    Compresses a string using zlib and returns it.
+
+    :Parameters:
+        in_str : string
+            string to compress
+        level : int
+            compression level from 1 (fast) to 9 (small)
+
+    :returns: zlib compressed string
+    """
+    import zlib
+    return zlib.compress(in_str, level)
+
+#-------------------------------------------------------------------------------
+_GID_MASK = 0x1FFFFFFF # the top three bits of a gid are the flip flags
+_FLAGS_SHIFT = 29
+
+# flip flags of a tile as stored in TileLayer.flags and TileChunk.flags
+FLIP_HORIZONTAL = 4
+FLIP_VERTICAL = 2
+FLIP_DIAGONAL = 1
+
+def _split_flags(gids):
+    # masks the flip flags out of the gids in bulk, returns the gids and the
+    # flags array or None if no tile is flipped
+    if not gids or max(gids) <= _GID_MASK:
+        return gids, None
+    import array
+    flags = array.array('B', [gid >> _FLAGS_SHIFT for gid in gids])
+    return [gid & _GID_MASK for gid in gids], flags
+
+def _join_flags(gids, flags):
+    # inverse of _split_flags
+    if flags is None:
+        return gids
+    return [gid | (flag << _FLAGS_SHIFT) for gid, flag in zip(gids, flags)]
+
+#-------------------------------------------------------------------------------
+# packed binary map format, see TileMapBinaryWriter
+_BINARY_MAGIC = 'TMXB'
+_BINARY_VERSION = 2 # version 2 added the flip flags blocks
+_BINARY_HEADER = '<4sII' # magic, format version, length of the json header
+_BINARY_ALIGN = 4
+
+def _align(offset, alignment=_BINARY_ALIGN):
+    return (offset + alignment - 1) // alignment * alignment
+
+def _get_simple_attributes(obj, exclude=()):
+    # collects the attributes that can be stored as json, lists of child
+    # objects and loaded images are left out
+    names = list(getattr(obj, '__dict__', ()))
+    for cls in type(obj).__mro__:
+        names.extend(getattr(cls, '__slots__', ()))
+    attrs = {}
+    for name in names:
+        if name == '_properties':
+            # lazily created properties of the slotted classes
+            name = u'properties'
+            if obj._properties is None:
+                continue
+        if name.startswith(u'_') or name in exclude or not hasattr(obj, name):
+            continue
+        value = getattr(obj, name)
+        if value is None or isinstance(value, (basestring, bool, int, long, float, dict, tuple)):
+            attrs[name] = value
+    return attrs
+
+def _set_simple_attributes(obj, attrs):
+    for name, value in attrs.items():
+        if isinstance(value, list):
+            # json has no tuples, e.g. the converted trans color
+            value = tuple(value)
+        setattr(obj, name, value)
+
+class _MappedGids(object):
+    u"""
+    Read only sequence of gids stored as little endian uint32 in a memory
+    mapping. Used as decoded_content of layers loaded by parse_binary().
+    """
+
+    def __init__(self, mapping, offset, length):
+        self._mapping = mapping
+        self._offset = offset
+        self._length = length
+
+    def __len__(self):
+        return self._length
+
+    def __getitem__(self, idx):
+        if isinstance(idx, slice):
+            start, stop, step = idx.indices(self._length)
+            if step != 1:
+                return [self[i] for i in xrange(start, stop, step)]
+            count = max(0, stop - start)
+            return list(struct.unpack_from('<%dI' % count, self._mapping, self._offset + 4 * start))
+        if idx < 0:
+            idx += self._length
+        if not 0 <= idx < self._length:
+            raise IndexError(u'gid index out of range')
+        return struct.unpack_from('<I', self._mapping, self._offset + 4 * idx)[0]
+
+    def __iter__(self):
+        # unpack in blocks, so iterating does not copy the whole layer at once
+        block = 4096
+        for start in xrange(0, self._length, block):
+            for gid in self[start:start + block]:
+                yield gid
+
+class _MappedContent2D(object):
+    u"""
+    content2D of a layer loaded by parse_binary(), usage: gid = content2D[x][y]
+    """
+
+    def __init__(self, gids, width, height):
+        self._gids = gids
+        self._width = width
+        self._height = height
+
+    def __len__(self):
+        return self._width
+
+    def __getitem__(self, xpos):
+        if not 0 <= xpos < self._width:
+            raise IndexError(u'x position out of range')
+        return _MappedColumn(self._gids, xpos, self._width, self._height)
+
+class _MappedColumn(object):
+
+    def __init__(self, gids, xpos, width, height):
+        self._gids = gids
+        self._xpos = xpos
+        self._width = width
+        self._height = height
+
+    def __len__(self):
+        return self._height
+
+    def __getitem__(self, ypos):
+        if not 0 <= ypos < self._height:
+            raise IndexError(u'y position out of range')
+        return self._gids[self._xpos + ypos * self._width]
+
+#-------------------------------------------------------------------------------
+class TileMapBinaryWriter(object):
+    u"""
+    Writes a decoded TileMap to a packed binary file. The file can be opened
+    again using TileMapParser.parse_binary(), which memory maps it instead of
+    reading it, so multiple processes share one page cached copy of the map.
+
+    Layout of the file (little endian)::
+
+        magic 'TMXB', uint32 format version, uint32 header length
+        header: utf-8 encoded json containing the attributes of the map,
+                tile sets, layers and object groups (object groups are
+                stored completely in the header)
+        gid blocks: one block of width * height uint32 per layer, each
+                    4 byte aligned, the offsets are stored in the header
+        flags blocks: one block of width * height bytes for each layer
+                      having flipped tiles, 4 byte aligned
+
+
+    """
+
+    def write(self, world_map, file_name):
+        u"""
+        Writes the map to file_name. The layers have to be decoded. Infinite
+        maps (layers with chunks) are not supported.
+        """
+        import json
+        layers = []
+        offset = 0
+        for layer in world_map.layers:
+            if layer.chunks:
+                raise Exception(u'layer %s: infinite maps are not supported by the binary format' % layer.name)
+            if len(layer.decoded_content) != layer.width * layer.height:
+                raise Exception(u'layer %s is not decoded' % layer.name)
+            layer_attrs = _get_simple_attributes(layer, (u'encoded_content', ))
+            layer_attrs[u'offset'] = offset
+            layers.append(layer_attrs)
+            offset = _align(offset + 4 * layer.width * layer.height)
+            if layer.flags is not None:
+                layer_attrs[u'flags_offset'] = offset
+                offset = _align(offset + layer.width * layer.height)
+        header = _get_simple_attributes(world_map, (u'indexed_tiles', u'named_layers', u'named_tile_sets'))
+        header[u'tile_sets'] = [self._tile_set_to_dict(tile_set) for tile_set in world_map.tile_sets]
+        header[u'layers'] = layers
+        header[u'object_groups'] = [self._object_group_to_dict(group) for group in world_map.object_groups]
+        header = json.dumps(header).encode('utf-8')
+
+        file = open(file_name, "wb")
+        try:
+            file.write(struct.pack(_BINARY_HEADER, _BINARY_MAGIC, _BINARY_VERSION, len(header)))
+            file.write(header)
+            data_start = _align(file.tell())
+            file.write('\0' * (data_start - file.tell()))
+            for layer, layer_attrs in zip(world_map.layers, layers):
+                file.seek(data_start + layer_attrs[u'offset'])
+                self._write_gids(file, layer.decoded_content)
+                if layer.flags is not None:
+                    file.seek(data_start + layer_attrs[u'flags_offset'])
+                    layer.flags.tofile(file)
+        finally:
+            file.close()
+
+    def _write_gids(self, file, gids):
+        import array
+        typecode = 'I' if array.array('I').itemsize == 4 else 'L'
+        gids = array.array(typecode, gids)
+        if sys.byteorder == 'big':
+            gids.byteswap()
+        gids.tofile(file)
+
+    def _tile_set_to_dict(self, tile_set):
+        attrs = _get_simple_attributes(tile_set, (u'indexed_images', u'indexed_tiles'))
+        attrs[u'images'] = [_get_simple_attributes(img, (u'image', )) for img in tile_set.images]
+        attrs[u'tiles'] = []
+        for tile in tile_set.tiles:
+            tile_attrs = _get_simple_attributes(tile)
+            tile_attrs[u'images'] = [_get_simple_attributes(img, (u'image', )) for img in tile.images]
+            attrs[u'tiles'].append(tile_attrs)
+        return attrs
+
+    def _object_group_to_dict(self, object_group):
+        attrs = _get_simple_attributes(object_group)
+        attrs[u'objects'] = [_get_simple_attributes(obj, (u'image', )) for obj in object_group.objects]
+        return attrs
+
+#-------------------------------------------------------------------------------
+class TileMapWriter(object):
+    u"""
+    Writes a TileMap to a \*.tmx file that can be parsed again by the
+    TileMapParser or opened in Tiled.
+
+    The xml is written directly to the file while walking the map instead of
+    building a dom first. The gids of the layers are packed in bulk and written
+    base64 encoded and compressed. Image and \*.tsx sources are written relative
+    to the new file. Attributes having the default value of their class are
+    left out, so parsing the written file gives the same values again.
+    """
+
+    def write(self, world_map, file_name, compression=u'zlib', level=6):
+        u"""
+        Writes the map to file_name. Layers that are not decoded yet are
+        decoded temporarily.
+
+        :Parameters:
+            world_map : TileMap
+                the map to write
+            file_name : string
+                path of the \*.tmx file to write
+            compression : string
+                compression of the layer data, u'zlib', u'gzip' or None
+            level : int
+                compression level from 1 (fast) to 9 (small)
+        """
+        self._out_dir = os.path.dirname(os.path.abspath(file_name))
+        self._map_dir = os.path.dirname(os.path.abspath(world_map.map_file_name or file_name))
+        self._compression = compression
+        self._level = level
+        self._defaults = {}
+        file = open(file_name, "wb")
+        try:
+            self._write = lambda text: file.write(text.encode('utf-8'))
+            self._write(u'<?xml version="1.0" encoding="UTF-8"?>\n')
+            self._write(self._start_tag(u'map', world_map, (u'pixel_width', u'pixel_height', u'map_file_name')))
+            self._write_properties(world_map, u' ')
+            for tile_set in world_map.tile_sets:
+                self._write_tile_set(tile_set)
+            for layer in world_map.layers:
+                self._write_layer(layer)
+            for object_group in world_map.object_groups:
+                self._write_object_group(object_group)
+            self._write(u'</map>\n')
+        finally:
+            file.close()
+            self._write = None
+
+    def _write_tile_set(self, tile_set):
+        source = getattr(tile_set, 'source', None)
+        if source:
+            # external \*.tsx file, only the reference is part of the map
+            self._write(u' <tileset firstgid=%s source=%s/>\n' % \
+                        (_quote(tile_set.firstgid), _quote(self._get_source(source))))
+            return
+        self._write(u' ' + self._start_tag(u'tileset', tile_set, (u'source', )))
+        self._write_properties(tile_set, u'  ')
+        for img in tile_set.images:
+            self._write_image(img, u'  ')
+        for tile in tile_set.tiles:
+            self._write(u'  ' + self._start_tag(u'tile', tile))
+            self._write_properties(tile, u'   ')
+            for img in tile.images:
+                self._write_image(img, u'   ')
+            self._write(u'  </tile>\n')
+        self._write(u' </tileset>\n')
+
+    def _write_image(self, img, indent):
+        start_tag = self._start_tag(u'image', img, (u'source', u'trans', u'encoding', u'content'), \
+                        self._get_image_attrs(img), False)
+        if img.content:
+            data_attrs = u''
+            if img.encoding:
+                data_attrs = u' encoding=%s' % _quote(img.encoding)
+            self._write(u'%s%s<data%s>%s</data></image>\n' % \
+                        (indent, start_tag, data_attrs, _escape(img.content)))
+        else:
+            self._write(u'%s%s/>\n' % (indent, start_tag[:-1]))
+
+    def _get_image_attrs(self, img):
+        attrs = []
+        if img.source:
+            attrs.append((u'source', self._get_source(img.source)))
+        if img.trans:
+            trans = img.trans
+            if not isinstance(trans, basestring):
+                trans = u'%02x%02x%02x' % tuple(trans)
+            attrs.append((u'trans', trans))
+        return attrs
+
+    def _write_layer(self, layer):
+        self._write(u' ' + self._start_tag(u'layer', layer, \
+                        (u'encoding', u'compression', u'encoded_content', u'pixel_width', u'pixel_height')))
+        self._write_properties(layer, u'  ')
+        data_attrs = u'encoding="base64"'
+        if self._compression:
+            data_attrs += u' compression=%s' % _quote(self._compression)
+        if layer.chunks:
+            self._write(u'  <data %s>\n' % data_attrs)
+            for chunk in layer.chunks:
+                if chunk.decoded_content is None:
+                    chunk.decode()
+                    gids = _join_flags(chunk.decoded_content, chunk.flags)
+                    chunk.decoded_content = None
+                    chunk.flags = None
+                else:
+                    gids = _join_flags(chunk.decoded_content, chunk.flags)
+                self._write(u'   %s%s</chunk>\n' % (self._start_tag(u'chunk', chunk, \
+                        (u'encoding', u'compression', u'encoded_content'), newline=False), \
+                        _encode_gid_data(gids, self._compression, self._level)))
+            self._write(u'  </data>\n')
+        else:
+            gids = _join_flags(layer.decoded_content, layer.flags)
+            if len(gids) != int(layer.width) * int(layer.height):
+                # not decoded, the raw gids still contain the flip flags
+                gids = _unpack_gid_data(layer._decode_data())
+            self._write(u'  <data %s>%s</data>\n' % (data_attrs, \
+                        _encode_gid_data(gids, self._compression, self._level)))
+        self._write(u' </layer>\n')
+
+    def _write_object_group(self, object_group):
+        self._write(u' ' + self._start_tag(u'objectgroup', object_group))
+        self._write_properties(object_group, u'  ')
+        for obj in object_group.objects:
+            start_tag = self._start_tag(u'object', obj, (u'image_source', ), newline=False)
+            children = self._get_properties_xml(obj, u'   ')
+            if obj.image_source:
+                children += u'   <image source=%s/>\n' % _quote(self._get_source(obj.image_source))
+            if children:
+                self._write(u'  %s\n%s  </object>\n' % (start_tag, children))
+            else:
+                self._write(u'  %s/>\n' % start_tag[:-1])
+        self._write(u' </objectgroup>\n')
+
+    def _write_properties(self, obj, indent):
+        properties = self._get_properties_xml(obj, indent)
+        if properties:
+            self._write(properties)
+
+    def _get_properties_xml(self, obj, indent):
+        if hasattr(obj, '_properties'):
+            # do not create the lazy properties of the slotted classes
+            properties = obj._properties
+        else:
+            properties = getattr(obj, 'properties', None)
+        if not properties:
+            return u''
+        lines = [u'%s<properties>\n' % indent]
+        for name in sorted(properties):
+            lines.append(u'%s <property name=%s value=%s/>\n' % \
+                        (indent, _quote(name), _quote(properties[name])))
+        lines.append(u'%s</properties>\n' % indent)
+        return u''.join(lines)
+
+    def _start_tag(self, tag, obj, exclude=(), attrs=None, newline=True):
+        # attributes with the default value of the class are left out, the
+        # parser sets the same default again
+        cls = type(obj)
+        defaults = self._defaults.get(cls, None)
+        if defaults is None:
+            defaults = _get_simple_attributes(cls())
+            self._defaults[cls] = defaults
+        attrs = list(attrs or [])
+        for name, value in _get_simple_attributes(obj, exclude).items():
+            if isinstance(value, dict) or (name in defaults and defaults[name] == value):
+                continue
+            if isinstance(value, bool):
+                value = int(value)
+            attrs.append((name, value))
+        attrs.sort(key=_attribute_order)
+        text = u'<%s%s>' % (tag, u''.join(u' %s=%s' % (name, _quote(value)) for name, value in attrs))
+        if newline:
+            text += u'\n'
+        return text
+
+    def _get_source(self, source):
+        # sources are stored absolute or relative to the parsed map
+        path = os.path.join(self._map_dir, source)
+        try:
+            path = os.path.relpath(path, self._out_dir)
+        except ValueError:
+            # e.g. on another drive
+            pass
+        return path.replace(os.sep, u'/')
+
+# order of the attributes as written by Tiled, the others follow sorted by name
+_ATTRIBUTE_ORDER = (u'version', u'orientation', u'renderorder', u'id', u'firstgid', \
+                    u'name', u'type', u'x', u'y', u'width', u'height', u'tilewidth', u'tileheight')
+
+_ATTRIBUTE_RANK = dict((name, rank) for rank, name in enumerate(_ATTRIBUTE_ORDER))
+
+def _attribute_order(attr):
+    return (_ATTRIBUTE_RANK.get(attr[0], len(_ATTRIBUTE_ORDER)), attr[0])
+
+_XML_ESCAPES = ((u'&', u'&amp;'), (u'<', u'&lt;'), (u'>', u'&gt;'), (u'"', u'&quot;'), \
+                (u'\n', u'&#10;'), (u'\r', u'&#13;'), (u'\t', u'&#9;'))
+_XML_SPECIAL = re.compile(u'[&<>"\n\r\t]')
+
+def _escape(value):
+    if not isinstance(value, basestring):
+        # numbers need no escaping
+        return repr(value) if isinstance(value, float) else unicode(value)
+    if _XML_SPECIAL.search(value) is None:
+        return value
+    for char, entity in _XML_ESCAPES:
+        value = value.replace(char, entity)
+    return value
+
+def _quote(value):
+    return u'"%s"' % _escape(value)
+
+#-------------------------------------------------------------------------------
+def printer(obj, ident=''):
+    u"""
+    Helper function, prints a hirarchy of objects.
+    """
+    import inspect
+    print ident + obj.__class__.__name__.upper()
+    ident += '    '
+    lists = []
+    for name in dir(obj):
+        elem = getattr(obj, name)
+        if isinstance(elem, list) and name != u'decoded_content':
+            lists.append(elem)
+        elif not inspect.ismethod(elem):
+            if not name.startswith('__'):
+                if name == u'data' and elem:
+                    print ident + u'data = '
+                    printer(elem, ident + '    ')
+                else:
+                    print ident + u'%s\t= %s' % (name, getattr(obj, name))
+    for l in lists:
+        for i in l:
+            printer(i, ident + '    ')
+
+#-------------------------------------------------------------------------------
+# process wide cache of the parsed external tile sets, shared by all parsers
+# {absolute path of the *.tsx file: (modification time, TileSet)}
+_tsx_cache = {}
+
+def clear_tile_set_cache():
+    u"""
+    Empties the cache of parsed \*.tsx tile sets shared by all TileMapParser.
+    Changed files are parsed again anyway, this only frees the memory.
+    """
+    _tsx_cache.clear()
+
+#-------------------------------------------------------------------------------
+class TileMapParser(object):
+    u"""
+    Allows to parse and decode map files for 'Tiled', a open source map editor
+    written in java. It can be found here: http://mapeditor.org/
+    """
+
+    def _build_tile_set(self, tile_set_node, world_map):
+        tile_set = TileSet()
+        self._set_attributes(tile_set_node, tile_set)
+        if hasattr(tile_set, "source"):
+            tile_set = self._parse_tsx(tile_set.source, tile_set, world_map)
+        else:
+            tile_set = self._get_tile_set(tile_set_node, tile_set, self.map_file_name)
+        world_map.tile_sets.append(tile_set)
+
+    def _parse_tsx(self, file_name, tile_set, world_map):
+        # ISSUE 5: the *.tsx file is probably relative to the *.tmx file
+        if not os.path.isabs(file_name):
+            print "map file name", self.map_file_name
+            file_name = self._get_abs_path(self.map_file_name, file_name)
+        mtime = os.path.getmtime(file_name)
+        cached = _tsx_cache.get(file_name, None)
+        if cached is None or cached[0] != mtime:
+            print "tsx filename: ", file_name
+            # would be more elegant to use  "with open(file_name, "rb") as file:" but that is python 2.6
+            file = None
+            try:
+                file = open(file_name, "rb")
+                dom = minidom.parseString(file.read())
+            finally:
+                if file:
+                    file.close()
+            cached = (mtime, TileSet())
+            for node in self._get_nodes(dom.childNodes, 'tileset'):
+                self._get_tile_set(node, cached[1], file_name)
+                break;
+            _tsx_cache[file_name] = cached
+        return self._apply_cached_tile_set(cached[1], tile_set)
+
+    def _apply_cached_tile_set(self, cached_tile_set, tile_set):
+        # tile_set has the attributes of the map (firstgid, source), the
+        # images and tiles are shared with the cached tile set
+        for name, value in cached_tile_set.__dict__.items():
+            if name in (u'firstgid', u'indexed_images', u'indexed_tiles'):
+                continue
+            if name == u'properties':
+                tile_set.properties.update(value)
+            elif isinstance(value, list):
+                setattr(tile_set, name, list(value))
+            else:
+                setattr(tile_set, name, value)
+        return tile_set
+
+    def _get_tile_set(self, tile_set_node, tile_set, base_path):
+        for node in self._get_nodes(tile_set_node.childNodes, u'image'):
+            self._build_tile_set_image(node, tile_set, base_path)
+        for node in self._get_nodes(tile_set_node.childNodes, u'tile'):
+            self._build_tile_set_tile(node, tile_set)
+        self._set_attributes(tile_set_node, tile_set)
+        return tile_set
+
+    def _build_tile_set_image(self, image_node, tile_set, base_path):
+        image = TileImage()
+        self._set_attributes(image_node, image)
+        # id of TileImage has to be set!! -> Tile.TileImage will only have id set
+        for node in self._get_nodes(image_node.childNodes, u'data'):
+            self._set_attributes(node, image)
+            image.content = node.childNodes[0].nodeValue
+        image.source = self._get_abs_path(base_path, image.source) # ISSUE 5
+        tile_set.images.append(image)
+
+    def _get_abs_path(self, base, relative):
+            if os.path.isabs(relative):
+                return relative
+            if os.path.isfile(base):
+                base = os.path.dirname(base)
+            return os.path.abspath(os.path.join(base, relative))
+
+    def _build_tile_set_tile(self, tile_set_node, tile_set):
+        tile = Tile()
+        self._set_attributes(tile_set_node, tile)
+        for node in self._get_nodes(tile_set_node.childNodes, u'image'):
+            self._build_tile_set_tile_image(node, tile)
+        tile_set.tiles.append(tile)
+
+    def _build_tile_set_tile_image(self, tile_node, tile):
+        tile_image = TileImage()
+        self._set_attributes(tile_node, tile_image)
+        for node in self._get_nodes(tile_node.childNodes, u'data'):
+            self._set_attributes(node, tile_image)
+            tile_image.content = node.childNodes[0].nodeValue
+        tile.images.append(tile_image)
+
+    def _build_layer(self, layer_node, world_map):
+        layer = TileLayer()
+        self._set_attributes(layer_node, layer)
+        for node in self._get_nodes(layer_node.childNodes, u'data'):
+            self._set_attributes(node, layer)
+            # infinite maps store the data in chunks
+            for chunk_node in self._get_nodes(node.childNodes, u'chunk'):
+                chunk = TileChunk()
+                self._set_attributes_only(chunk_node, chunk)
+                chunk.encoding = layer.encoding
+                chunk.compression = layer.compression
+                chunk.encoded_content = self._get_data_content(chunk_node, layer.encoding)
+                layer.chunks.append(chunk)
+            if not layer.chunks:
+                layer.encoded_content = self._get_data_content(node, layer.encoding)
+        world_map.layers.append(layer)
+
+    def _get_data_content(self, data_node, encoding):
+        if encoding:
+            return data_node.lastChild.nodeValue
+        #print 'has childnodes', node.hasChildNodes()
+        encoded_content = []
+        for child in data_node.childNodes:
+            if child.nodeType == Node.ELEMENT_NODE and child.nodeName == "tile":
+                val = child.attributes["gid"].nodeValue
+                #print child, val
+                encoded_content.append(val)
+        return encoded_content
+
+    def _build_world_map(self, world_node):
+        world_map = TileMap()
+        self._set_attributes(world_node, world_map)
+        # newer versions of Tiled write 1.x, e.g. for infinite maps using chunks
+        if world_map.version.split(u'.')[0] != u"1":
+            raise Exception(u'this parser was made for maps of version 1.x, found version %s' % world_map.version)
+        for node in self._get_nodes(world_node.childNodes, u'tileset'):
+            self._build_tile_set(node, world_map)
+        for node in self._get_nodes(world_node.childNodes, u'layer'):
+            self._build_layer(node, world_map)
+        for node in self._get_nodes(world_node.childNodes, u'objectgroup'):
+            self._build_object_groups(node, world_map)
+        return world_map
+
+    def _build_object_groups(self, object_group_node, world_map):
+        object_group = MapObjectGroup()
+        self._set_attributes(object_group_node,  object_group)
+        for node in self._get_nodes(object_group_node.childNodes, u'object'):
+            tiled_object = MapObject()
+            self._set_attributes(node, tiled_object)
+            for img_node in self._get_nodes(node.childNodes, u'image'):
+                tiled_object.image_source = img_node.attributes[u'source'].nodeValue
+            object_group.objects.append(tiled_object)
+        world_map.object_groups.append(object_group)
+
+    #-- helpers --#
+    def _get_nodes(self, nodes, name):
+        for node in nodes:
+            if node.nodeType == Node.ELEMENT_NODE and node.nodeName == name:
+                yield node
+
+    def _set_attributes(self, node, obj):
+        self._set_attributes_only(node, obj)
+        self._get_properties(node, obj)
+
+    def _set_attributes_only(self, node, obj):
+        attrs = node.attributes
+        for attr_name in attrs.keys():
+            setattr(obj, attr_name, attrs.get(attr_name).nodeValue)
+
+
+    def _get_properties(self, node, obj):
+        props = {}
+        for properties_node in self._get_nodes(node.childNodes, u'properties'):
+            for property_node in self._get_nodes(properties_node.childNodes, u'property'):
+                try:
+                    props[property_node.attributes[u'name'].nodeValue] = property_node.attributes[u'value'].nodeValue
+                except KeyError:
+                    props[property_node.attributes[u'name'].nodeValue] = property_node.lastChild.nodeValue
+        if props:
+            obj.properties.update(props)
+
+
+    #-- parsers --#
+    def parse(self, file_name):
+        u"""
+        Parses the given map. Does no decoding nor loading the data.
+        :return: instance of TileMap
+        """
+        return self._parse_data(self._read_file(file_name))
+
+    def _read_file(self, file_name):
+        # would be more elegant to use  "with open(file_name, "rb") as file:" but that is python 2.6
+        self.map_file_name = os.path.abspath(file_name)
+        file = None
+        try:
+            file = open(self.map_file_name, "rb")
+            return file.read()
+        finally:
+            if file:
+                file.close()
+
+    def _parse_data(self, data):
+        dom = minidom.parseString(data)
+        for node in self._get_nodes(dom.childNodes, 'map'):
+            world_map = self._build_world_map(node)
+            break
+        world_map.map_file_name = self.map_file_name
+        world_map.convert()
+        return world_map
+
+    def parse_decode(self, file_name, workers=None):
+        u"""
+        Parses the map but additionally decodes the data.
+        The layers are decoded using workers threads, see TileMap.decode().
+        :return: instance of TileMap
+        """
+        world_map = TileMapParser().parse(file_name)
+        world_map.decode(workers)
+        return world_map
+
+    def parse_decode_load(self, file_name, image_loader, workers=None):
+        u"""
+        Parses the data, decodes them and loads the images using the image_loader.
+        The layers are decoded using workers threads, the images are loaded
+        one after another (see TileMap.load() for decoding them in threads).
+        :return: instance of TileMap
+        """
+        world_map = self.parse_decode(file_name, workers)
+        world_map.load(image_loader)
+        return world_map
+
+    def parse_binary(self, file_name):
+        u"""
+        Opens a map written by TileMapBinaryWriter. The gids of the layers are
+        not read into memory, decoded_content and content2D of the layers are
+        read only views of a memory mapping of the file. No decoding is needed,
+        load() can be called directly.
+        :return: instance of TileMap
+        """
+        import json
+        import mmap
+        self.map_file_name = os.path.abspath(file_name)
+        file = None
+        try:
+            file = open(self.map_file_name, "rb")
+            mapping = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        finally:
+            if file:
+                file.close()
+        magic, version, header_len = struct.unpack_from(_BINARY_HEADER, mapping, 0)
+        if magic != _BINARY_MAGIC:
+            raise Exception(u'%s is not a binary map file' % file_name)
+        if version not in (1, _BINARY_VERSION):
+            raise Exception(u'unsupported binary map version %s' % version)
+        header_start = struct.calcsize(_BINARY_HEADER)
+        header = json.loads(mapping[header_start:header_start + header_len].decode('utf-8'))
+        data_start = _align(header_start + header_len)
+
+        world_map = TileMap()
+        _set_simple_attributes(world_map, dict((name, value) for name, value in header.items() \
+                    if name not in (u'tile_sets', u'layers', u'object_groups')))
+        for tile_set_attrs in header[u'tile_sets']:
+            tile_set = TileSet()
+            for img_attrs in tile_set_attrs.pop(u'images'):
+                img = TileImage()
+                _set_simple_attributes(img, img_attrs)
+                tile_set.images.append(img)
+            for tile_attrs in tile_set_attrs.pop(u'tiles'):
+                tile = Tile()
+                for img_attrs in tile_attrs.pop(u'images'):
+                    img = TileImage()
+                    _set_simple_attributes(img, img_attrs)
+                    tile.images.append(img)
+                _set_simple_attributes(tile, tile_attrs)
+                tile_set.tiles.append(tile)
+            _set_simple_attributes(tile_set, tile_set_attrs)
+            world_map.tile_sets.append(tile_set)
+            world_map.named_tile_sets[tile_set.name] = tile_set
+        for layer_attrs in header[u'layers']:
+            layer = TileLayer()
+            offset = layer_attrs.pop(u'offset')
+            flags_offset = layer_attrs.pop(u'flags_offset', None)
+            _set_simple_attributes(layer, layer_attrs)
+            gids = _MappedGids(mapping, data_start + offset, layer.width * layer.height)
+            if flags_offset is not None:
+                import array
+                flags_start = data_start + flags_offset
+                layer.flags = array.array('B', mapping[flags_start:flags_start + layer.width * layer.height])
+            layer.decoded_content = gids
+            layer.content2D = _MappedContent2D(gids, layer.width, layer.height)
+            world_map.layers.append(layer)
+            world_map.named_layers[layer.name] = layer
+        for group_attrs in header[u'object_groups']:
+            object_group = MapObjectGroup()
+            for obj_attrs in group_attrs.pop(u'objects'):
+                map_obj = MapObject()
+                _set_simple_attributes(map_obj, obj_attrs)
+                object_group.objects.append(map_obj)
+            _set_simple_attributes(object_group, group_attrs)
+            world_map.object_groups.append(object_group)
+        return world_map
+
+#-------------------------------------------------------------------------------
+class MapLoadTask(object):
+    u"""
+    A map that is loaded in a background thread, see load_map_async().
+    The thread only decodes the images (see IImageLoader.decode_image()),
+    adding them to the image loader and slicing the tiles is done by
+    result() on the calling thread, because e.g. convert() needs the
+    display.
+
+    :Ivariables:
+        file_name : string
+            file name of the map
+        stage : string
+            u'waiting', u'reading', u'parsing', u'decoding', u'loading' or
+            u'done', it stays u'loading' until result() loaded the images
+        progress : float
+            from 0.0 (started) to 1.0 (done)
+    """
+
+    def __init__(self, file_name, image_loader=None, workers=None, progress_callback=None):
+        import threading
+        self.file_name = file_name
+        self.stage = u'waiting'
+        self.progress = 0.0
+        self._image_loader = image_loader
+        self._workers = workers
+        self._progress_callback = progress_callback
+        self._world_map = None
+        self._image_jobs = None
+        self._decoded_images = None
+        self._error = None
+        self._done = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=u'load %s' % file_name)
+        self._thread.daemon = True
+
+    def start(self):
+        u"""
+        Starts loading, load_map_async() already does this.
+        """
+        self._thread.start()
+
+    def done(self):
+        u"""
+        Returns True if the background thread is done or failed, result()
+        does not wait anymore.
+        """
+        return self._done.is_set()
+
+    def result(self, timeout=None):
+        u"""
+        Waits until the background thread is done and returns the map. The
+        first call adds the decoded images to the image loader and slices
+        the tiles, so call it on the thread using the images. An error
+        raised while loading is raised again here.
+
+        :Parameters:
+            timeout : float
+                seconds to wait at most, default: None, wait until done
+
+        :return: instance of TileMap
+        """
+        self._done.wait(timeout)
+        if not self._done.is_set():
+            raise Exception(u'map %s is not loaded yet' % self.file_name)
+        if self._error is not None:
+            raise self._error[0], self._error[1], self._error[2]
+        if self._image_jobs is not None:
+            try:
+                decoded_images = self._world_map._add_decoded_images(self._image_loader, self._image_jobs, \
+                                                                     self._decoded_images)
+                self._world_map._load_images(self._image_loader, decoded_images)
+            except:
+                self._error = sys.exc_info()
+                raise
+            finally:
+                self._image_jobs = None
+                self._decoded_images = None
+            self._set_stage(u'done', 1.0)
+        return self._world_map
+
+    def _set_stage(self, stage, progress):
+        import time
+        self.stage = stage
+        self.progress = progress
+        if self._progress_callback:
+            self._progress_callback(self)
+        # let other threads, e.g. the main loop of the game, run between the stages
+        time.sleep(0)
+
+    def _run(self):
+        try:
+            self._set_stage(u'reading', 0.0)
+            parser = TileMapParser()
+            data = parser._read_file(self.file_name)
+            self._set_stage(u'parsing', 0.1)
+            world_map = parser._parse_data(data)
+            self._set_stage(u'decoding', 0.3)
+            if self._workers:
+                world_map.decode(self._workers)
+            else:
+                for idx, layer in enumerate(world_map.layers):
+                    layer.decode()
+                    self._set_stage(u'decoding', 0.3 + 0.3 * (idx + 1) / len(world_map.layers))
+            if self._image_loader is not None:
+                self._set_stage(u'loading', 0.6)
+                image_jobs = world_map._get_image_jobs()
+                self._decoded_images = _decode_image_jobs(self._image_loader, image_jobs, self._workers, \
+                        lambda done: self._set_stage(u'loading', 0.6 + 0.3 * done))
+                self._image_jobs = image_jobs
+            self._world_map = world_map
+        except:
+            self._error = sys.exc_info()
+        try:
+            if self._image_jobs is None:
+                self._set_stage(u'done', 1.0)
+        finally:
+            self._done.set()
+
+def load_map_async(file_name, image_loader=None, workers=None, progress_callback=None):
+    u"""
+    Parses and decodes a map and (if an image_loader is given) its images
+    in a background thread, so the caller, e.g. the main loop of a game, is
+    not blocked. Several maps can be loaded at the same time. Poll done()
+    and progress of the returned task every frame or wait for it using
+    result(), which loads the decoded images on the calling thread.
+
+    :Parameters:
+        file_name : string
+            the map to load
+        image_loader : IImageLoader
+            used to load the images, default: None, images are not loaded
+        workers : int
+            number of threads decoding the layers and the images, see
+            TileMap.decode() and TileMap.load()
+        progress_callback : function
+            called with the MapLoadTask whenever the stage or progress
+            changes, note that it is called from the loading thread (the
+            last call from result())
+
+    :return: instance of MapLoadTask
+    """
+    task = MapLoadTask(file_name, image_loader, workers, progress_callback)
+    task.start()
+    return task
+
+#-------------------------------------------------------------------------------
+# The renderer and the demos used to be defined in this module. These names
+# keep working: renderpygame only imports pygame when a renderer is used, the
+# demos are imported when they are called.
+
+from tiledtmxloader.renderpygame import RendererPygame
+
+def demo_pygame(file_name):
+    u"""
+    Alias of tiledtmxloader.demo.demo_pygame.
+    """
+    from tiledtmxloader import demo
+    return demo.demo_pygame(file_name)
+
+def demo_pyglet(file_name):
+    u"""
+    Alias of tiledtmxloader.demo.demo_pyglet.
+    """
+    from tiledtmxloader import demo
+    return demo.demo_pyglet(file_name)
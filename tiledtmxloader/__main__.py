@@ -0,0 +1,10 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+u"""
+Runs the demo, usage: python -m tiledtmxloader your_map.tmx [pygame|pyglet]
+"""
+
+from tiledtmxloader import demo
+
+demo.main()
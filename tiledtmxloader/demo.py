@@ -0,0 +1,316 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+u"""
+Demos loading and showing a map using pygame or pyglet.
+
+usage: python -m tiledtmxloader your_map.tmx [pygame|pyglet]
+
+"""
+
+__author__ = u'DR0ID_ @ 2009-2011'
+
+import sys
+
+from tiledtmxloader import TileMapParser, ImageLoaderPygame, ImageLoaderPyglet
+from tiledtmxloader.renderpygame import RendererPygame
+
+#-------------------------------------------------------------------------------
+def demo_pygame(file_name):
+    pygame = __import__('pygame')
+
+    # parser the map (it is done here to initialize the window the same size as the map if it is small enough)
+    world_map = TileMapParser().parse_decode(file_name)
+
+    # init pygame and set up a screen
+    pygame.init()
+    pygame.display.set_caption("tiledtmxloader - " + file_name)
+    screen_width = min(1024, world_map.pixel_width)
+    screen_height = min(768, world_map.pixel_height)
+    screen = pygame.display.set_mode((screen_width, screen_height), pygame.DOUBLEBUF)
+
+    # load the images using pygame
+    image_loader = ImageLoaderPygame()
+    world_map.load(image_loader)
+    #printer(world_map)
+
+    # prepare map rendering
+    assert world_map.orientation == "orthogonal"
+    renderer = RendererPygame(world_map)
+
+    # cam_offset is for scrolling
+    cam_offset_x = 0
+    cam_offset_y = 0
+
+    # variables
+    frames_per_sec = 60.0
+    clock = pygame.time.Clock()
+    running = True
+    draw_obj = True
+    show_message = True
+    font = pygame.font.Font(None, 15)
+    s = "Frames Per Second: 0.0"
+    message = font.render(s, 0, (255,255,255), (0, 0, 0)).convert()
+    show_profile = False
+    profile_lines = []
+
+    # for timed fps update
+    pygame.time.set_timer(pygame.USEREVENT, 1000)
+
+    # add additional sprites
+    num_sprites = 1
+    my_sprites = []
+    for i in range(num_sprites):
+        j = num_sprites - i
+        image = pygame.Surface((20, j*40.0/num_sprites+10))
+        image.fill(((255+200*j)%255, (2*j+255)%255, (5*j)%255))
+        sprite = RendererPygame.Sprite(image, image.get_rect())
+        my_sprites.append(sprite)
+    # renderer.add_sprites(1, my_sprites)
+
+    # optimizations
+    layer_range = range(len(world_map.layers))
+    num_keys = [pygame.K_0, pygame.K_1, pygame.K_2, pygame.K_3, pygame.K_4, pygame.K_5, pygame.K_6, pygame.K_7, pygame.K_8, pygame.K_9]
+    clock_tick = clock.tick
+    pygame_event_get = pygame.event.get
+    pygame_key_get_pressed = pygame.key.get_pressed
+    renderer_render = renderer.render
+    renderer_set_camera_position = renderer.set_camera_position
+    pygame_display_flip = pygame.display.flip
+
+    # mainloop
+    while running:
+        dt = clock_tick()#60.0)
+
+        # event handling
+        for event in pygame_event_get():
+            if event.type == pygame.QUIT:
+                running = False
+            elif event.type == pygame.KEYDOWN:
+                if event.key == pygame.K_ESCAPE:
+                    running = False
+                elif event.key == pygame.K_F1:
+                    print "fps:", clock.get_fps()
+                    show_message = not show_message
+                    print "show info:", show_message
+                    # print "visible range x:", renderer._visible_x_range
+                    # print "visible range y:", renderer._visible_y_range
+                elif event.key == pygame.K_F2:
+                    draw_obj = not draw_obj
+                    print "show objects:", draw_obj
+                elif event.key == pygame.K_F3:
+                    # compare the fps of rendering tile by tile and using pre-rendered chunks
+                    print "fps:", clock.get_fps(), "chunk cache:", bool(renderer.get_chunk_size())
+                    renderer.set_chunk_cache(0 if renderer.get_chunk_size() else 16)
+                    print "chunk cache:", bool(renderer.get_chunk_size())
+                elif event.key == pygame.K_F4:
+                    # time and count what each layer renders, shown below the info
+                    show_profile = not show_profile
+                    renderer.enable_profiling(show_profile)
+                    profile_lines = []
+                    print "show profile:", show_profile
+                elif event.key == pygame.K_F5:
+                    # only render what scrolled into view
+                    print "fps:", clock.get_fps(), "scroll mode:", renderer.get_scroll_mode()
+                    renderer.set_scroll_mode(not renderer.get_scroll_mode())
+                    print "scroll mode:", renderer.get_scroll_mode()
+                elif event.key == pygame.K_F6:
+                    # composite all layers into one, only used while they hold no sprites
+                    print "fps:", clock.get_fps(), "static layers:", renderer.get_static_layers()
+                    if renderer.get_static_layers():
+                        renderer.clear_static_layers()
+                    else:
+                        renderer.set_static_layers(0, len(world_map.layers) - 1)
+                    print "static layers:", renderer.get_static_layers()
+                elif event.key == pygame.K_w:
+                    cam_offset_y -= world_map.tileheight
+                elif event.key == pygame.K_s:
+                    cam_offset_y += world_map.tileheight
+                elif event.key == pygame.K_d:
+                    cam_offset_x += world_map.tilewidth
+                elif event.key == pygame.K_a:
+                    cam_offset_x -= world_map.tilewidth
+                elif event.key in num_keys:
+                    # find out which layer to manipulate
+                    idx = num_keys.index(event.key)
+                    # make sure this layer exists
+                    if idx < len(world_map.layers):
+                        if event.mod & pygame.KMOD_CTRL:
+                            # collapse
+                            renderer.set_collapse_level(idx, max(renderer.get_collapse_level(idx) - 1, 1))
+                            print "layer has collapse level:", renderer.get_collapse_level(idx)
+                        elif event.mod & pygame.KMOD_SHIFT:
+                            # uncollapse
+                            renderer.set_collapse_level(idx, renderer.get_collapse_level(idx) + 1)
+                            print "layer has collapse level:", renderer.get_collapse_level(idx)
+                        elif event.mod & pygame.KMOD_ALT:
+                            # hero sprites
+                            if renderer.contains_sprite(idx, my_sprites[0]):
+                                renderer.remove_sprites(idx, my_sprites)
+                                print "removed hero sprites from layer", idx
+                            else:
+                                renderer.add_sprites(idx, my_sprites)
+                                print "added hero sprites to layer", idx
+                        else:
+                            # visibility
+                            world_map.layers[idx].visible = not world_map.layers[idx].visible
+                            print "layer", idx, "visible:", world_map.layers[idx].visible
+                    else:
+                        print "layer", idx, " does not exist on this map!"
+            elif event.type == pygame.USEREVENT:
+                if show_message:
+                    s = "Number of layers: %i (use 0-9 to toggle)   F1-F6 for other functions   chunk cache: %s   scroll mode: %s   static layers: %s   Frames Per Second: %.2f" % (len(world_map.layers), "on" if renderer.get_chunk_size() else "off", "on" if renderer.get_scroll_mode() else "off", "on" if renderer.get_static_layers() else "off", clock.get_fps())
+                    message = font.render(s, 0, (255,255,255), (0,0,0)).convert()
+                if show_profile:
+                    # the numbers of the last frame
+                    profile_lines = []
+                    profile = renderer.get_profile()
+                    for idx in sorted(profile):
+                        stats = profile[idx]
+                        if stats['last'] == idx:
+                            name = "layer %i %s" % (idx, world_map.layers[idx].name)
+                        else:
+                            name = "static layers %i-%i" % (idx, stats['last'])
+                        s = "%s: %.2f ms   tiles: %i   sprites: %i   cache hits/misses: %i/%i   collapse level: %i" % \
+                                (name, stats['time'] * 1000, stats['tiles'], stats['sprites'], stats['cache_hits'], stats['cache_misses'], stats['level'])
+                        profile_lines.append(font.render(s, 0, (255,255,255), (0,0,0)).convert())
+
+        pressed = pygame_key_get_pressed()
+
+        # The speed is 3 by default.
+        # When left Shift is held, the speed increases.
+        # The speed interpolates based on time passed, so the demo navigates
+        # at a reasonable pace even on huge maps.
+        speed = (3.0 + pressed[pygame.K_LSHIFT] * 12.0) * (dt / frames_per_sec)
+
+        # cam movement
+        if pressed[pygame.K_DOWN]:
+            cam_offset_y += speed
+        if pressed[pygame.K_UP]:
+            cam_offset_y -= speed
+        if pressed[pygame.K_LEFT]:
+            cam_offset_x -= speed
+        if pressed[pygame.K_RIGHT]:
+            cam_offset_x += speed
+
+        # update sprites position
+        for i, spr in enumerate(my_sprites):
+            spr.rect.center = cam_offset_x + 1.0*num_sprites*i/num_sprites + screen_width // 2 , cam_offset_y + i * 3 + screen_height // 2
+        renderer.update_sprites(my_sprites)
+
+        # adjust camera according the keypresses
+        renderer_set_camera_position(cam_offset_x, cam_offset_y, screen_width, screen_height, 3)
+
+        # clear the screen and render the map
+        renderer_render(screen, layer_range)
+
+        # map objects
+        if draw_obj:
+            for obj_group in world_map.object_groups:
+                goffx = obj_group.x
+                goffy = obj_group.y
+                for map_obj in obj_group.objects:
+                    size = (map_obj.width, map_obj.height)
+                    if map_obj.image_source:
+                        surf = pygame.image.load(map_obj.image_source)
+                        surf = pygame.transform.scale(surf, size)
+                        screen.blit(surf, (goffx + map_obj.x - cam_offset_x, goffy + map_obj.y - cam_offset_y))
+                    else:
+                        r = pygame.Rect((goffx + map_obj.x - cam_offset_x, goffy + map_obj.y - cam_offset_y), size)
+                        pygame.draw.rect(screen, (255, 255, 0), r, 1)
+                        text_img = font.render(map_obj.name, 1, (255, 255, 0))
+                        screen.blit(text_img, r.move(1, 2))
+
+        if show_message:
+            screen.blit(message, (0,0))
+        for idx, line in enumerate(profile_lines):
+            screen.blit(line, (0, (idx + 1) * line.get_height()))
+
+        pygame_display_flip()
+
+#-------------------------------------------------------------------------------
+# TODO:
+ # - test if object gid is already read in and resolved
+
+
+#-------------------------------------------------------------------------------
+
+def demo_pyglet(file_name):
+    """Thanks to: HydroKirby from #pyglet on freenode.org
+
+    Loads and views a map using pyglet.
+
+    Holding the arrow keys will scroll along the map.
+    Holding the left shift key will make you scroll faster.
+    Pressing the escape key ends the application.
+
+    """
+
+    import pyglet
+    from pyglet.gl import glLoadIdentity
+    from tiledtmxloader.renderpyglet import RendererPyglet
+
+    world_map = TileMapParser().parse_decode(file_name)
+    # cam_offset is a list because it is changed by the update function,
+    # it is the top left of the view in map pixels, y pointing down
+    cam_offset = [0.0, 0.0]
+    frames_per_sec = 1.0 / 60.0
+    window = pyglet.window.Window(640, 480)
+
+    @window.event
+    def on_draw():
+        window.clear()
+        # Reset the "eye" back to the default location, the renderer moves it
+        # to the camera position.
+        glLoadIdentity()
+        renderer.draw()
+
+    keys = pyglet.window.key.KeyStateHandler()
+    window.push_handlers(keys)
+    image_loader = ImageLoaderPyglet()
+    world_map.load(image_loader)
+    # one texture for all tiles, so the batch does not switch textures
+    layout = image_loader.build_atlases(world_map)
+
+    # Only the chunks of tiles in view are built, they are created and
+    # deleted while the camera moves.
+    renderer = RendererPyglet(world_map, layout, image_loader.atlases)
+    renderer.set_camera_position(cam_offset[0], cam_offset[1], window.width, window.height)
+
+    def update(dt):
+        # The speed is 3 by default.
+        # When left Shift is held, the speed increases.
+        # The speed interpolates based on time passed, so the demo navigates
+        # at a reasonable pace even on huge maps.
+        speed = (3.0 + keys[pyglet.window.key.LSHIFT] * 6.0) * \
+                (dt / frames_per_sec)
+        if keys[pyglet.window.key.LEFT]:
+            cam_offset[0] -= speed
+        if keys[pyglet.window.key.RIGHT]:
+            cam_offset[0] += speed
+        if keys[pyglet.window.key.UP]:
+            cam_offset[1] -= speed
+        if keys[pyglet.window.key.DOWN]:
+            cam_offset[1] += speed
+        renderer.set_camera_position(cam_offset[0], cam_offset[1], window.width, window.height)
+
+    pyglet.clock.schedule_interval(update, frames_per_sec)
+    pyglet.app.run()
+
+
+#-------------------------------------------------------------------------------
+def main():
+
+    args = sys.argv[1:]
+    if len(args) != 2:
+        #print 'usage: python test.py mapfile.tmx [pygame|pyglet]'
+        print('usage: python -m tiledtmxloader your_map.tmx [pygame|pyglet]')
+        return
+
+    if args[1] == 'pygame':
+        demo_pygame(args[0])
+    elif args[1] == 'pyglet':
+        demo_pyglet(args[0])
+    else:
+        print 'missing framework, usage: python -m tiledtmxloader your_map.tmx [pygame|pyglet]'
+        sys.exit(-1)
@@ -0,0 +1,1036 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+u"""
+Renders a TileMap using pygame. pygame is only imported when a renderer is
+used, tiledtmxloader.RendererPygame is the RendererPygame of this module::
+
+    from tiledtmxloader import renderpygame
+    renderer = renderpygame.RendererPygame(world_map)
+
+"""
+
+__author__ = u'DR0ID_ @ 2009-2011'
+
+import time
+from bisect import bisect_left
+
+from tiledtmxloader import FLIP_HORIZONTAL, FLIP_VERTICAL, FLIP_DIAGONAL
+
+#-------------------------------------------------------------------------------
+def _flip_tile(info, flip, tileheight):
+    # returns the (offsetx, offsety, image) of a tile flipped like Tiled does:
+    # first diagonally (swapping x and y), then horizontally, then vertically
+    pygame = __import__('pygame')
+    offx, offy, img = info
+    if flip & FLIP_DIAGONAL:
+        img = pygame.transform.flip(pygame.transform.rotate(img, 90), False, True)
+        # the size changed, align the bottom with the tile again
+        offy = min(0, tileheight - img.get_height())
+    if flip & (FLIP_HORIZONTAL | FLIP_VERTICAL):
+        img = pygame.transform.flip(img, bool(flip & FLIP_HORIZONTAL), bool(flip & FLIP_VERTICAL))
+    return offx, offy, img
+
+def _get_num_bytes(surf):
+    # memory used by the pixels of a surface
+    return surf.get_bytesize() * surf.get_width() * surf.get_height()
+
+#-------------------------------------------------------------------------------
+
+class RendererPygame(object):
+
+# TODO: rename variables
+# TODO: paralax scrolling
+
+    class Sprite(object):
+        def __init__(self, image, rect, source_rect=None, flags=0):
+            self.image = image
+            self.rect = rect
+            self.source_rect = source_rect
+            self.flags = flags
+
+    class _Layer(object):
+        # Gives the (offx, offy, image) of the cells of a layer. At level 1 a
+        # cell is a tile and read directly from the map. At higher levels a
+        # cell merges level x level tiles into one surface. The merged surfaces
+        # are only built for the cells that are rendered and are freed when
+        # the level changes or, once they use more than max_bytes, when they
+        # are outside the view (see trim). For blitting the non empty cells of
+        # a row are kept as (image, x, offy) items, in parts of _PART_SIZE
+        # cells, at every level. The parts outside the view are freed once
+        # there are twice as many as visible.
+
+        _PART_SIZE = 32
+
+        def __init__(self, layer_id, world_map, flipped_tiles):
+            self._world_map = world_map
+            self._layer_id = layer_id
+            self._world_layer = world_map.layers[layer_id]
+            self._flipped_tiles = flipped_tiles # shared {(gid, flip): info}
+            # in tiles, infinite maps can have tiles at negative positions
+            self._bounds = self._world_layer.get_bounds() # xmin, ymin, xmax, ymax
+            self._cells = {} # {(xpos, ypos): info} merged cells of the current level
+            self._parts = {} # {(part_x, ypos): (columns, items)}
+            self._cells_bytes = 0 # used by the merged surfaces
+            self.max_bytes = 32 * 1024 * 1024
+            self.level = 1
+            self.collapse(1)
+
+        def collapse(self, level=1):
+            self.level = level
+            self.tilewidth = self._world_map.tilewidth * level
+            self.tileheight = self._world_map.tileheight * level
+            # the cells covering the tiles, the outer ones may be partly outside of the map
+            xmin, ymin, xmax, ymax = self._bounds
+            self.left = xmin // level
+            self.top = ymin // level
+            self.right = -(-xmax // level)
+            self.bottom = -(-ymax // level)
+            self._cells = {}
+            self._parts = {}
+            self._cells_bytes = 0
+
+        def get_cells(self, xmin, xmax, ypos):
+            # returns the infos (or None) of the cells xmin <= x < xmax of row ypos
+            if self.level == 1:
+                content2D = self._world_layer.content2D
+                if self._world_layer.flags is None and not self._world_layer.chunks:
+                    indexed_tiles = self._world_map.indexed_tiles
+                    return [indexed_tiles[gid] if gid else None for gid in \
+                                [content2D[xpos][ypos] for xpos in xrange(xmin, xmax)]]
+                return [self._get_tile(xpos, ypos) for xpos in xrange(xmin, xmax)]
+            cells = self._cells
+            row = []
+            for xpos in xrange(xmin, xmax):
+                info = cells.get((xpos, ypos), False)
+                if info is False:
+                    info = self._merge(xpos, ypos)
+                    cells[(xpos, ypos)] = info
+                    if info:
+                        self._cells_bytes += _get_num_bytes(info[2])
+                row.append(info)
+            return row
+
+        def get_blit_items(self, xmin, xmax, ypos):
+            # returns the (image, x, offy) of the non empty cells xmin <= x < xmax
+            # of row ypos, x is the pixel position relative to the layer
+            size = self._PART_SIZE
+            parts = self._parts
+            items = []
+            for part_x in xrange(xmin // size, (xmax - 1) // size + 1):
+                part = parts.get((part_x, ypos))
+                if part is None:
+                    part = self._build_part(part_x, ypos)
+                    parts[(part_x, ypos)] = part
+                columns, part_items = part
+                if xmin > columns[0] or xmax <= columns[-1]:
+                    part_items = part_items[bisect_left(columns, xmin):bisect_left(columns, xmax)]
+                items.extend(part_items)
+            return items
+
+        def _build_part(self, part_x, ypos):
+            xmin = max(part_x * self._PART_SIZE, self.left)
+            xmax = min(part_x * self._PART_SIZE + self._PART_SIZE, self.right)
+            tile_w = self.tilewidth
+            columns = []
+            items = []
+            for xpos, info in enumerate(self.get_cells(xmin, xmax, ypos), xmin):
+                if info:
+                    columns.append(xpos)
+                    items.append((info[2], xpos * tile_w + info[0], info[1]))
+            # keeps the column checks in get_blit_items simple
+            if not columns:
+                columns.append(xmin)
+            return columns, items
+
+        def drop_tile(self, xpos, ypos):
+            # forgets the merged cell containing the tile, after the tile changed
+            info = self._cells.pop((xpos // self.level, ypos // self.level), None)
+            if info:
+                self._cells_bytes -= _get_num_bytes(info[2])
+            self._parts.pop((xpos // self.level // self._PART_SIZE, ypos // self.level), None)
+
+        def trim(self, left, right, top, bottom):
+            # frees the parts outside the parts overlapping the visible cells
+            # left <= x < right, top <= y < bottom once there are twice as
+            # many as visible, and the cells too when the merged surfaces use
+            # more than max_bytes
+            size = self._PART_SIZE
+            part_left = left // size
+            part_right = (right - 1) // size + 1
+            num_visible = max(part_right - part_left, 1) * max(bottom - top, 1)
+            trim_cells = self._cells_bytes > self.max_bytes
+            if trim_cells or len(self._parts) > 2 * num_visible:
+                self._parts = dict(((part_x, ypos), part) for (part_x, ypos), part in self._parts.iteritems() \
+                                        if top <= ypos < bottom and part_left <= part_x < part_right)
+            if not trim_cells:
+                return
+            cells = {}
+            self._cells_bytes = 0
+            for (xpos, ypos), info in self._cells.iteritems():
+                if top <= ypos < bottom and part_left <= xpos // size < part_right:
+                    cells[(xpos, ypos)] = info
+                    if info:
+                        self._cells_bytes += _get_num_bytes(info[2])
+            self._cells = cells
+
+        def _get_tile(self, xpos, ypos):
+            gid = self._world_layer.content2D[xpos][ypos]
+            if not gid:
+                return None
+            return self._get_info(gid, self._world_layer.get_flags(xpos, ypos))
+
+        def _merge(self, xpos, ypos):
+            pygame = __import__('pygame')
+            level = self.level
+            tile_w = self._world_map.tilewidth
+            tile_h = self._world_map.tileheight
+            xmin, ymin, xmax, ymax = self._bounds
+            tiles = []
+            minx = 0
+            miny = 0
+            maxx = self.tilewidth
+            maxy = self.tileheight
+            for y in xrange(level):
+                orig_y = ypos * level + y
+                if not ymin <= orig_y < ymax:
+                    continue
+                for x in xrange(level):
+                    orig_x = xpos * level + x
+                    if not xmin <= orig_x < xmax:
+                        continue
+                    info = self._get_tile(orig_x, orig_y)
+                    if info:
+                        offx, offy, img = info
+                        posx = x * tile_w + offx
+                        posy = y * tile_h + offy
+                        minx = min(minx, posx)
+                        miny = min(miny, posy)
+                        maxx = max(maxx, posx + img.get_width())
+                        maxy = max(maxy, posy + img.get_height())
+                        tiles.append((img, posx, posy))
+            if not tiles:
+                return None
+            surf = pygame.Surface((maxx - minx, maxy - miny), pygame.SRCALPHA, 32)
+            if pygame.display.get_surface() is not None:
+                surf = surf.convert_alpha()
+            surf.fill((0, 0, 0, 0))
+            for img, posx, posy in tiles:
+                surf.blit(img, (posx - minx, posy - miny))
+            return minx, miny, surf
+
+        def _get_info(self, gid, flip):
+            # flipped variants are created once on first use
+            info = self._world_map.indexed_tiles[gid]
+            if flip:
+                key = (gid, flip)
+                flipped = self._flipped_tiles.get(key)
+                if flipped is None:
+                    flipped = _flip_tile(info, flip, self._world_map.tileheight)
+                    self._flipped_tiles[key] = flipped
+                info = flipped
+            return info
+
+    def __init__(self, world_map):
+        self._world_map = world_map
+        self._cam_offset_x = 0
+        self._cam_offset_y = 0
+        self._cam_width = 10
+        self._cam_height = 10
+        self._margin = (0, 0, 0, 0) # in tiles: left, top, right, bottom
+        self._visible_x_range = []
+        self._visible_y_range = []
+        self._layers = []
+        self._flipped_tiles = {} # {(gid, flip): (offsetx, offsety, image)}
+        for idx, layer in enumerate(world_map.layers):
+            self._layers.append(self._Layer(idx, world_map, self._flipped_tiles))
+
+        self._layer_sprites = {} # {layer_id:[sprites]}
+        # the sprites of a layer by the map row they stand in, moved sprites
+        # are put into their new row before a layer is rendered
+        self._sprite_rows = {} # {layer_id: {row: [sprites]}}
+        self._sprite_row_of = {} # {(layer_id, id(sprite)): row}
+        self._sprite_height = 0 # highest sprite rect, for sprites reaching up into the view
+
+        # pre-rendered blocks of tiles, see set_chunk_cache
+        self._chunk_size = 0 # in tiles, 0 renders tile by tile
+        self._chunk_cache = None # OrderedDict {(layer_id, cx, cy): (offx, offy, surface, bytes)}, least recently used first
+        self._chunk_cache_bytes = 0
+        self._chunk_cache_max_bytes = 0
+
+        # composited blocks of static layer groups, see set_static_layers
+        self._static_groups = {} # {first layer_id: last layer_id}
+        self._static_chunk_size = 16
+        self._static_cache = None # OrderedDict {(first, visible, cx, cy): (surface, bytes)}, least recently used first
+        self._static_cache_bytes = 0
+        self._static_cache_max_bytes = 0
+
+        # persistent back buffer, see set_scroll_mode
+        self._scroll_mode = False
+        self._back_buffer = None
+        self._back_buffer_state = None # what the buffer shows: (cam x, cam y, layers...)
+        self._dirty_rects = [] # in world pixels
+        self._sprite_areas = {} # {id(sprite): area drawn last frame, in world pixels}
+        self._tile_reach = None # pixels the tile images reach out of their tile: left, up, right, down
+        self._sprite_reach = 0 # pixels the sprite images reach below their rect.y
+
+        # counters of the last frame, see enable_profiling
+        self._profile = None # {layer_id: {name: value}}
+
+    def set_scroll_mode(self, enabled=True):
+        u"""
+        In scroll mode render() keeps the last frame in a back buffer. When the
+        camera moves, the buffer is scrolled by the camera movement and only
+        the uncovered strips, the areas of moved, added or removed sprites and
+        the areas passed to mark_dirty() are rendered again. Big camera jumps,
+        changed layers and set_tile() redraw the whole buffer.
+        """
+        self._scroll_mode = enabled
+        self._back_buffer = None
+        self._back_buffer_state = None
+        self._dirty_rects = []
+        self._sprite_areas = {}
+        self._tile_reach = None
+
+    def get_scroll_mode(self):
+        return self._scroll_mode
+
+    def mark_dirty(self, rect):
+        u"""
+        Marks an area of the map (in world pixels) to be rendered again in
+        scroll mode, e.g. where an animated sprite changed its image.
+        """
+        if self._scroll_mode:
+            self._dirty_rects.append(__import__('pygame').Rect(rect))
+
+    def enable_profiling(self, enabled=True):
+        u"""
+        Measures each rendered layer, see get_profile. Disabled it costs a
+        single check per layer.
+        """
+        self._profile = {} if enabled else None
+
+    def get_profile(self):
+        u"""
+        Returns the measurements of the last render() call (render_layer calls
+        in between add to them) as {layer_id: {name: value}} with the names:
+
+            - 'time': seconds spent rendering the layer
+            - 'tiles': tiles, merged cells or blocks blitted
+            - 'sprites': sprites blitted
+            - 'cache_hits', 'cache_misses': blocks found in or added to the
+              chunk cache or the static group cache
+            - 'level': the collapse level, 1 for static groups
+            - 'last': the last layer_id of a static group rendered as one,
+              else the layer_id itself
+
+        Returns None if profiling is disabled.
+        """
+        if self._profile is None:
+            return None
+        return dict((layer_id, dict(stats)) for layer_id, stats in self._profile.items())
+
+    def _add_profile(self, layer_id, last, duration, counts):
+        tiles, sprites, cache_hits, cache_misses = counts
+        stats = self._profile.get(layer_id)
+        if stats is None:
+            stats = {'time': 0.0, 'tiles': 0, 'sprites': 0, 'cache_hits': 0, 'cache_misses': 0}
+            self._profile[layer_id] = stats
+        stats['time'] += duration
+        stats['tiles'] += tiles
+        stats['sprites'] += sprites
+        stats['cache_hits'] += cache_hits
+        stats['cache_misses'] += cache_misses
+        # static groups are composited from the tiles
+        stats['level'] = self._layers[layer_id].level if last == layer_id else 1
+        stats['last'] = last
+
+    def set_chunk_cache(self, chunk_size=16, max_bytes=32 * 1024 * 1024):
+        u"""
+        Renders the layers in blocks of chunk_size x chunk_size tiles. Each block
+        is drawn once into a cached surface, a frame only blits the visible blocks.
+        The least recently used blocks are dropped when the cached surfaces use
+        more than max_bytes. Layers containing sprites are still rendered tile
+        by tile. A chunk_size of 0 renders tile by tile and frees the cache.
+        """
+        from collections import OrderedDict
+        self._chunk_size = chunk_size
+        self._chunk_cache_max_bytes = max_bytes
+        self._chunk_cache = OrderedDict() if chunk_size else None
+        self._chunk_cache_bytes = 0
+
+    def get_chunk_size(self):
+        return self._chunk_size
+
+    def set_static_layers(self, first, last, chunk_size=16, max_bytes=32 * 1024 * 1024):
+        u"""
+        Declares the layers first to last (both included) as a static group.
+        When render() renders all layers of the group in a row and none of them
+        holds sprites, the group is drawn from blocks of chunk_size x chunk_size
+        tiles, each composited once from the visible layers of the group, so a
+        frame blits the group like a single layer. Changing the visibility of
+        a layer or set_tile() recomposites the affected blocks. chunk_size and
+        max_bytes (see set_chunk_cache) are shared by all groups.
+        """
+        from collections import OrderedDict
+        if not 0 <= first <= last < len(self._world_map.layers):
+            raise Exception(u'invalid static layers %s to %s' % (first, last))
+        for group_first, group_last in self._static_groups.items():
+            if first <= group_last and group_first <= last:
+                raise Exception(u'static layers %s to %s overlap the group %s to %s' % \
+                                                (first, last, group_first, group_last))
+        self._static_groups[first] = last
+        self._static_chunk_size = chunk_size
+        self._static_cache_max_bytes = max_bytes
+        self._static_cache = OrderedDict()
+        self._static_cache_bytes = 0
+        self._back_buffer_state = None
+
+    def clear_static_layers(self):
+        u"""
+        Removes all static groups and frees their blocks.
+        """
+        self._static_groups = {}
+        self._static_cache = None
+        self._static_cache_bytes = 0
+        self._back_buffer_state = None
+
+    def get_static_layers(self):
+        u"""
+        Returns the static groups as sorted list of (first, last) layer ids.
+        """
+        return sorted(self._static_groups.items())
+
+    def invalidate(self, layer_id=None):
+        u"""
+        Drops the cached blocks of a layer or, if layer_id is None, of all layers.
+        Needed after changing the tiles of the map without using set_tile.
+        """
+        for layer in self._layers:
+            if layer_id is None or layer._layer_id == layer_id:
+                layer.collapse(layer.level)
+        if self._chunk_cache:
+            for key in self._chunk_cache.keys():
+                if layer_id is None or key[0] == layer_id:
+                    self._chunk_cache_bytes -= self._chunk_cache.pop(key)[3]
+        if self._static_cache:
+            for key in self._static_cache.keys():
+                if layer_id is None or key[0] <= layer_id <= self._static_groups[key[0]]:
+                    self._static_cache_bytes -= self._static_cache.pop(key)[1]
+        self._back_buffer_state = None
+        self._tile_reach = None
+
+    def set_tile(self, layer_id, xpos, ypos, gid, flags=0):
+        u"""
+        Changes a tile of the map (see TileLayer.set_gid) and updates the renderer.
+        """
+        self._world_map.layers[layer_id].set_gid(xpos, ypos, gid, flags)
+        layer = self._layers[layer_id]
+        layer.drop_tile(xpos, ypos)
+        if self._chunk_cache:
+            key = (layer_id, xpos // layer.level // self._chunk_size, ypos // layer.level // self._chunk_size)
+            if key in self._chunk_cache:
+                self._chunk_cache_bytes -= self._chunk_cache.pop(key)[3]
+        if self._static_cache:
+            self._drop_static_blocks(layer_id, xpos, ypos)
+        self._back_buffer_state = None
+
+    def _drop_static_blocks(self, layer_id, xpos, ypos):
+        # drops the blocks of the static group of the layer that the tile
+        # at xpos, ypos can reach into
+        for first, last in self._static_groups.items():
+            if first <= layer_id <= last:
+                break
+        else:
+            return
+        if self._tile_reach is None:
+            self._tile_reach = self._get_tile_reach()
+        reach_left, reach_up, reach_right, reach_down = self._tile_reach
+        world_layer = self._world_map.layers[layer_id]
+        block_w = self._static_chunk_size * self._world_map.tilewidth
+        block_h = self._static_chunk_size * self._world_map.tileheight
+        posx = (xpos + world_layer.x) * self._world_map.tilewidth
+        posy = (ypos + world_layer.y) * self._world_map.tileheight
+        for cy in xrange((posy - reach_up) // block_h, (posy + self._world_map.tileheight + reach_down - 1) // block_h + 1):
+            for cx in xrange((posx - reach_left) // block_w, (posx + self._world_map.tilewidth + reach_right - 1) // block_w + 1):
+                for key in self._static_cache.keys():
+                    if key[0] == first and key[2] == cx and key[3] == cy:
+                        self._static_cache_bytes -= self._static_cache.pop(key)[1]
+
+    def add_sprite(self, layer_id, sprite):
+        u"""
+        Adds a sprite to a layer. The sprite is drawn before the tiles of the
+        row containing sprite.rect.y (its feet), above its rect. Moving the
+        sprite by changing its rect is enough, the row is updated when the
+        layer is rendered.
+        """
+        if layer_id not in self._layer_sprites:
+            self._layer_sprites[layer_id] = []
+        self._layer_sprites[layer_id].append(sprite)
+        row = self._get_sprite_row(sprite)
+        self._sprite_rows.setdefault(layer_id, {}).setdefault(row, []).append(sprite)
+        self._sprite_row_of[(layer_id, id(sprite))] = row
+        self._sprite_height = max(self._sprite_height, sprite.rect.height)
+
+    def add_sprites(self, layer_id, sprites):
+        for sprite in sprites:
+            self.add_sprite(layer_id, sprite)
+
+    def remove_sprite(self, layer_id, sprite):
+        sprites = self._layer_sprites.get(layer_id)
+        if sprites is not None and sprite in sprites:
+            sprites.remove(sprite)
+            if len(sprites) == 0:
+                del self._layer_sprites[layer_id]
+            key = (layer_id, id(sprite))
+            row = self._sprite_row_of.get(key)
+            if row is not None:
+                self._remove_from_row(layer_id, sprite, row)
+            # a sprite added more than once keeps its row until the last one is removed
+            if sprite not in sprites:
+                self._sprite_row_of.pop(key, None)
+
+    def remove_sprites(self, layer_id, sprites):
+        for sprite in sprites:
+            self.remove_sprite(layer_id, sprite)
+
+    def update_sprite(self, sprite):
+        u"""
+        Updates the row of a sprite after its rect changed, in all its layers.
+        Not needed, rendering a layer updates the rows of its moved sprites.
+        """
+        row = self._get_sprite_row(sprite)
+        self._sprite_height = max(self._sprite_height, sprite.rect.height)
+        for layer_id in self._layer_sprites:
+            old_row = self._sprite_row_of.get((layer_id, id(sprite)))
+            if old_row is not None and old_row != row:
+                self._move_sprite(layer_id, sprite, old_row, row)
+
+    def update_sprites(self, sprites):
+        for sprite in sprites:
+            self.update_sprite(sprite)
+
+    def _get_sprite_row(self, sprite):
+        # the row whose bottom edge is the first at or below sprite.rect.y
+        return (sprite.rect.y - 1) // self._world_map.tileheight
+
+    def _update_sprite_rows(self, layer_id, sprites):
+        # puts the sprites of a layer that moved since the last frame into
+        # their new row
+        row_of = self._sprite_row_of
+        tile_h = self._world_map.tileheight
+        for sprite in sprites:
+            rect = sprite.rect
+            row = (rect.y - 1) // tile_h
+            old_row = row_of[(layer_id, id(sprite))]
+            if old_row != row:
+                self._move_sprite(layer_id, sprite, old_row, row)
+            if rect.height > self._sprite_height:
+                self._sprite_height = rect.height
+
+    def _move_sprite(self, layer_id, sprite, old_row, row):
+        count = self._remove_from_row(layer_id, sprite, old_row, True)
+        self._sprite_rows.setdefault(layer_id, {}).setdefault(row, []).extend([sprite] * count)
+        self._sprite_row_of[(layer_id, id(sprite))] = row
+
+    def _remove_from_row(self, layer_id, sprite, row, all_copies=False):
+        # removes the sprite (added more than once: one or all of its copies)
+        # from the bucket of the row, returns the number removed
+        rows = self._sprite_rows.get(layer_id)
+        if not rows or sprite not in rows.get(row, ()):
+            return 0
+        count = 1
+        if all_copies:
+            count = rows[row].count(sprite)
+        for idx in xrange(count):
+            rows[row].remove(sprite)
+        if not rows[row]:
+            del rows[row]
+            if not rows:
+                del self._sprite_rows[layer_id]
+        return count
+
+    def contains_sprite(self, layer_id, sprite):
+        sprites = self._layer_sprites.get(layer_id)
+        if sprites is not None:
+            return (sprite in sprites)
+
+    def set_camera_position(self, offset_x, offset_y, width, height, margin=0):
+        u"""
+        Moves the view, margin is the number of extra cells rendered around
+        it. Tiles bigger than a cell reaching into the view are rendered
+        without a margin.
+        """
+        self._cam_offset_x = int(offset_x)
+        self._cam_offset_y = int(offset_y)
+        self._cam_width = width
+        self._cam_height = height
+        self._margin = (margin, margin, margin, margin)
+        self._release_chunks(margin)
+
+    def _release_chunks(self, margin):
+        # frees the decoded chunks of infinite maps that are far from the view,
+        # one chunk around the view and its margin stays decoded so moving
+        # back and forth does not decode the same chunks again and again
+        if self._tile_reach is None:
+            self._tile_reach = self._get_tile_reach()
+        reach_left, reach_up, reach_right, reach_down = self._tile_reach
+        tile_w = self._world_map.tilewidth
+        tile_h = self._world_map.tileheight
+        for layer, world_layer in zip(self._layers, self._world_map.layers):
+            if not world_layer.chunks:
+                continue
+            keep_x = margin * layer.level + -(-max(reach_left, reach_right) // tile_w) + world_layer.chunks[0].width
+            keep_y = margin * layer.level + -(-max(reach_up, reach_down) // tile_h) + world_layer.chunks[0].height
+            world_layer.release_chunks_outside(
+                    self._cam_offset_x // tile_w - world_layer.x - keep_x,
+                    self._cam_offset_y // tile_h - world_layer.y - keep_y,
+                    -(-(self._cam_offset_x + self._cam_width) // tile_w) - world_layer.x + keep_x,
+                    -(-(self._cam_offset_y + self._cam_height) // tile_h) - world_layer.y + keep_y)
+
+    def get_collapse_level(self, layer_id):
+        return self._layers[layer_id].level
+
+    def set_collapse_level(self, layer_id, level, max_bytes=32 * 1024 * 1024):
+        u"""
+        Renders the layer in cells of level x level tiles, each merged into
+        one surface when it is first rendered. When the merged surfaces use
+        more than max_bytes, the ones outside the view are freed.
+        """
+        level = max(1, level)
+        self._layers[layer_id].max_bytes = max_bytes
+        self._layers[layer_id].collapse(level)
+        self.invalidate(layer_id)
+
+    def render(self, surf, layer_ids=None, background=(0, 0, 0)):
+        u"""
+        Renders the layers (all if layer_ids is None) at the camera position
+        onto surf, filling it with the background color first.
+        See set_scroll_mode for reusing the last frame.
+        """
+        if layer_ids is None:
+            layer_ids = range(len(self._world_map.layers))
+        if self._profile is not None:
+            self._profile = {}
+        if not self._scroll_mode:
+            surf.fill(background, (0, 0, self._cam_width, self._cam_height))
+            self._render_layers(surf, layer_ids)
+            return
+
+        pygame = __import__('pygame')
+        cam_x = self._cam_offset_x
+        cam_y = self._cam_offset_y
+        width = self._cam_width
+        height = self._cam_height
+        layers_state = (width, height, tuple(layer_ids), background, \
+                        tuple(self._world_map.layers[layer_id].visible for layer_id in layer_ids))
+        self._update_sprite_areas(layer_ids)
+        buffer = self._back_buffer
+        if buffer is None or buffer.get_size() != (width, height):
+            buffer = pygame.Surface((width, height), 0, surf)
+            self._back_buffer = buffer
+            self._back_buffer_state = None
+        buffer_rect = buffer.get_rect()
+
+        state = self._back_buffer_state
+        if state is None or state[2:] != layers_state:
+            rects = [buffer_rect]
+        else:
+            dx = cam_x - state[0]
+            dy = cam_y - state[1]
+            # redrawing everything is cheaper when most of it is uncovered
+            if abs(dx) * height + abs(dy) * width >= width * height // 2:
+                rects = [buffer_rect]
+            else:
+                rects = []
+                if dx or dy:
+                    buffer.scroll(-dx, -dy)
+                    if dx > 0:
+                        rects.append(pygame.Rect(width - dx, 0, dx, height))
+                    elif dx < 0:
+                        rects.append(pygame.Rect(0, 0, -dx, height))
+                    if dy > 0:
+                        rects.append(pygame.Rect(0, height - dy, width, dy))
+                    elif dy < 0:
+                        rects.append(pygame.Rect(0, 0, width, -dy))
+                for rect in self._dirty_rects:
+                    rects.append(rect.move(-cam_x, -cam_y).clip(buffer_rect))
+        self._dirty_rects = []
+
+        for rect in rects:
+            if rect.width > 0 and rect.height > 0:
+                self._render_area(buffer.subsurface(rect), rect, layer_ids, background)
+        self._back_buffer_state = (cam_x, cam_y) + layers_state
+        surf.blit(buffer, (0, 0))
+
+    def _render_layers(self, surf, layer_ids):
+        # renders the layers one by one, except the static groups that are
+        # rendered completely and without sprites
+        layer_ids = list(layer_ids)
+        idx = 0
+        while idx < len(layer_ids):
+            first = layer_ids[idx]
+            last = self._static_groups.get(first)
+            if last is not None and layer_ids[idx:idx + last - first + 1] == range(first, last + 1) and \
+                    not any(self._layer_sprites.get(layer_id) for layer_id in xrange(first, last + 1)):
+                if self._profile is None:
+                    self._render_static(surf, first, last)
+                else:
+                    start = time.time()
+                    counts = self._render_static(surf, first, last)
+                    self._add_profile(first, last, time.time() - start, counts)
+                idx += last - first + 1
+            else:
+                self.render_layer(surf, first)
+                idx += 1
+
+    def _render_area(self, target, rect, layer_ids, background):
+        # renders the part rect of the camera view onto target, by moving
+        # the camera to that part, the margin only needs to cover the sprites
+        # reaching into the area from outside (render_layer adds the tiles)
+        tile_h = self._world_map.tileheight
+        cam = self._cam_offset_x, self._cam_offset_y, self._cam_width, self._cam_height, self._margin
+        self._cam_offset_x += rect.x
+        self._cam_offset_y += rect.y
+        self._cam_width = rect.width
+        self._cam_height = rect.height
+        # a sprite standing in a row above the area reaches down into it
+        self._margin = (0, -(-self._sprite_reach // tile_h), 0, 0)
+        try:
+            target.fill(background)
+            self._render_layers(target, layer_ids)
+        finally:
+            self._cam_offset_x, self._cam_offset_y, self._cam_width, self._cam_height, self._margin = cam
+
+    def _get_tile_reach(self):
+        tile_w = self._world_map.tilewidth
+        tile_h = self._world_map.tileheight
+        reach = [0, 0, 0, 0]
+        for offx, offy, img in self._world_map.indexed_tiles.values():
+            # flipped diagonally the width and height are swapped
+            size = max(img.get_size())
+            reach = map(max, reach, (-offx, -offy, offx + size - tile_w, offy + size - tile_h))
+        return reach
+
+    def _update_sprite_areas(self, layer_ids):
+        # marks the old and new areas of sprites that moved, appeared or were
+        # removed since the last frame as dirty
+        pygame = __import__('pygame')
+        areas = {}
+        old_areas = self._sprite_areas
+        reach = 0
+        for layer_id in layer_ids:
+            for sprite in self._layer_sprites.get(layer_id, ()):
+                if sprite.source_rect:
+                    size = sprite.source_rect.size
+                else:
+                    size = sprite.image.get_size()
+                # sprites are drawn above their rect, see render_layer
+                area = pygame.Rect((sprite.rect.x, sprite.rect.y - sprite.rect.height), size)
+                areas[id(sprite)] = area
+                reach = max(reach, area.height - sprite.rect.height)
+                old_area = old_areas.pop(id(sprite), None)
+                if old_area != area:
+                    self._dirty_rects.append(area)
+                    if old_area is not None:
+                        self._dirty_rects.append(old_area)
+        # the remaining ones are gone
+        self._dirty_rects.extend(old_areas.values())
+        self._sprite_areas = areas
+        self._sprite_reach = reach
+
+    def render_layer(self, surf, layer_id, surf_blit=None, sort_key=lambda spr: spr.rect.y):
+        u"""
+        Renders a layer and its sprites at the camera position onto surf,
+        row by row, the sprites of a row sorted by sort_key. Sprites that
+        moved since the last frame are put into their new row first.
+        surf_blit, if given, is called for each tile and sprite instead of
+        blitting them at once.
+        """
+        if self._profile is None:
+            self._render_layer(surf, layer_id, surf_blit, sort_key)
+        else:
+            start = time.time()
+            counts = self._render_layer(surf, layer_id, surf_blit, sort_key)
+            self._add_profile(layer_id, layer_id, time.time() - start, counts)
+
+    def _render_layer(self, surf, layer_id, surf_blit, sort_key):
+        # returns the number of tiles and sprites blitted and the cache hits and misses
+        world_layer = self._world_map.layers[layer_id]
+        if world_layer.visible:
+
+            # sprites, only the rows that are rendered are looked at
+            sprites = self._layer_sprites.get(layer_id)
+            sprite_rows = None
+            if sprites:
+                self._update_sprite_rows(layer_id, sprites)
+                sprite_rows = self._sprite_rows.get(layer_id)
+
+            layer = self._layers[layer_id]
+            level = layer.level
+
+            tile_w = layer.tilewidth
+            tile_h = layer.tileheight
+            self._cam_offset_x += world_layer.x
+            self._cam_offset_y += world_layer.y
+            margin_left, margin_top, margin_right, margin_bottom = self._margin
+            # tiles bigger than a cell reach into the view from the cells around it
+            if self._tile_reach is None:
+                self._tile_reach = self._get_tile_reach()
+            reach_left, reach_up, reach_right, reach_down = self._tile_reach
+            left = self._cam_offset_x // tile_w - margin_left - -(-reach_right // tile_w)
+            right = -(-(self._cam_offset_x + self._cam_width) // tile_w) + margin_right + -(-reach_left // tile_w)
+            top = self._cam_offset_y // tile_h - margin_top - -(-reach_down // tile_h)
+            bottom = -(-(self._cam_offset_y + self._cam_height) // tile_h) + margin_bottom + -(-reach_up // tile_h)
+            left = max(left, layer.left)
+            right = min(right, layer.right)
+            top = max(top, layer.top)
+            bottom = min(bottom, layer.bottom)
+            layer.trim(left, right, top, bottom)
+            self._visible_x_range = range(left, right)
+            self._visible_y_range = range(top, bottom)
+
+            # optimizations
+            if self._chunk_size and not sprites:
+                if surf_blit is None:
+                    surf_blit = surf.blit
+                return self._render_chunks(surf_blit, layer_id, layer, world_layer, left, right, top, bottom)
+            layer_get_blit_items = layer.get_blit_items
+            # self__world_map_indexed_tiles = self._world_map.indexed_tiles
+            self__world_map_tilewidth = layer.tilewidth
+            self__world_map_tileheight = layer.tileheight
+            self__cam_offset_x = self._cam_offset_x
+            self__cam_offset_y = self._cam_offset_y
+            # the blits of the layer are collected in drawing order and
+            # submitted at once, see the end of this method
+            blit_seq = []
+            blit_seq_extend = blit_seq.extend
+            num_sprites = 0
+            # the cells have their x relative to the layer
+            screen_layer_x = world_layer.x * self__world_map_tilewidth - self__cam_offset_x
+
+            # render
+            for ypos in self._visible_y_range:
+                screen_tile_y =(ypos + world_layer.y) * self__world_map_tileheight - self__cam_offset_y
+                # draw sprites standing in this row
+                if sprite_rows:
+                    row_sprites = self._get_row_sprites(sprite_rows, (ypos + world_layer.y) * level, level, sort_key)
+                    num_sprites += len(row_sprites)
+                    blit_seq_extend([(sprite.image, sprite.rect.move(-self__cam_offset_x, -self__cam_offset_y - sprite.rect.height), sprite.source_rect, sprite.flags) \
+                                        for sprite in row_sprites])
+                # next line of the map
+                if left < right:
+                    blit_seq_extend([(img, (screen_layer_x + x, screen_tile_y + offy)) \
+                                        for img, x, offy in layer_get_blit_items(left, right, ypos)])
+            # sprites standing below the last row but reaching up into the view
+            if sprite_rows:
+                num_rows = -(-self._sprite_height // self._world_map.tileheight)
+                for sprite in self._get_row_sprites(sprite_rows, (bottom + world_layer.y) * level, num_rows, sort_key):
+                    if sprite.rect.y - sprite.rect.height - self__cam_offset_y < self._cam_height:
+                        num_sprites += 1
+                        blit_seq.append((sprite.image, sprite.rect.move(-self__cam_offset_x, -self__cam_offset_y - sprite.rect.height), sprite.source_rect, sprite.flags))
+
+            # one call into pygame instead of one per tile, Surface.blits
+            # is missing before pygame 1.9.4
+            if surf_blit is None and hasattr(surf, 'blits'):
+                surf.blits(blit_seq, False)
+            else:
+                if surf_blit is None:
+                    surf_blit = surf.blit
+                for args in blit_seq:
+                    surf_blit(*args)
+            return len(blit_seq) - num_sprites, num_sprites, 0, 0
+        return 0, 0, 0, 0
+
+    def _get_row_sprites(self, sprite_rows, first_row, num_rows, sort_key):
+        # the sprites standing in the map rows first_row <= row < first_row + num_rows
+        if num_rows == 1:
+            row = sprite_rows.get(first_row)
+            if not row:
+                return ()
+        else:
+            row = []
+            for row_idx in xrange(first_row, first_row + num_rows):
+                row.extend(sprite_rows.get(row_idx, ()))
+        if sort_key and len(row) > 1:
+            row.sort(key=sort_key)
+        return row
+
+    def _render_chunks(self, surf_blit, layer_id, layer, world_layer, left, right, top, bottom):
+        # returns the counts like _render_layer
+        if left >= right or top >= bottom:
+            return 0, 0, 0, 0
+        size = self._chunk_size
+        cache = self._chunk_cache
+        tile_w = layer.tilewidth
+        tile_h = layer.tileheight
+        used = 0
+        misses = 0
+        blitted = 0
+        for chunk_y in xrange(top // size, (bottom - 1) // size + 1):
+            screen_y = (chunk_y * size + world_layer.y) * tile_h - self._cam_offset_y
+            for chunk_x in xrange(left // size, (right - 1) // size + 1):
+                key = (layer_id, chunk_x, chunk_y)
+                # re-insert to mark it as most recently used
+                chunk = cache.pop(key, None)
+                if chunk is None:
+                    chunk = self._build_chunk(layer, chunk_x, chunk_y)
+                    self._chunk_cache_bytes += chunk[3]
+                    misses += 1
+                cache[key] = chunk
+                used += 1
+                offx, offy, chunk_surf, num_bytes = chunk
+                if chunk_surf is not None:
+                    blitted += 1
+                    surf_blit(chunk_surf, ((chunk_x * size + world_layer.x) * tile_w - self._cam_offset_x + offx, screen_y + offy))
+        # drop the least recently used chunks, but not the visible ones
+        while self._chunk_cache_bytes > self._chunk_cache_max_bytes and len(cache) > used:
+            self._chunk_cache_bytes -= cache.popitem(False)[1][3]
+        return blitted, 0, used - misses, misses
+
+    def _render_static(self, surf, first, last):
+        # returns the counts like _render_layer
+        visible = tuple(self._world_map.layers[layer_id].visible for layer_id in xrange(first, last + 1))
+        if not any(visible):
+            return 0, 0, 0, 0
+        size = self._static_chunk_size
+        cache = self._static_cache
+        block_w = size * self._world_map.tilewidth
+        block_h = size * self._world_map.tileheight
+        cam_x = self._cam_offset_x
+        cam_y = self._cam_offset_y
+        xmin, ymin, xmax, ymax = self._get_static_bounds(first)
+        if self._tile_reach is None:
+            self._tile_reach = self._get_tile_reach()
+        reach_left, reach_up, reach_right, reach_down = self._tile_reach
+        # the blocks contain the parts of the tiles reaching in from outside,
+        # so only the blocks overlapping the view are needed, but the tiles
+        # at the border of the map reach into the blocks around it
+        left = max(cam_x // block_w, (xmin * self._world_map.tilewidth - reach_left) // block_w)
+        right = min(-(-(cam_x + self._cam_width) // block_w), \
+                    -(-(xmax * self._world_map.tilewidth + reach_right) // block_w))
+        top = max(cam_y // block_h, (ymin * self._world_map.tileheight - reach_up) // block_h)
+        bottom = min(-(-(cam_y + self._cam_height) // block_h), \
+                     -(-(ymax * self._world_map.tileheight + reach_down) // block_h))
+        used = 0
+        misses = 0
+        blitted = 0
+        for chunk_y in xrange(top, bottom):
+            for chunk_x in xrange(left, right):
+                key = (first, visible, chunk_x, chunk_y)
+                # re-insert to mark it as most recently used
+                block = cache.pop(key, None)
+                if block is None:
+                    block = self._build_static_block(first, visible, chunk_x, chunk_y)
+                    self._static_cache_bytes += block[1]
+                    misses += 1
+                cache[key] = block
+                used += 1
+                if block[0] is not None:
+                    blitted += 1
+                    surf.blit(block[0], (chunk_x * block_w - cam_x, chunk_y * block_h - cam_y))
+        # drop the least recently used blocks, but not the visible ones
+        while self._static_cache_bytes > self._static_cache_max_bytes and len(cache) > used:
+            self._static_cache_bytes -= cache.popitem(False)[1][1]
+        return blitted, 0, used - misses, misses
+
+    def _get_static_bounds(self, first):
+        # the region in tiles covered by the layers of a static group, as
+        # xmin, ymin, xmax, ymax in map tiles
+        bounds = []
+        for layer_id in xrange(first, self._static_groups[first] + 1):
+            world_layer = self._world_map.layers[layer_id]
+            xmin, ymin, xmax, ymax = self._layers[layer_id]._bounds
+            bounds.append((xmin + world_layer.x, ymin + world_layer.y, xmax + world_layer.x, ymax + world_layer.y))
+        return min(b[0] for b in bounds), min(b[1] for b in bounds), max(b[2] for b in bounds), max(b[3] for b in bounds)
+
+    def _build_static_block(self, first, visible, chunk_x, chunk_y):
+        # composites the visible layers of a static group into a surface of
+        # exactly the block size, the tiles of the neighbouring blocks reaching
+        # into the block are drawn clipped, so the blocks never overlap. The
+        # blocks around the map hold the parts of the tiles reaching out of it
+        pygame = __import__('pygame')
+        if self._tile_reach is None:
+            self._tile_reach = self._get_tile_reach()
+        reach_left, reach_up, reach_right, reach_down = self._tile_reach
+        size = self._static_chunk_size
+        tile_w = self._world_map.tilewidth
+        tile_h = self._world_map.tileheight
+        xmin = chunk_x * size
+        ymin = chunk_y * size
+        xmax = xmin + size
+        ymax = ymin + size
+        tiles = []
+        for layer_id, layer_visible in enumerate(visible, first):
+            if not layer_visible:
+                continue
+            world_layer = self._world_map.layers[layer_id]
+            get_tile = self._layers[layer_id]._get_tile
+            layer_xmin, layer_ymin, layer_xmax, layer_ymax = self._layers[layer_id]._bounds
+            # in the cells of the layer, same order as when rendering tile by tile
+            for ypos in xrange(max(ymin - world_layer.y - -(-reach_down // tile_h), layer_ymin), \
+                               min(ymax - world_layer.y + -(-reach_up // tile_h), layer_ymax)):
+                for xpos in xrange(max(xmin - world_layer.x - -(-reach_right // tile_w), layer_xmin), \
+                                   min(xmax - world_layer.x + -(-reach_left // tile_w), layer_xmax)):
+                    info = get_tile(xpos, ypos)
+                    if info:
+                        offx, offy, img = info
+                        tiles.append((img, ((xpos + world_layer.x - xmin) * tile_w + offx, \
+                                            (ypos + world_layer.y - ymin) * tile_h + offy)))
+        if not tiles:
+            return None, 0
+        block = pygame.Surface(((xmax - xmin) * tile_w, (ymax - ymin) * tile_h), pygame.SRCALPHA, 32)
+        if pygame.display.get_surface() is not None:
+            block = block.convert_alpha()
+        block.fill((0, 0, 0, 0))
+        for img, pos in tiles:
+            block.blit(img, pos)
+        return block, _get_num_bytes(block)
+
+    def _build_chunk(self, layer, chunk_x, chunk_y):
+        # renders the tiles of a chunk into one surface, the surface is
+        # enlarged for tiles bigger than the tile size, offx, offy is the
+        # position of the surface relative to the top left tile
+        pygame = __import__('pygame')
+        size = self._chunk_size
+        tile_w = layer.tilewidth
+        tile_h = layer.tileheight
+        xmin = chunk_x * size
+        ymin = chunk_y * size
+        xmax = min(xmin + size, layer.right)
+        ymax = min(ymin + size, layer.bottom)
+        minx = 0
+        miny = 0
+        maxx = (xmax - xmin) * tile_w
+        maxy = (ymax - ymin) * tile_h
+        tiles = []
+        # same order as when rendering tile by tile
+        for ypos in xrange(max(ymin, layer.top), ymax):
+            for xpos, info in enumerate(layer.get_cells(max(xmin, layer.left), xmax, ypos), max(xmin, layer.left)):
+                if info:
+                    offx, offy, img = info
+                    posx = (xpos - xmin) * tile_w + offx
+                    posy = (ypos - ymin) * tile_h + offy
+                    minx = min(minx, posx)
+                    miny = min(miny, posy)
+                    maxx = max(maxx, posx + img.get_width())
+                    maxy = max(maxy, posy + img.get_height())
+                    tiles.append((img, posx, posy))
+        if not tiles:
+            return 0, 0, None, 0
+        chunk_surf = pygame.Surface((maxx - minx, maxy - miny), pygame.SRCALPHA, 32)
+        if pygame.display.get_surface() is not None:
+            chunk_surf = chunk_surf.convert_alpha()
+        chunk_surf.fill((0, 0, 0, 0))
+        for img, posx, posy in tiles:
+            chunk_surf.blit(img, (posx - minx, posy - miny))
+        return minx, miny, chunk_surf, _get_num_bytes(chunk_surf)
+
+    # def set_layer_paralax_factor(layer_id, factor_x, factor_y=None, center_x=0, center_y=0):
+        # self._world_map[layer_id].paralax_factor_x = factor_x
+        # if paralax_factor_y:
+            # self._world_map[layer_id].paralax_factor_y = factor_y
+        # else:
+            # self._world_map[layer_id].paralax_factor_y = factor_x
+        # self._world_map[layer_id].paralax_cemter_x = center_x
+        # self._world_map[layer_id].paralax_cemter_y = center_y
@@ -0,0 +1,257 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+u"""
+Renders a TileMap using pyglet. This module is not imported by
+tiledtmxloader, import it explicitly::
+
+    from tiledtmxloader import renderpyglet
+    image_loader = tiledtmxloader.ImageLoaderPyglet()
+    world_map.load(image_loader)
+    layout = image_loader.build_atlases(world_map)
+    renderer = renderpyglet.RendererPyglet(world_map, layout, image_loader.atlases)
+
+The vertices and texture coordinates of the tiles are built by
+build_chunk_vertices, which does not need pyglet or an OpenGL context.
+
+"""
+
+from tiledtmxloader import FLIP_HORIZONTAL, FLIP_VERTICAL, FLIP_DIAGONAL
+
+#-------------------------------------------------------------------------------
+def build_chunk_vertices(world_map, layer_id, layout, xmin, ymin, xmax, ymax):
+    u"""
+    Builds the quads of the tiles of a layer in the map cells xmin <= x < xmax,
+    ymin <= y < ymax, in the order they are drawn (row by row, top down).
+
+    The vertices are in map pixels with the origin in the lower left corner
+    of the map and y pointing up, like in OpenGL. Each quad has the corners
+    lower left, lower right, upper right and upper left. The texture
+    coordinates are flipped like Tiled flips the tiles.
+
+    :Parameters:
+        world_map : TileMap
+            a loaded map, only the offsets of world_map.indexed_tiles are used
+        layer_id : int
+            index of the layer in world_map.layers
+        layout : TextureAtlasLayout
+            the layout of the atlases holding the tile images, see
+            ImageLoaderPyglet.build_atlases()
+        xmin, ymin, xmax, ymax : int
+            the cells, in map cells (the layer x and y are subtracted)
+
+    :returns: {atlas index: (vertices, tex_coords)}, flat lists of floats
+              with two values per corner, e.g. for GL_QUADS with 'v2f' and 't2f'
+    """
+    world_layer = world_map.layers[layer_id]
+    tile_w = world_map.tilewidth
+    tile_h = world_map.tileheight
+    map_height = world_map.height * tile_h
+    # infinite maps can have tiles at negative positions
+    layer_xmin, layer_ymin, layer_xmax, layer_ymax = world_layer.get_bounds()
+    quads = {} # {(gid, flip): (atlas index, corner offsets, tex coords)}
+    result = {}
+    for ypos in xrange(max(ymin - world_layer.y, layer_ymin), min(ymax - world_layer.y, layer_ymax)):
+        top = map_height - (ypos + world_layer.y) * tile_h
+        for xpos in xrange(max(xmin - world_layer.x, layer_xmin), min(xmax - world_layer.x, layer_xmax)):
+            gid = world_layer.content2D[xpos][ypos]
+            if not gid:
+                continue
+            flip = world_layer.get_flags(xpos, ypos)
+            quad = quads.get((gid, flip))
+            if quad is None:
+                quad = _build_quad(world_map, layout, gid, flip)
+                quads[(gid, flip)] = quad
+            if quad is False:
+                continue
+            atlas_idx, corners, tex_coords = quad
+            entry = result.get(atlas_idx)
+            if entry is None:
+                entry = ([], [])
+                result[atlas_idx] = entry
+            left = (xpos + world_layer.x) * tile_w
+            entry[0].extend([left + corners[0], top + corners[1], left + corners[2], top + corners[3], \
+                             left + corners[4], top + corners[5], left + corners[6], top + corners[7]])
+            entry[1].extend(tex_coords)
+    return result
+
+def _build_quad(world_map, layout, gid, flip):
+    # returns (atlas index, corner offsets relative to the upper left corner
+    # of the cell, tex coords) of a tile or False if it has no atlas region
+    uv = layout.uv_table.get(gid)
+    if uv is None:
+        return False
+    atlas_idx, u0, v0, u1, v1 = uv
+    width, height = layout.regions[gid][3:5]
+    offx, offy = world_map.indexed_tiles[gid][:2]
+    if flip & FLIP_DIAGONAL:
+        width, height = height, width
+        # the size changed, align the bottom with the tile again, like renderpygame
+        offy = min(0, world_map.tileheight - height)
+    # lower left, lower right, upper right, upper left, y pointing up
+    left = offx
+    top = -offy
+    corners = (left, top - height, left + width, top - height, left + width, top, left, top)
+    # the corners in the flipped image, as fractions from its upper left
+    tex_coords = []
+    for s, t in ((0, 1), (1, 1), (1, 0), (0, 0)):
+        if flip & FLIP_VERTICAL:
+            t = 1 - t
+        if flip & FLIP_HORIZONTAL:
+            s = 1 - s
+        if flip & FLIP_DIAGONAL:
+            s, t = t, s
+        # v0 is the lower edge of the region
+        tex_coords.append(u0 + s * (u1 - u0))
+        tex_coords.append(v1 - t * (v1 - v0))
+    return atlas_idx, corners, tex_coords
+
+def get_tile_reach(world_map, layout):
+    u"""
+    Returns the pixels the tile images reach out of their cell as
+    (left, up, right, down), needed to find the chunks overlapping a view.
+    """
+    tile_w = world_map.tilewidth
+    tile_h = world_map.tileheight
+    reach = [0, 0, 0, 0]
+    for gid, region in layout.regions.items():
+        offx, offy = world_map.indexed_tiles[gid][:2]
+        # flipped diagonally the width and height are swapped
+        size = max(region[3:5])
+        reach = map(max, reach, (-offx, -offy, offx + size - tile_w, offy + size - tile_h))
+    return reach
+
+#-------------------------------------------------------------------------------
+
+class RendererPyglet(object):
+    u"""
+    Draws the tile layers of a map with one pyglet batch. The layers are cut
+    into chunks of chunk_size x chunk_size cells, each chunk is a vertex list
+    per atlas texture. Only the chunks overlapping the camera view exist,
+    set_camera_position creates the ones coming into view and deletes the
+    ones that left it.
+
+    :Undocumented:
+        pyglet
+    """
+
+    def __init__(self, world_map, layout, atlases, chunk_size=16):
+        u"""
+        :Parameters:
+            world_map : TileMap
+                a map loaded with ImageLoaderPyglet
+            layout : TextureAtlasLayout
+                as returned by ImageLoaderPyglet.build_atlases()
+            atlases : list
+                the atlas textures, ImageLoaderPyglet.atlases
+            chunk_size : int
+                width and height of a chunk in cells
+        """
+        self.pyglet = __import__('pyglet')
+        self._world_map = world_map
+        self._layout = layout
+        self._atlases = atlases
+        self._chunk_size = chunk_size
+        self._batch = self.pyglet.graphics.Batch()
+        self._layer_groups = [self.pyglet.graphics.OrderedGroup(idx) for idx in xrange(len(world_map.layers))]
+        self._texture_groups = {} # {(layer_id, atlas index): TextureGroup}
+        self._chunks = {} # {(layer_id, cx, cy): [vertex lists]}
+        self._tile_reach = get_tile_reach(world_map, layout)
+        self._layer_bounds = [layer.get_bounds() for layer in world_map.layers] # in tiles
+        self._cam_offset_x = 0
+        self._cam_offset_y = 0
+        self._cam_width = 10
+        self._cam_height = 10
+
+    def set_camera_position(self, offset_x, offset_y, width, height, margin=0):
+        u"""
+        Moves the view, offset_x, offset_y is its upper left corner in map
+        pixels with y pointing down like for RendererPygame. margin is the
+        number of chunks kept around the view.
+        """
+        self._cam_offset_x = int(offset_x)
+        self._cam_offset_y = int(offset_y)
+        self._cam_width = width
+        self._cam_height = height
+        self._update_chunks(margin)
+
+    def invalidate(self, layer_id=None):
+        u"""
+        Deletes the chunks of a layer or, if layer_id is None, of all layers.
+        Needed after changing tiles, they are built again by the next
+        set_camera_position call.
+        """
+        for key in self._chunks.keys():
+            if layer_id is None or key[0] == layer_id:
+                for vertex_list in self._chunks.pop(key):
+                    vertex_list.delete()
+
+    def get_num_chunks(self):
+        return len(self._chunks)
+
+    def draw(self):
+        u"""
+        Draws the chunks of the visible layers, the current modelview matrix
+        is moved so that the camera view starts at the window origin.
+        """
+        gl = self.pyglet.gl
+        gl.glPushMatrix()
+        gl.glPushAttrib(gl.GL_ENABLE_BIT | gl.GL_COLOR_BUFFER_BIT)
+        gl.glEnable(gl.GL_BLEND)
+        gl.glBlendFunc(gl.GL_SRC_ALPHA, gl.GL_ONE_MINUS_SRC_ALPHA)
+        map_height = self._world_map.height * self._world_map.tileheight
+        gl.glTranslatef(-self._cam_offset_x, self._cam_offset_y + self._cam_height - map_height, 0.0)
+        self._batch.draw()
+        gl.glPopAttrib()
+        gl.glPopMatrix()
+
+    def _update_chunks(self, margin):
+        reach_left, reach_up, reach_right, reach_down = self._tile_reach
+        size = self._chunk_size
+        chunk_w = size * self._world_map.tilewidth
+        chunk_h = size * self._world_map.tileheight
+        # the chunks containing tiles that reach into the view
+        left = (self._cam_offset_x - reach_right) // chunk_w - margin
+        right = (self._cam_offset_x + self._cam_width + reach_left - 1) // chunk_w + margin + 1
+        top = (self._cam_offset_y - reach_down) // chunk_h - margin
+        bottom = (self._cam_offset_y + self._cam_height + reach_up - 1) // chunk_h + margin + 1
+        wanted = set()
+        for layer_id, world_layer in enumerate(self._world_map.layers):
+            if not world_layer.visible:
+                continue
+            xmin, ymin, xmax, ymax = self._layer_bounds[layer_id]
+            for chunk_y in xrange(max(top, (world_layer.y + ymin) // size), \
+                                  min(bottom, -(-(world_layer.y + ymax) // size))):
+                for chunk_x in xrange(max(left, (world_layer.x + xmin) // size), \
+                                      min(right, -(-(world_layer.x + xmax) // size))):
+                    wanted.add((layer_id, chunk_x, chunk_y))
+            # the vertex lists do not need the decoded tiles, only keep the
+            # ones one chunk around the view decoded
+            if world_layer.chunks:
+                world_layer.release_chunks_outside((left - 1) * size - world_layer.x, (top - 1) * size - world_layer.y, \
+                                                   (right + 1) * size - world_layer.x, (bottom + 1) * size - world_layer.y)
+        for key in self._chunks.keys():
+            if key not in wanted:
+                for vertex_list in self._chunks.pop(key):
+                    vertex_list.delete()
+        for key in wanted:
+            if key not in self._chunks:
+                self._chunks[key] = self._build_chunk(*key)
+
+    def _build_chunk(self, layer_id, chunk_x, chunk_y):
+        size = self._chunk_size
+        vertex_lists = []
+        quads = build_chunk_vertices(self._world_map, layer_id, self._layout, \
+                        chunk_x * size, chunk_y * size, (chunk_x + 1) * size, (chunk_y + 1) * size)
+        for atlas_idx, (vertices, tex_coords) in quads.items():
+            vertex_lists.append(self._batch.add(len(vertices) // 2, self.pyglet.gl.GL_QUADS, \
+                                    self._get_texture_group(layer_id, atlas_idx), \
+                                    ('v2f/static', vertices), ('t2f/static', tex_coords)))
+        return vertex_lists
+
+    def _get_texture_group(self, layer_id, atlas_idx):
+        group = self._texture_groups.get((layer_id, atlas_idx))
+        if group is None:
+            group = self.pyglet.graphics.TextureGroup(self._atlases[atlas_idx], self._layer_groups[layer_id])
+            self._texture_groups[(layer_id, atlas_idx)] = group
+        return group